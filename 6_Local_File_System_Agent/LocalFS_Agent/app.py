@@ -2,15 +2,16 @@
 import streamlit as st
 import os
 import asyncio
-import nest_asyncio
+import queue
+import threading
+import time
 from dotenv import load_dotenv
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from server.fileops_pool import client_config, ensure_server
+from server.agent_memory import new_thread_id, open_checkpointer, thread_config, trim_history
 from langgraph.prebuilt import create_react_agent
 from langchain_groq import ChatGroq
-from langgraph.checkpoint.memory import InMemorySaver
 
-# Patch for running asyncio inside Streamlit
-nest_asyncio.apply()
 load_dotenv()
 
 # ================= Custom CSS Styling =================
@@ -397,52 +398,100 @@ with st.sidebar:
         st.success("✅ Ready to chat!")
     else:
         st.warning("⚠️ Configuration incomplete")
+    
+    new_chat = st.button("🆕 New conversation", help="Start a fresh thread; earlier ones stay saved")
 
 # ================= Session State Management =================
-if "messages" not in st.session_state:
+# Every browser session gets its own conversation thread
+if "thread_id" not in st.session_state or new_chat:
+    st.session_state.thread_id = new_thread_id()
     st.session_state.messages = []
 
 if "agent_initialized" not in st.session_state:
     st.session_state.agent_initialized = False
 
+# ================= Event Loop =================
+@st.cache_resource
+def get_event_loop():
+    """One asyncio loop for the whole app, running forever in a background thread"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="agent-loop", daemon=True).start()
+    return loop
+
+def run_async(coro):
+    """Run a coroutine on the shared loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+def stream_agent(agent, prompt, config):
+    """Yield ("token", text), ("tool_start", name, args), ("tool_end", name, output) as they happen"""
+    events = queue.Queue()
+    done = object()
+    
+    async def produce():
+        try:
+            async for event in agent.astream_events(
+                {"messages": [{"role": "user", "content": prompt}]}, config, version="v2"
+            ):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    text = event["data"]["chunk"].content
+                    if text:
+                        events.put(("token", text))
+                elif kind == "on_tool_start":
+                    events.put(("tool_start", event["name"], event["data"].get("input")))
+                elif kind == "on_tool_end":
+                    events.put(("tool_end", event["name"], event["data"].get("output")))
+        except Exception as e:
+            events.put(("error", e))
+        finally:
+            events.put(done)
+    
+    # the agent runs on the loop thread; Streamlit elements are only touched here
+    asyncio.run_coroutine_threadsafe(produce(), get_event_loop())
+    while (item := events.get()) is not done:
+        yield item
+
 # ================= Agent Setup Function =================
+@st.cache_resource
+def get_fileops_tools(roots):
+    """Connect once to the shared FileOps server (starting it confined to roots if needed) and load its tools"""
+    async def connect():
+        await ensure_server(roots=list(roots))
+        client = MultiServerMCPClient(client_config())
+        return await client.get_tools()
+    
+    return run_async(connect())
+
+@st.cache_resource
+def get_checkpointer():
+    """SQLite-backed conversation store shared by all agents and sessions"""
+    return run_async(open_checkpointer())
+
 @st.cache_resource
 def create_agent_instance(model_id, api_key, temp, max_tok, roots_str):
-    """Create and cache agent instance"""
-    async def setup_agent():
-        client = MultiServerMCPClient({
-            "FileOps_HelperServer": {
-                "command": "python", 
-                "args": ["server/FileOps_helper.py"],
-                "transport": "stdio",
-            }
-        })
-        
-        await asyncio.sleep(1)
-        tools = await client.get_tools()
-        
-        llm = ChatGroq(
-            model=model_id,
-            temperature=temp,
-            max_tokens=max_tok,
-            reasoning_format="parsed", 
-            max_retries=2,
-            api_key=api_key,
-        )
-        
-        roots_list = [r.strip() for r in roots_str.split(",") if r.strip()]
-        system_message = f"All file queries are limited to these roots: {roots_list}"
-        checkpointer = InMemorySaver()
-        
-        agent = create_react_agent(
-            llm,
-            tools, 
-            prompt=open(r"server/sys_msg.txt").read().strip() + system_message,
-            checkpointer=checkpointer,
-        )
-        return agent
+    """Create and cache agent instance (all agents share one FileOps server and checkpointer)"""
+    roots_list = [r.strip() for r in roots_str.split(",") if r.strip()]
+    tools = get_fileops_tools(tuple(roots_list))
+    
+    llm = ChatGroq(
+        model=model_id,
+        temperature=temp,
+        max_tokens=max_tok,
+        reasoning_format="parsed", 
+        max_retries=2,
+        api_key=api_key,
+    )
     
-    return asyncio.run(setup_agent())
+    system_message = f"All file queries are limited to these roots: {roots_list}"
+    
+    agent = create_react_agent(
+        llm,
+        tools, 
+        prompt=open(r"server/sys_msg.txt").read().strip() + system_message,
+        checkpointer=get_checkpointer(),
+        pre_model_hook=trim_history(),
+    )
+    return agent
 
 # ================= Main Chat Interface =================
 st.markdown('<h1 class="main-title">🚀 LocalFS Agent</h1>', unsafe_allow_html=True)
@@ -478,33 +527,60 @@ if prompt := st.chat_input("💬 Ask me anything about your files...", disabled=
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Generate response
+    # Generate response, rendering tool calls and tokens as they arrive
     with st.chat_message("assistant"):
-        with st.spinner("🧠 Processing your request..."):
-            try:
-                # Create agent instance
-                agent = create_agent_instance(
-                    selected_model_id, 
-                    api_key, 
-                    temperature,
-                    max_tokens,
-                    roots_input
-                )
-                
-                config = {"configurable": {"thread_id": "1"}}
-                response = asyncio.run(
-                    agent.ainvoke({"messages": [{"role": "user", "content": prompt}]}, config)
-                )
-                
-                reply = response["messages"][-1].content
-                st.markdown(reply)
-                
-                # Store assistant message
-                st.session_state.messages.append({"role": "assistant", "content": reply})
-                
-            except Exception as e:
-                st.error(f"❌ Error: {str(e)}")
-                st.error("Please check your API key and configuration.")
+        tool_area = st.container()
+        answer = st.empty()
+        answer.markdown("🧠 Thinking...")
+        try:
+            # Create agent instance
+            agent = create_agent_instance(
+                selected_model_id, 
+                api_key, 
+                temperature,
+                max_tokens,
+                roots_input
+            )
+            
+            config = thread_config(st.session_state.thread_id)
+            started = time.perf_counter()
+            first_token = None
+            reply = ""
+            running = {}
+            for kind, *payload in stream_agent(agent, prompt, config):
+                if kind == "token":
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    reply += payload[0]
+                    answer.markdown(reply + "▌")
+                elif kind == "tool_start":
+                    name, args = payload
+                    # text streamed before a tool call is not part of the final answer
+                    reply = ""
+                    answer.markdown("🧠 Thinking...")
+                    box = tool_area.status(f"🔧 {name}", state="running")
+                    box.code(str(args)[:1000])
+                    running.setdefault(name, []).append(box)
+                elif kind == "tool_end":
+                    name, output = payload
+                    if running.get(name):
+                        box = running[name].pop(0)
+                        box.code(str(getattr(output, "content", output))[:2000])
+                        box.update(label=f"✅ {name}", state="complete")
+                elif kind == "error":
+                    raise payload[0]
+            
+            answer.markdown(reply)
+            if first_token is not None:
+                st.caption(f"⚡ First token {first_token:.2f}s • total {time.perf_counter() - started:.2f}s")
+            
+            # Store assistant message
+            st.session_state.messages.append({"role": "assistant", "content": reply})
+            
+        except Exception as e:
+            answer.empty()
+            st.error(f"❌ Error: {str(e)}")
+            st.error("Please check your API key and configuration.")
 
 # Footer
 st.markdown("---")
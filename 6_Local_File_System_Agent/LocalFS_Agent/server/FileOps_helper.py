@@ -7,65 +7,333 @@ logging.basicConfig(level=logging.INFO)
 
 
 
+import argparse
+import asyncio
 import os
 import shutil
+import threading
 
 
 import time
-import hashlib
 from pathlib import Path
-from typing import List, Dict, Union
-from mcp.server.fastmcp import FastMCP
+import numpy as np
+from typing import Callable, List, Dict, Optional, Sequence, Union
+from mcp.server.fastmcp import Context, FastMCP
+from index_store import IndexStore, default_db_path
+from columnar_index import ColumnarIndex
+from name_index import NameIndex
+from dir_tree import DirTree
+from content_index import TEXT_EXTS, ContentIndex, default_content_db_path
+from file_reader import grep, is_binary, read_lines, read_range
+from bulk_copy import BulkJob, fast_copy, plan_transfers
+from file_ops import BatchPlan, apply_plan, default_journal_dir, touched_paths, undo_batch
+from duplicates import HASH_NAME, find_duplicate_groups
+from watcher import FileWatcher
+from scanner import DEFAULT_EXCLUDES, excluded_below
+from tool_cache import ToolCache
+from path_guard import PathGuard, roots_from_env
+from fileops_pool import TOKEN_ENV, require_token
 mcp=FastMCP("FileOps_HelperServer")
+
+# Persistent on-disk index; refreshes only re-list directories whose mtime changed.
+store = IndexStore(default_db_path())
+# Full-text index over text-like files; re-reads only files whose size/mtime moved.
+content = ContentIndex(default_content_db_path())
+
 @mcp.tool()
-def build_file_index(roots: Union[str, list[str]]) -> list[dict]:
+async def build_file_index(roots: Union[str, list[str]], full: bool = False,
+                           ctx: Context = None) -> str:
     """
-    Recursively scans one or more root directories and returns a list of files with metadata.
+    Recursively scans one or more root directories into the server-side index.
     roots: str (single path) or list of paths
+    full: re-list every directory instead of only those whose mtime changed
     """
     if isinstance(roots, str):  # convert single string to list
         roots = [roots]
+    return await refresh_index(roots, full=full, ctx=ctx)
+
+
+
+# Server keeps this global, warm-started from the persisted index.
+# Query tools read it directly so the index never crosses the MCP transport.
+index = ColumnarIndex.build(store.iter_rows())
+index_roots = store.roots()
+watcher: Optional[FileWatcher] = None
+# Trigram/prefix filename index, built on first search and kept current by
+# ColumnarIndex row notifications until the index object is replaced.
+_name_index: Optional[NameIndex] = None
+
+
+# Folder size tree, same lifecycle.
+_dir_tree: Optional[DirTree] = None
+
+
+# Serializes (re)builds so a background warm-up and a tool call never build twice.
+# Builders take ix.lock inside it, so never acquire it while holding ix.lock.
+_derived_lock = threading.Lock()
+started_at = time.time()
+
+
+def _names(ix: ColumnarIndex) -> NameIndex:
+    global _name_index
+    with _derived_lock:
+        current = _name_index
+        if current is None or current.ix is not ix or current.stale:
+            if current is not None:
+                current.close()
+            current = _name_index = NameIndex(ix)
+        return current
+
+
+def _tree(ix: ColumnarIndex) -> DirTree:
+    global _dir_tree
+    with _derived_lock:
+        current = _dir_tree
+        if current is None or current.ix is not ix:
+            if current is not None:
+                current.close()
+            current = _dir_tree = DirTree(ix, index_roots)
+        return current
+
+
+# Results of read-only tools, keyed on their arguments and on what the answer
+# depends on (index generation, or the file's mtime/size for file reads).
+tool_cache = ToolCache()
+
+
+def _index_version(args: Dict) -> tuple:
+    return (index.generation,)
+
+
+def _content_version(args: Dict) -> tuple:
+    return (content.generation,)
+
+
+def _day_version(args: Dict) -> tuple:
+    return (index.generation, time.localtime()[:3])
 
-    index = []
-    for root_dir in roots:
-        for dirpath, _, filenames in os.walk(root_dir):
-            for f in filenames:
-                p = Path(dirpath) / f
-                try:
-                    index.append({
-                        "name": f,
-                        "path": str(p),
-                        "size": p.stat().st_size,
-                        "modified": p.stat().st_mtime,
-                        "ext": p.suffix.lower()
-                    })
-                except Exception:
-                    pass
-    return index
 
+def _file_version(args: Dict) -> tuple:
+    # the guard refuses paths outside the roots before anything is stat'ed
+    st = os.stat(_path(args["path"]))
+    return (st.st_mtime_ns, st.st_size)
 
 
-# Server keeps this global
-index = []
+# Allowed roots, fixed at server start (--root / LOCALFS_ROOTS). Every tool
+# resolves its paths through the guard; without roots nothing is restricted.
+guard = PathGuard()
+
+
+def _path(path: str) -> str:
+    return guard.resolve(path)
+
+
+def _confine(roots: List[str]) -> None:
+    """Restrict all tools to roots and drop indexed files outside them."""
+    global guard, index, index_roots
+    guard = PathGuard(roots)
+    kept = [r for r in index_roots if guard.allows(os.path.realpath(r))]
+    for root in map(os.path.abspath, roots):
+        # an allowed root inside a wider indexed root keeps its part of the index
+        if _in_roots(root) and not any(root == k or root.startswith(k.rstrip(os.sep) + os.sep) for k in kept):
+            kept.append(root)
+    if kept != index_roots:
+        index_roots = kept
+        index = ColumnarIndex.build(store.iter_rows(kept))
+    content.retain(index_roots)
+
+
+def _warm_up() -> None:
+    """Build the name index and folder tree up front so first queries are fast."""
+    ix = index
+    _names(ix)
+    _tree(ix)
+    logging.info("Warm-up done: %d files indexed", len(ix))
+
 @mcp.tool()
-def refresh_index(roots: list[str]) -> str:
+async def refresh_index(
+    roots: list[str],
+    full: bool = False,
+    exclude: Optional[List[str]] = None,
+    max_depth: Optional[int] = None,
+    index_content: bool = True,
+    ctx: Context = None,
+) -> str:
     """
     Refreshes the in-memory file index for the given roots.
     
     Args:
-        roots: List of folder paths to scan.
+        roots: List of folder paths to scan (scanned in parallel).
+        full: If True, re-list every directory even if its mtime is unchanged.
+        exclude: Glob patterns for file/folder names to skip
+            (default: .git, node_modules, __pycache__, .venv).
+        max_depth: Deepest folder level to index below each root; omit for unlimited.
+        index_content: Also update the full-text index used by search_content.
     
     Returns:
         Confirmation message with number of files indexed.
     """
+    global index, index_roots
+    roots = [_path(r) for r in roots]
+    loop = asyncio.get_running_loop()
+    last_report = 0.0
+
+    def progress(dirs_done: int, files_seen: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if ctx is not None and now - last_report >= 0.5:
+            last_report = now
+            asyncio.run_coroutine_threadsafe(
+                ctx.report_progress(dirs_done, message=f"{dirs_done} folders, {files_seen} files scanned"),
+                loop,
+            )
+
+    stats = await asyncio.to_thread(
+        store.refresh, roots, full,
+        DEFAULT_EXCLUDES if exclude is None else exclude, max_depth, progress=progress,
+    )
+    index = await asyncio.to_thread(lambda: ColumnarIndex.build(store.iter_rows(roots)))
+    index_roots = [os.path.abspath(r) for r in roots]
+    if watcher is not None:
+        watcher.watch(index_roots)
+    message = (f"Index refreshed: {len(index)} files under {roots} "
+               f"({stats['dirs_scanned']} dirs rescanned, {stats['dirs_reused']} reused, {stats['seconds']}s)")
+    if index_content:
+        def content_progress(done: int, total: int) -> None:
+            if ctx is not None:
+                asyncio.run_coroutine_threadsafe(
+                    ctx.report_progress(done, total, message=f"{done}/{total} text files read"), loop,
+                )
+
+        cstats = await asyncio.to_thread(content.sync, _text_files(index), progress=content_progress)
+        message += f"; content index: {cstats['read']} files read, {cstats['removed']} removed"
+    return message
+
+
+def _text_files(ix: ColumnarIndex) -> List[tuple]:
+    """(path, size, mtime) of every text-like file in the index."""
+    with ix.lock:
+        rows = np.flatnonzero(ix.mask(exts=TEXT_EXTS)).tolist()
+        return [(ix.path(i), int(ix.size[i]), float(ix.mtime[i])) for i in rows]
+
+
+# =========================
+# 🔄 LIVE INDEX UPDATES
+# =========================
+def _in_roots(path: str) -> bool:
+    return any(path == r or path.startswith(r.rstrip(os.sep) + os.sep) for r in index_roots)
+
+
+def _root_excludes() -> Callable[[str], Optional[tuple]]:
+    """Map a path to (root, exclude globs) of the innermost indexed root holding it."""
+    stored = store.excludes()
+
+    def lookup(path: str) -> Optional[tuple]:
+        roots = [r for r in index_roots if path == r or path.startswith(r.rstrip(os.sep) + os.sep)]
+        if not roots:
+            return None
+        root = max(roots, key=len)
+        return root, stored.get(root, DEFAULT_EXCLUDES)
+    return lookup
+
+
+def _walk_files(folder: str, excludes: Sequence[str] = ()) -> List[tuple]:
+    """(path, size, mtime, ino) for every file below folder, skipping excluded names."""
+    rows, stack = [], [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if excluded_below(current, entry.path, excludes):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            rows.append((entry.path, st.st_size, st.st_mtime, st.st_ino))
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+    return rows
+
+
+def sync_paths(files: List[str] = (), dirs: List[str] = ()) -> None:
+    """
+    Re-stat changed paths and apply them to the store and in-memory index.
+    
+    Args:
+        files: File paths that were created, modified or removed.
+        dirs: Folder paths that were created, moved or removed (whole subtree).
+    """
+    guard.forget(dirs)
+    root_of = _root_excludes()
+    found: Dict[str, tuple] = {}
+    deletes, tree_deletes = [], []
+    for path in map(os.path.abspath, dirs):
+        hit = root_of(path)
+        if hit is None or excluded_below(hit[0], path, hit[1]):
+            continue
+        tree_deletes.append(path)
+        if os.path.isdir(path):
+            found.update((row[0], row) for row in _walk_files(path, hit[1]))
+    for path in map(os.path.abspath, files):
+        hit = root_of(path)
+        if hit is None or excluded_below(hit[0], path, hit[1]):
+            continue
+        try:
+            st = os.stat(path)
+            found[path] = (path, st.st_size, st.st_mtime, st.st_ino)
+        except OSError:
+            deletes.append(path)
+    upserts = list(found.values())
+    if not (upserts or deletes or tree_deletes):
+        return
+    store.apply(upserts, deletes, tree_deletes)
+    rows = [(p, size, mtime) for p, size, mtime, _ in upserts]
+    index.apply(rows, deletes, tree_deletes)
+    content.apply(rows, deletes, tree_deletes)
+
+
+def _sync_moved(paths: List[str], is_dir: bool) -> None:
+    if is_dir:
+        sync_paths(dirs=paths)
+    else:
+        sync_paths(files=paths)
+
+
+def _poll_refresh() -> None:
+    """Polling fallback: cheap dir-mtime refresh, rebuild only if something moved."""
     global index
-    index = build_file_index(roots)
-    return f"Index refreshed: {len(index)} files under {roots}"
+    if store.refresh(index_roots)["dirs_scanned"]:
+        index = ColumnarIndex.build(store.iter_rows(index_roots))
+        content.sync(_text_files(index))
+
+
+def _page(files: List[Dict], limit: int, offset: int) -> Dict:
+    """Slice a result list into one page with the total match count."""
+    offset = max(offset, 0)
+    return {"total": len(files), "offset": offset, "results": files[offset:offset + max(limit, 0)]}
+
+
+def _query(limit: int, offset: int, sort_by: str = "path", descending: bool = False, **predicates) -> Dict:
+    """Evaluate predicates on the columnar index and materialize one page."""
+    ix = index
+    with ix.lock:
+        total, rows = ix.select(ix.mask(**predicates), sort_by, descending, limit, offset)
+        return {"total": total, "offset": max(offset, 0), "results": ix.records(rows)}
+
+
+def _norm_ext(ext: str) -> str:
+    return ext.lower() if ext.startswith(".") else "." + ext.lower()
 
 
 # Helper functions for LocalFS Agent.
 # These tools allow an LLM-powered agent to query, analyze, and organize files
-# 
+# All query tools run against the server-held index and return a page of
+# results: {"total": <matches>, "offset": <offset>, "results": [...]}.
 
 
 
@@ -75,205 +343,387 @@ def refresh_index(roots: list[str]) -> str:
 # 🔎 SEARCH TOOLS
 # =========================
 @mcp.tool()
-def search_file_by_name(index: List[Dict], name: str) -> List[Dict]:
+@tool_cache.cached(_index_version)
+def search_file_by_name(name: str, mode: str = "substring", max_edits: int = 2,
+                        limit: int = 50, offset: int = 0) -> Dict:
     """
-    Search files by partial name (case-insensitive).
+    Search files by name (case-insensitive).
     
     Args:
-        index: List of file metadata dicts.
-        name: Substring to search in filenames.
+        name: Text to look for in filenames (a pattern like '*.tar.gz' in glob mode).
+        mode: 'substring', 'prefix', 'glob', or 'fuzzy' (tolerates typos).
+        max_edits: Maximum typos allowed in fuzzy mode.
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
     
     Returns:
-        List of matching file metadata dicts.
+        Page of matching file metadata dicts, best matches first. In fuzzy
+        mode each result also carries its edit 'distance'.
     """
-    return [f for f in index if name.lower() in f["name"].lower()]
+    ix = index
+    names = _names(ix)  # before ix.lock: lock order is _derived_lock, then ix.lock
+    with ix.lock:
+        page = _page(names.search(name, mode, max_edits), limit, offset)
+        records = ix.records([row for row, _ in page["results"]])
+        if mode == "fuzzy":
+            for record, (_, distance) in zip(records, page["results"]):
+                record["distance"] = int(distance)
+        page["results"] = records
+    return page
 
 @mcp.tool()
-def find_by_extension(index: List[Dict], ext: str) -> List[Dict]:
+@tool_cache.cached(_content_version)
+def search_content(query: str, exts: Optional[List[str]] = None, folder: Optional[str] = None,
+                   match_all: bool = True, limit: int = 20, offset: int = 0) -> Dict:
+    """
+    Full-text search inside text files (BM25-ranked), instead of reading files one by one.
+    
+    Args:
+        query: Words to look for; wrap text in double quotes to match a phrase.
+        exts: Only search files with these extensions (e.g., ['py', '.md']).
+        folder: Only search files inside this folder (recursive).
+        match_all: Require every word; set False to match any of them.
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
+    
+    Returns:
+        Page of {name, path, size, modified, score, snippet}, best matches first.
+        Matched words are marked with [brackets] in the snippet.
+    """
+    page = content.search(query, [_norm_ext(e) for e in exts] if exts else None,
+                          folder and _path(folder), match_all, limit, offset,
+                          roots=index_roots if guard.enabled else None)
+    if guard.enabled:
+        # linked files inside the roots may point outside them
+        allowed = [r for r in page["results"] if guard.allows(os.path.realpath(r["path"]))]
+        page["total"] -= len(page["results"]) - len(allowed)
+        page["results"] = allowed
+    return page
+
+@mcp.tool()
+@tool_cache.cached(_index_version)
+def find_by_extension(ext: str, limit: int = 50, offset: int = 0) -> Dict:
     """
     Find all files with a given extension.
     
     Args:
-        index: List of file metadata dicts.
         ext: File extension (e.g., 'pdf' or '.pdf').
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
     
     Returns:
-        List of matching file metadata dicts.
+        Page of matching file metadata dicts.
     """
-    ext = ext.lower() if ext.startswith(".") else "." + ext.lower()
-    return [f for f in index if f["ext"] == ext]
+    return _query(limit, offset, exts=[_norm_ext(ext)])
 
 @mcp.tool()
-def find_by_type(index: List[Dict], types: List[str]) -> List[Dict]:
+@tool_cache.cached(_index_version)
+def find_by_type(types: List[str], limit: int = 50, offset: int = 0) -> Dict:
     """
     Find all files with extensions from a list.
     
     Args:
-        index: List of file metadata dicts.
         types: List of file extensions (e.g., ['.jpg', '.png']).
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
+    
+    Returns:
+        Page of matching file metadata dicts.
+    """
+    return _query(limit, offset, exts=[_norm_ext(t) for t in types])
+
+@mcp.tool()
+@tool_cache.cached(_index_version)
+def query_files(
+    exts: Optional[List[str]] = None,
+    min_size_kb: Optional[float] = None,
+    max_size_kb: Optional[float] = None,
+    modified_after: Optional[float] = None,
+    modified_before: Optional[float] = None,
+    folder: Optional[str] = None,
+    sort_by: str = "path",
+    descending: bool = False,
+    limit: int = 50,
+    offset: int = 0,
+) -> Dict:
+    """
+    Combined file query: every given filter must match (omitted filters match all).
+    
+    Args:
+        exts: File extensions to include (e.g., ['pdf', '.docx']).
+        min_size_kb: Minimum file size in KB.
+        max_size_kb: Maximum file size in KB.
+        modified_after: Only files modified after this UNIX timestamp.
+        modified_before: Only files modified before this UNIX timestamp.
+        folder: Only files inside this folder (recursive).
+        sort_by: One of 'path', 'size', 'modified'.
+        descending: Sort in descending order.
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
     
     Returns:
-        List of matching file metadata dicts.
+        Page of matching file metadata dicts.
     """
-    types = [t.lower() if t.startswith(".") else "." + t.lower() for t in types]
-    return [f for f in index if f["ext"] in types]
+    return _query(
+        limit, offset, sort_by, descending,
+        exts=[_norm_ext(e) for e in exts] if exts else None,
+        min_size=None if min_size_kb is None else min_size_kb * 1024,
+        max_size=None if max_size_kb is None else max_size_kb * 1024,
+        modified_after=modified_after,
+        modified_before=modified_before,
+        folder=folder and _path(folder),
+    )
 
 
 # =========================
 # ⏱️ TIME-BASED TOOLS
 # =========================
 @mcp.tool()
-def recent_files(index: List[Dict], n: int = 5) -> List[Dict]:
+@tool_cache.cached(_index_version)
+def recent_files(n: int = 5) -> List[Dict]:
     """
     Get N most recently modified files.
     
     Args:
-        index: List of file metadata dicts.
         n: Number of files to return.
     
     Returns:
         List of file metadata dicts sorted by modification date.
     """
-    return sorted(index, key=lambda f: f["modified"], reverse=True)[:n]
+    return _query(n, 0, "modified", True)["results"]
 
 @mcp.tool()
-def files_modified_after(index: List[Dict], timestamp: float) -> List[Dict]:
+@tool_cache.cached(_index_version)
+def files_modified_after(timestamp: float, limit: int = 50, offset: int = 0) -> Dict:
     """
     Get files modified after a given UNIX timestamp.
     
     Args:
-        index: List of file metadata dicts.
         timestamp: UNIX timestamp.
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
     
     Returns:
-        List of matching file metadata dicts.
+        Page of matching file metadata dicts.
     """
-    return [f for f in index if f["modified"] > timestamp]
+    return _query(limit, offset, modified_after=timestamp)
 
 @mcp.tool()
-def files_modified_today(index: List[Dict]) -> List[Dict]:
+@tool_cache.cached(_day_version)
+def files_modified_today(limit: int = 50, offset: int = 0) -> Dict:
     """
     Get all files modified today.
     
     Args:
-        index: List of file metadata dicts.
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
     
     Returns:
-        List of file metadata dicts modified today.
+        Page of file metadata dicts modified today.
     """
     start_of_day = time.mktime(time.localtime()[:3] + (0, 0, 0, 0, 0, -1))
-    return files_modified_after(index, start_of_day)
+    return files_modified_after(start_of_day, limit, offset)
 
 
 # =========================
 # 📏 SIZE-BASED TOOLS
 # =========================
 @mcp.tool()
-def large_files(index: List[Dict], min_size_mb: float) -> List[Dict]:
+@tool_cache.cached(_index_version)
+def large_files(min_size_mb: float, limit: int = 50, offset: int = 0) -> Dict:
     """
     Find files larger than a given size in MB.
     
     Args:
-        index: List of file metadata dicts.
         min_size_mb: Minimum file size in MB.
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
     
     Returns:
-        List of matching file metadata dicts.
+        Page of matching file metadata dicts.
     """
-    return [f for f in index if f["size"] >= min_size_mb * 1024 * 1024]
+    return _query(limit, offset, min_size=min_size_mb * 1024 * 1024)
 
 @mcp.tool()
-def small_files(index: List[Dict], max_size_kb: float) -> List[Dict]:
+@tool_cache.cached(_index_version)
+def small_files(max_size_kb: float, limit: int = 50, offset: int = 0) -> Dict:
     """
     Find files smaller than a given size in KB.
     
     Args:
-        index: List of file metadata dicts.
         max_size_kb: Maximum file size in KB.
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
     
     Returns:
-        List of matching file metadata dicts.
+        Page of matching file metadata dicts.
     """
-    return [f for f in index if f["size"] <= max_size_kb * 1024]
+    return _query(limit, offset, max_size=max_size_kb * 1024)
 
 
 # =========================
 # 📂 FOLDER-BASED TOOLS
 # =========================
 @mcp.tool()
-def files_in_folder(index: List[Dict], folder: str) -> List[Dict]:
+@tool_cache.cached(_index_version)
+def files_in_folder(folder: str, limit: int = 50, offset: int = 0) -> Dict:
     """
     List all files inside a specific folder (recursive).
     
     Args:
-        index: List of file metadata dicts.
         folder: Path of the folder to search.
+        limit: Maximum number of results to return.
+        offset: Number of matches to skip (for paging).
     
     Returns:
-        List of matching file metadata dicts.
+        Page of matching file metadata dicts.
     """
-    folder = str(Path(folder).resolve())
-    return [f for f in index if str(Path(f["path"])).startswith(folder)]
+    folder = _path(folder)
+    ix = index
+    tree = _tree(ix)  # before ix.lock: lock order is _derived_lock, then ix.lock
+    offset = max(offset, 0)
+    with ix.lock:
+        if tree.find(folder) is None:
+            return {"total": 0, "offset": offset, "results": []}
+        rows = ix.folder_rows(folder)
+        return {"total": len(rows), "offset": offset, "results": ix.records(rows[offset:offset + max(limit, 0)])}
+
+@mcp.tool()
+@tool_cache.cached(_index_version)
+def du(folder: str, depth: int = 1, limit: int = 20) -> Dict:
+    """
+    Disk usage of a folder: total size, file count and newest modification,
+    with its largest subfolders nested below.
+    
+    Args:
+        folder: Path of the folder.
+        depth: Levels of subfolders to include (0 for just the folder).
+        limit: Maximum subfolders listed per folder, largest first.
+    
+    Returns:
+        Dict with path, size, files, own_size/own_files (files directly inside),
+        newest (UNIX timestamp) and 'children'.
+    """
+    result = _tree(index).du(_path(folder), depth, limit)
+    if result is None:
+        raise FileNotFoundError(f"No indexed files under: {folder}")
+    return result
+
+@mcp.tool()
+@tool_cache.cached(_index_version)
+def top_folders_by_size(n: int = 10, folder: Optional[str] = None) -> List[Dict]:
+    """
+    Find the folders using the most space.
+    
+    Args:
+        n: Number of folders to return.
+        folder: Only look below this folder (default: all indexed roots).
+    
+    Returns:
+        List of folder stats dicts (path, size, files, newest), largest first.
+    """
+    tree = _tree(index)
+    found = [f for root in ([_path(folder)] if folder else index_roots) for f in tree.top(root, n)]
+    return sorted(found, key=lambda f: f["size"], reverse=True)[:n]
+
+@mcp.tool()
+@tool_cache.cached(_index_version)
+def treemap(folder: str, depth: int = 2, min_fraction: float = 0.02) -> Dict:
+    """
+    Nested size breakdown of a folder, suitable for drawing a treemap.
+    
+    Args:
+        folder: Path of the folder.
+        depth: Levels of subfolders to expand.
+        min_fraction: Subfolders smaller than this share of their parent are
+            merged into an "(other)" entry; "(files)" holds files directly inside.
+    
+    Returns:
+        Nested dict of {name, path, size, files, children}.
+    """
+    result = _tree(index).treemap(_path(folder), depth, min_fraction)
+    if result is None:
+        raise FileNotFoundError(f"No indexed files under: {folder}")
+    return result
 
 
 # =========================
 # 🧠 SMART UTILITIES
 # =========================
 @mcp.tool()
-def group_by_extension(index: List[Dict]) -> Dict[str, List[Dict]]:
+@tool_cache.cached(_index_version)
+def group_by_extension(files_per_group: int = 5) -> Dict[str, Dict]:
     """
     Group files by their extension.
     
     Args:
-        index: List of file metadata dicts.
+        files_per_group: Number of example files to include per extension.
     
     Returns:
-        Dictionary where keys are extensions and values are lists of files.
+        Dictionary where keys are extensions and values are
+        {"count": ..., "total_size": ..., "files": [first N files]}.
     """
-    groups: Dict[str, List[Dict]] = {}
-    for f in index:
-        groups.setdefault(f["ext"], []).append(f)
-    return groups
+    return {
+        ext: {
+            "count": count,
+            "total_size": total_size,
+            "files": _query(files_per_group, 0, exts=[ext])["results"],
+        }
+        for ext, count, total_size in index.ext_stats()
+    }
 
 @mcp.tool()
-def top_extensions(index: List[Dict], n: int = 5) -> List[tuple[str, int]]:
+@tool_cache.cached(_index_version)
+def top_extensions(n: int = 5) -> List[tuple[str, int]]:
     """
     Find the most common file types by count.
     
     Args:
-        index: List of file metadata dicts.
         n: Number of top file types to return.
     
     Returns:
         List of tuples (extension, count).
     """
-    groups = group_by_extension(index)
-    return sorted(((ext, len(files)) for ext, files in groups.items()), 
-                  key=lambda x: x[1], reverse=True)[:n]
+    stats = sorted(index.ext_stats(), key=lambda x: x[1], reverse=True)
+    return [(ext, count) for ext, count, _ in stats[:n]]
 
 @mcp.tool()
-def find_duplicates(index: List[Dict]) -> List[List[Dict]]:
+@tool_cache.cached(_index_version)
+def find_duplicates(folder: Optional[str] = None, min_size_kb: float = 0,
+                    limit: int = 50, offset: int = 0) -> Dict:
     """
-    Find duplicate files by comparing file hashes.
+    Find duplicate files: bucket by size, hash head/tail, then full-hash the survivors.
+    Hard links to the same inode are one file: listed together, never counted as reclaimable.
     
     Args:
-        index: List of file metadata dicts.
+        folder: Only consider files inside this folder (default: whole index).
+        min_size_kb: Ignore files smaller than this (empty files are always ignored).
+        limit: Maximum number of duplicate groups to return.
+        offset: Number of duplicate groups to skip (for paging).
     
     Returns:
-        List of lists, where each inner list contains duplicate files.
+        {"total": <groups>, "reclaimable_bytes": <bytes freed by keeping one copy per group>,
+         "offset": ..., "results": [{"hash", "size", "count", "reclaimable_bytes", "paths"}]},
+        largest reclaimable groups first.
     """
-    seen: Dict[str, Dict] = {}
-    duplicates: List[List[Dict]] = []
-    for f in index:
-        try:
-            h = hashlib.md5(Path(f["path"]).read_bytes()).hexdigest()
-            if h in seen:
-                duplicates.append([seen[h], f])
-            else:
-                seen[h] = f
-        except Exception:
-            pass
-    return duplicates
+    ix = index
+    with ix.lock:
+        mask = ix.mask(min_size=max(1, min_size_kb * 1024),
+                       folder=None if folder is None else _path(folder))
+        rows = np.flatnonzero(mask)
+        _, inverse, counts = np.unique(ix.size[rows], return_inverse=True, return_counts=True)
+        rows = rows[counts[inverse] > 1]
+        candidates = [(ix.path(i), int(ix.size[i]), float(ix.mtime[i])) for i in rows]
+
+    groups, new_hashes = find_duplicate_groups(candidates, store.get_hashes(HASH_NAME))
+    store.put_hashes(HASH_NAME, new_hashes)
+    for g in groups:
+        g["count"] = len(g["paths"])
+        g["reclaimable_bytes"] = g["size"] * (g.pop("files") - 1)
+    groups.sort(key=lambda g: g["reclaimable_bytes"], reverse=True)
+    page = _page(groups, limit, offset)
+    page["reclaimable_bytes"] = sum(g["reclaimable_bytes"] for g in groups)
+    return page
 
 
 
@@ -293,21 +743,55 @@ def find_duplicates(index: List[Dict]) -> List[List[Dict]]:
 # 📖 READ & WRITE
 # =========================
 @mcp.tool()
-def read_file(path: str, max_bytes: int = 5000) -> str:
+@tool_cache.cached(_file_version)
+def read_file(path: str, max_bytes: int = 5000, offset: int = 0, tail: bool = False,
+              start_line: Optional[int] = None, end_line: Optional[int] = None) -> str:
     """
-    Read the contents of a text file (truncated to avoid overload).
+    Read part of a text file; only the requested bytes are read from disk.
     
     Args:
         path: Path to the file.
-        max_bytes: Maximum number of bytes to read.
+        max_bytes: Maximum number of bytes to return.
+        offset: Byte offset to start reading at.
+        tail: Read the last max_bytes bytes instead (ignores offset).
+        start_line: First line to return (1-based; negative counts from the end, -1 = last line).
+        end_line: Last line to return (inclusive); omit to read up to max_bytes.
     
     Returns:
         File contents as a string.
     """
+    path = _path(path)
     p = Path(path)
     if not p.exists() or not p.is_file():
         raise FileNotFoundError(f"File not found: {path}")
-    return p.read_text(errors="ignore")[:max_bytes]
+    if is_binary(path):
+        raise ValueError(f"{path} looks like a binary file ({p.stat().st_size} bytes)")
+    if start_line is not None or end_line is not None:
+        return read_lines(path, start_line or 1, end_line, max_bytes)
+    return read_range(path, -max_bytes if tail else offset, max_bytes)
+
+@mcp.tool()
+@tool_cache.cached(_file_version)
+def grep_file(path: str, pattern: str, regex: bool = False, ignore_case: bool = False,
+              max_matches: int = 100) -> Dict:
+    """
+    Find matching lines in a (possibly very large) text file without loading it.
+    
+    Args:
+        path: Path to the file.
+        pattern: Text to look for (a regular expression if regex=True).
+        regex: Treat pattern as a regular expression.
+        ignore_case: Case-insensitive matching.
+        max_matches: Stop after this many matching lines.
+    
+    Returns:
+        {"matches": [{"line", "offset", "text"}], "truncated"}; pass a match's
+        line to read_file(start_line=...) for surrounding context.
+    """
+    path = _path(path)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    return grep(path, pattern, regex, ignore_case, max_matches)
 
 @mcp.tool()
 def write_file(path: str, content: str, overwrite: bool = False, append: bool = False) -> str:
@@ -326,22 +810,25 @@ def write_file(path: str, content: str, overwrite: bool = False, append: bool =
     Raises:
         FileExistsError: If file exists and neither overwrite nor append is True.
     """
+    path = _path(path)
     p = Path(path)
     
     if p.exists():
         if append:
             with p.open("a", encoding="utf-8") as f:
                 f.write(content)
-            return f"Appended content to: {path}"
+            message = f"Appended content to: {path}"
         elif overwrite:
             p.write_text(content)
-            return f"Overwritten file: {path}"
+            message = f"Overwritten file: {path}"
         else:
             raise FileExistsError(f"File already exists: {path}")
     else:
         # File does not exist, create new
         p.write_text(content)
-        return f"File created: {path}"
+        message = f"File created: {path}"
+    sync_paths(files=[path])
+    return message
 
 @mcp.tool()
 def append_to_file(path: str, content: str) -> str:
@@ -355,9 +842,11 @@ def append_to_file(path: str, content: str) -> str:
     Returns:
         Confirmation message.
     """
+    path = _path(path)
     p = Path(path)
     with p.open("a", encoding="utf-8") as f:
         f.write(content)
+    sync_paths(files=[path])
     return f"Content appended to: {path}"
 
 
@@ -375,12 +864,14 @@ def delete_file(path: str) -> str:
     Returns:
         Confirmation message.
     """
+    path = _path(path)
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"File not found: {path}")
     if not p.is_file():
         raise IsADirectoryError(f"Path is a folder, not a file: {path}")
     p.unlink()
+    sync_paths(files=[path])
     return f"Deleted file: {path}"
 
 @mcp.tool()
@@ -394,12 +885,14 @@ def delete_folder(path: str) -> str:
     Returns:
         Confirmation message.
     """
+    path = _path(path)
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"Folder not found: {path}")
     if not p.is_dir():
         raise NotADirectoryError(f"Path is a file, not a folder: {path}")
     shutil.rmtree(p)
+    sync_paths(dirs=[path])
     return f"Deleted folder: {path}"
 
 
@@ -417,7 +910,7 @@ def create_folder(path: str) -> str:
     Returns:
         Confirmation message.
     """
-    p = Path(path)
+    p = Path(_path(path))
     p.mkdir(parents=True, exist_ok=True)
     return f"Created folder: {path}"
 
@@ -433,7 +926,10 @@ def move_file(src: str, dst: str) -> str:
     Returns:
         Confirmation message.
     """
-    shutil.move(src, dst)
+    src, dst = _path(src), _path(dst)
+    is_dir = os.path.isdir(src)
+    final = shutil.move(src, dst, copy_function=fast_copy)
+    _sync_moved([src, final], is_dir)
     return f"Moved file from {src} to {dst}"
 
 @mcp.tool()
@@ -448,9 +944,67 @@ def copy_file(src: str, dst: str) -> str:
     Returns:
         Confirmation message.
     """
-    shutil.copy2(src, dst)
+    final = fast_copy(_path(src), _path(dst))
+    sync_paths(files=[final])
     return f"Copied file from {src} to {dst}"
 
+@mcp.tool()
+async def bulk_transfer(
+    sources: List[str] = (),
+    dst_folder: str = "",
+    move: bool = False,
+    verify: bool = False,
+    overwrite: bool = False,
+    workers: int = 8,
+    resume_job: Optional[str] = None,
+    ctx: Context = None,
+) -> Dict:
+    """
+    Copy or move many files/folders into a folder in parallel, using
+    zero-copy kernel transfers where the filesystem supports them.
+    
+    Args:
+        sources: Files and folders to transfer (folders keep their structure).
+        dst_folder: Destination folder.
+        move: Move instead of copy (same-disk moves are instant renames).
+        verify: Compare content hashes of source and copy before finishing.
+        overwrite: Replace existing destination files instead of failing them.
+        workers: Files transferred at once.
+        resume_job: job_id of an interrupted transfer to continue; other
+            arguments are then taken from that job.
+    
+    Returns:
+        Dict with job_id, files, done, failed, bytes, seconds, mb_per_s and
+        'complete'; an incomplete job can be resumed with its job_id.
+    """
+    if resume_job:
+        job = BulkJob.load(default_journal_dir(), resume_job)
+        for t in job.transfers:
+            _path(t.src), _path(t.dst)
+    else:
+        if not sources or not dst_folder:
+            raise ValueError("sources and dst_folder are required unless resume_job is given")
+        sources, dst_folder = [_path(s) for s in sources], _path(dst_folder)
+        job = BulkJob(default_journal_dir(), plan_transfers(sources, dst_folder, _path), move, verify,
+                      overwrite, [os.path.abspath(s) for s in sources if os.path.isdir(s)])
+    loop = asyncio.get_running_loop()
+    last_report = 0.0
+
+    def progress(done: int, total: int, nbytes: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if ctx is not None and now - last_report >= 0.5:
+            last_report = now
+            asyncio.run_coroutine_threadsafe(
+                ctx.report_progress(done, total, message=f"{done}/{total} files, {nbytes / 1e6:.0f} MB"),
+                loop,
+            )
+
+    result = await asyncio.to_thread(job.run, workers, progress)
+    touched = [t.dst for t in job.transfers] + ([t.src for t in job.transfers] if job.move else [])
+    await asyncio.to_thread(sync_paths, files=touched)
+    return result
+
 @mcp.tool()
 def rename_file(path: str, new_name: str) -> str:
     """
@@ -463,15 +1017,146 @@ def rename_file(path: str, new_name: str) -> str:
     Returns:
         Confirmation message.
     """
+    path = _path(path)
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"File not found: {path}")
+    if os.sep in new_name or (os.altsep and os.altsep in new_name) or new_name in ("", ".", ".."):
+        raise ValueError(f"new_name must be a plain file name, got {new_name!r}")
     new_path = p.with_name(new_name)
+    is_dir = p.is_dir()
     p.rename(new_path)
+    _sync_moved([path, str(new_path)], is_dir)
     return f"Renamed {path} to {new_path}"
 
+
+# =========================
+# 📦 BATCH OPS
+# =========================
+@mcp.tool()
+def apply_file_ops(operations: List[Dict], dry_run: bool = False, workers: int = 8) -> Dict:
+    """
+    Apply many move/copy/rename/mkdir operations in one call.
+    
+    Every operation is validated first (missing sources, existing destinations,
+    paths outside the indexed roots); if any is invalid nothing is changed.
+    Independent operations run concurrently, and every completed step is
+    journaled so a failed batch is rolled back automatically and a finished
+    one can be undone with undo_file_ops.
+    
+    Args:
+        operations: List of dicts, applied in order:
+            {"op": "move", "src": ..., "dst": ...}  (dst may be an existing folder)
+            {"op": "copy", "src": ..., "dst": ...}
+            {"op": "rename", "src": ..., "new_name": ...}
+            {"op": "mkdir", "path": ...}
+        dry_run: Only validate and return the execution plan.
+        workers: Maximum operations running at once.
+    
+    Returns:
+        Dict with 'ok', the 'plan' or 'errors', and for real runs the
+        'batch_id', 'applied' count, 'failed' steps and 'rolled_back' flag.
+    """
+    plan = BatchPlan(operations, index_roots, guard)
+    if plan.errors:
+        return {"ok": False, "errors": plan.errors}
+    if dry_run:
+        return {"ok": True, "dry_run": True, "waves": len(plan.waves), "plan": plan.describe()}
+    result = apply_plan(plan, default_journal_dir(), workers)
+    sync_paths(*touched_paths(result.pop("entries")))
+    return {"ok": not result["failed"], **result}
+
+@mcp.tool()
+def undo_file_ops(batch_id: str) -> Dict:
+    """
+    Roll back a batch applied by apply_file_ops.
+    
+    Args:
+        batch_id: The 'batch_id' returned by apply_file_ops.
+    
+    Returns:
+        Dict with the number of steps undone and any errors.
+    """
+    result = undo_batch(default_journal_dir(), batch_id)
+    sync_paths(*touched_paths(result.pop("entries")))
+    return result
+
+@mcp.tool()
+def server_status() -> Dict:
+    """
+    Report whether the server is up and what it has loaded.
+    
+    Returns:
+        Dict with 'ready', 'pid', 'uptime' seconds, indexed 'files' and 'roots',
+        the 'allowed_roots' tools are confined to, whether the name index /
+        folder tree are 'warm', and 'watching'.
+    """
+    ix = index
+    return {
+        "ready": True,
+        "pid": os.getpid(),
+        "uptime": round(time.time() - started_at, 1),
+        "files": len(ix),
+        "roots": index_roots,
+        "allowed_roots": guard.roots,
+        "warm": _name_index is not None and _name_index.ix is ix
+                and _dir_tree is not None and _dir_tree.ix is ix,
+        "watching": watcher is not None,
+    }
+
+@mcp.tool()
+def cache_stats(clear: bool = False) -> Dict:
+    """
+    Hit/miss counters of the read-only tool result cache.
+    
+    Args:
+        clear: Also drop all cached results and reset the counters.
+    
+    Returns:
+        Dict with cache 'entries', 'bytes', overall 'hits'/'misses'/'hit_rate',
+        and per-tool counters under 'tools'.
+    """
+    stats = tool_cache.stats()
+    if clear:
+        tool_cache.clear()
+        tool_cache.reset_stats()
+    return stats
+
 print("server is running....")
 
 if __name__=='__main__':
-    mcp.run(transport='stdio')
-    
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="FileOps MCP server")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep the index live with a filesystem watcher")
+    parser.add_argument("--debounce", type=float, default=0.5,
+                        help="seconds of quiet before watcher events are applied")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http"], default="stdio",
+                        help="stdio for one client, streamable-http to share one server")
+    parser.add_argument("--host", default="127.0.0.1", help="bind address for streamable-http")
+    parser.add_argument("--port", type=int, default=8765, help="port for streamable-http")
+    parser.add_argument("--warm", action="store_true",
+                        help="build the name index and folder tree in the background at startup")
+    parser.add_argument("--root", action="append", default=None,
+                        help="allowed root folder (repeatable; default: LOCALFS_ROOTS); "
+                             "tools refuse paths outside the roots")
+    args = parser.parse_args()
+    allowed = args.root or roots_from_env()
+    if allowed:
+        _confine(allowed)
+    if args.watch:
+        watcher = FileWatcher(sync_paths, _poll_refresh, debounce=args.debounce)
+        watcher.start(index_roots)
+    if args.warm:
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    if args.transport == "streamable-http":
+        # shared over HTTP: every request must carry the pool's token
+        token = os.getenv(TOKEN_ENV)
+        if not token:
+            parser.error(f"streamable-http needs a shared secret in {TOKEN_ENV}")
+        import uvicorn
+        uvicorn.run(require_token(mcp.streamable_http_app(), token), host=args.host, port=args.port,
+                    log_level=mcp.settings.log_level.lower())
+    else:
+        mcp.run(transport=args.transport)
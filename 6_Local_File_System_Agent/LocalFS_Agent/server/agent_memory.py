@@ -0,0 +1,84 @@
+# Conversation memory for LocalFS agent front-ends (app.py, client.py).
+# Each chat session gets its own thread id; checkpoints go to SQLite so
+# conversations survive restarts, and only a bounded tail of the history is
+# sent to the model on each turn.
+
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from langchain_core.messages import trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.checkpoint.memory import InMemorySaver
+
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:  # pip install langgraph-checkpoint-sqlite
+    AsyncSqliteSaver = None
+
+logger = logging.getLogger(__name__)
+
+# Approximate tokens of history (tool results included) sent per model call.
+MAX_HISTORY_TOKENS = 6000
+
+
+def default_checkpoint_db_path() -> str:
+    return os.getenv("LOCALFS_CHECKPOINT_DB", str(Path(__file__).with_name("agent_checkpoints.db")))
+
+
+def new_thread_id() -> str:
+    return uuid.uuid4().hex
+
+
+def thread_config(thread_id: str) -> Dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def open_checkpointer(db_path: Optional[str] = None):
+    """
+    SQLite checkpointer shared by all agents; in-memory if langgraph-checkpoint-sqlite
+    is not installed. Must be called on the event loop the agents will run on.
+    """
+    if AsyncSqliteSaver is None:
+        logger.warning("langgraph-checkpoint-sqlite/aiosqlite not installed; "
+                       "conversations are kept in memory and lost on restart")
+        return InMemorySaver()
+    conn = await aiosqlite.connect(db_path or default_checkpoint_db_path())
+    await conn.execute("PRAGMA journal_mode=WAL")
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver
+
+
+async def close_checkpointer(saver) -> None:
+    conn = getattr(saver, "conn", None)
+    if conn is not None:
+        await conn.close()
+
+
+def trim_history(max_tokens: int = MAX_HISTORY_TOKENS) -> Callable[[Dict], Dict]:
+    """
+    pre_model_hook for create_react_agent: the model sees only the newest
+    messages that fit in max_tokens, starting at a user turn so tool calls stay
+    paired with their results. The full history remains in the checkpointer.
+    """
+    def pre_model_hook(state: Dict) -> Dict:
+        messages = state["messages"]
+        trimmed = trim_messages(
+            messages,
+            strategy="last",
+            token_counter=count_tokens_approximately,
+            max_tokens=max_tokens,
+            start_on="human",
+            end_on=("human", "tool"),
+        )
+        if not trimmed:
+            # the current turn alone is over budget: send it whole rather than nothing
+            last_user = max((i for i, m in enumerate(messages) if m.type == "human"), default=0)
+            trimmed = messages[last_user:]
+        return {"llm_input_messages": trimmed}
+
+    return pre_model_hook
@@ -0,0 +1,86 @@
+# Benchmark: original os.walk indexer vs. the parallel scandir scanner.
+#
+#   python server/bench_scan.py --files 1000000 --workers 16
+#
+# Builds (or reuses) a synthetic tree under --tree, then times:
+#   walk      the pre-scanner build_file_index (os.walk + two Path.stat per file)
+#   scan      scanner.scan with a cold cache
+#   refresh   IndexStore.refresh cold, then warm (nothing changed)
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from index_store import IndexStore
+from scanner import scan
+
+
+def legacy_build_file_index(roots: list[str]) -> list[dict]:
+    index = []
+    for root_dir in roots:
+        for dirpath, _, filenames in os.walk(root_dir):
+            for f in filenames:
+                p = Path(dirpath) / f
+                try:
+                    index.append({
+                        "name": f,
+                        "path": str(p),
+                        "size": p.stat().st_size,
+                        "modified": p.stat().st_mtime,
+                        "ext": p.suffix.lower()
+                    })
+                except Exception:
+                    pass
+    return index
+
+
+def make_tree(root: str, files: int, per_dir: int = 100, fanout: int = 10) -> None:
+    """Create `files` empty files, `per_dir` per folder, folders nested `fanout` wide."""
+    marker = os.path.join(root, f".bench-{files}-{per_dir}-{fanout}")
+    if os.path.exists(marker):
+        return
+    exts = (".txt", ".py", ".jpg", ".pdf", ".log")
+    for d in range((files + per_dir - 1) // per_dir):
+        parts, n = [], d
+        while True:
+            parts.append(f"d{n % fanout}")
+            n //= fanout
+            if not n:
+                break
+        folder = os.path.join(root, *parts)
+        os.makedirs(folder, exist_ok=True)
+        for i in range(min(per_dir, files - d * per_dir)):
+            open(os.path.join(folder, f"f{i}{exts[i % len(exts)]}"), "wb").close()
+    open(marker, "wb").close()
+
+
+def timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<16} {time.perf_counter() - start:8.2f}s  {result}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FileOps scanner benchmark")
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--tree", default=os.path.join(tempfile.gettempdir(), "fileops-bench"))
+    args = parser.parse_args()
+
+    print(f"Preparing {args.files} files under {args.tree} ...")
+    make_tree(args.tree, args.files)
+
+    timed("walk", lambda: f"{len(legacy_build_file_index([args.tree]))} files")
+    timed("scan", lambda: f"{sum(len(r.files) for r in scan([args.tree], (), workers=args.workers))} files")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = IndexStore(os.path.join(tmp, "bench.db"))
+        timed("refresh (cold)", lambda: store.refresh([args.tree], excludes=(), workers=args.workers))
+        timed("refresh (warm)", lambda: store.refresh([args.tree], excludes=(), workers=args.workers))
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
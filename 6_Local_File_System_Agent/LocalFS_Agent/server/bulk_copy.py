@@ -0,0 +1,275 @@
+# Bulk copy/move engine for the FileOps MCP server.
+# Data moves kernel-side where possible (reflink clone, copy_file_range,
+# sendfile) instead of through Python buffers; files are copied on a bounded
+# thread pool into ".part" files that a resumed job continues from.
+
+import errno
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from duplicates import HASH_NAME, full_hash
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+FICLONE = 0x40049409  # Linux ioctl: share extents with another file (btrfs, XFS, ...)
+CHUNK_BYTES = 64 * 1024 * 1024
+PART_SUFFIX = ".part"
+# errors meaning "this mechanism is unavailable here", not "the copy failed"
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP,
+                errno.EBADF, errno.ETXTBSY, errno.EPERM}
+
+# progress(files_done, files_total, bytes_done)
+ProgressCallback = Callable[[int, int, int], None]
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError:
+        return False
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, size: int) -> str:
+    """Copy bytes [offset, size) between open files; returns the mechanism used."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < size:
+                n = os.copy_file_range(src_fd, dst_fd, min(size - offset, CHUNK_BYTES), offset, offset)
+                if n == 0:
+                    break
+                offset += n
+            return "copy_file_range"
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            while offset < size:
+                n = os.sendfile(dst_fd, src_fd, offset, min(size - offset, CHUNK_BYTES))
+                if n == 0:
+                    break
+                offset += n
+            return "sendfile"
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+    # portable fallback: one reusable buffer, no intermediate bytes objects
+    buf = bytearray(1024 * 1024)
+    view = memoryview(buf)
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    with open(src_fd, "rb", buffering=0, closefd=False) as src:
+        while offset < size:
+            n = src.readinto(view[:min(len(buf), size - offset)])
+            if not n:
+                break
+            written = 0
+            while written < n:
+                written += os.write(dst_fd, view[written:n])
+            offset += n
+    return "buffered"
+
+
+def fast_copy(src: str, dst: str, resume: bool = False, follow_symlinks: bool = True) -> str:
+    """
+    Copy one file with metadata, via `dst.part` and an atomic rename.
+
+    Drop-in for shutil.copy2 (also usable as copy_function for shutil.move
+    and shutil.copytree). Returns dst, like copy2.
+
+    Args:
+        resume: Continue an existing dst.part instead of starting over.
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if not follow_symlinks and os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+        return dst
+    copy_file(src, dst, resume)
+    return dst
+
+
+def copy_file(src: str, dst: str, resume: bool = False) -> str:
+    """fast_copy body; returns the mechanism: reflink, copy_file_range, sendfile or buffered."""
+    part = dst + PART_SUFFIX
+    with open(src, "rb") as fsrc:
+        size = os.fstat(fsrc.fileno()).st_size
+        start = os.path.getsize(part) if resume and os.path.exists(part) else 0
+        if start > size:
+            start = 0
+        with open(part, "r+b" if start else "wb") as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+            if start == 0 and size and _reflink(src_fd, dst_fd):
+                how = "reflink"
+            else:
+                os.ftruncate(dst_fd, start)
+                how = _copy_range(src_fd, dst_fd, start, size)
+    shutil.copystat(src, part)
+    os.replace(part, dst)
+    return how
+
+
+class Transfer(NamedTuple):
+    src: str
+    dst: str
+    size: int
+    mtime: float
+
+
+def plan_transfers(sources: Sequence[str], dst_folder: str,
+                   check: Optional[Callable[[str], object]] = None) -> List[Transfer]:
+    """
+    Expand files and folders into per-file transfers below dst_folder.
+    check(path) is called for every file found inside a source folder and may
+    raise to refuse it (PathGuard.resolve refuses links leading outside the roots).
+    """
+    out = []
+    for source in map(os.path.abspath, sources):
+        base = os.path.join(os.path.abspath(dst_folder), os.path.basename(source))
+        if os.path.isdir(source):
+            for folder, _, names in os.walk(source):
+                for name in names:
+                    src = os.path.join(folder, name)
+                    if check is not None:
+                        check(src)
+                    st = os.stat(src)
+                    out.append(Transfer(src, os.path.join(base, os.path.relpath(src, source)),
+                                        st.st_size, st.st_mtime))
+        else:
+            st = os.stat(source)
+            out.append(Transfer(source, base, st.st_size, st.st_mtime))
+    return out
+
+
+class BulkJob:
+    """
+    A resumable multi-file copy or move.
+
+    The job manifest (first line) and one line per finished file are appended
+    to `<journal_dir>/transfer-<job_id>.jsonl`; resuming skips finished files
+    and continues partial ones if their source is unchanged.
+    """
+
+    def __init__(self, journal_dir: str, transfers: List[Transfer], move: bool = False,
+                 verify: bool = False, overwrite: bool = False, folders: Sequence[str] = (),
+                 job_id: Optional[str] = None):
+        self.job_id = job_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.path = os.path.join(journal_dir, f"transfer-{self.job_id}.jsonl")
+        self.transfers = transfers
+        self.move = move
+        self.verify = verify
+        self.overwrite = overwrite
+        # source folders; emptied by a completed move and then removed
+        self.folders = list(folders)
+        self.done: set = set()
+        self.resumed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, journal_dir: str, job_id: str) -> "BulkJob":
+        path = os.path.join(journal_dir, f"transfer-{os.path.basename(job_id)}.jsonl")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No transfer job {job_id}")
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        head = lines[0]
+        job = cls(journal_dir, [Transfer(*t) for t in head["transfers"]], head["move"],
+                  head["verify"], head["overwrite"], head["folders"], job_id)
+        job.done = {line["done"] for line in lines[1:] if "done" in line}
+        job.resumed = True
+        return job
+
+    def _log(self, entry: Dict) -> None:
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def _transfer(self, i: int) -> Dict:
+        t = self.transfers[i]
+        if self.resumed and os.path.exists(t.dst):
+            # finished before the interruption but not yet logged
+            dst = os.stat(t.dst)
+            if (dst.st_size, dst.st_mtime) == (t.size, t.mtime):
+                if self.move and os.path.exists(t.src):
+                    os.unlink(t.src)
+                return {"how": "already done", "bytes": 0}
+        st = os.stat(t.src)
+        unchanged = (st.st_size, st.st_mtime) == (t.size, t.mtime)
+        if os.path.lexists(t.dst) and not self.overwrite:
+            raise FileExistsError(f"destination exists: {t.dst}")
+        os.makedirs(os.path.dirname(t.dst), exist_ok=True)
+        if self.move and os.stat(os.path.dirname(t.dst)).st_dev == st.st_dev:
+            os.replace(t.src, t.dst)
+            if os.path.exists(t.dst + PART_SUFFIX):  # left over from an interrupted copy
+                os.unlink(t.dst + PART_SUFFIX)
+            return {"how": "rename", "bytes": 0}
+        # a partial file is only trusted if the source did not change since the job started
+        how = copy_file(t.src, t.dst, resume=self.resumed and unchanged)
+        if self.verify and full_hash(t.src) != full_hash(t.dst):
+            os.unlink(t.dst)
+            raise IOError(f"{HASH_NAME} mismatch after copying {t.src}")
+        if self.move:
+            os.unlink(t.src)
+        return {"how": how, "bytes": st.st_size}
+
+    def run(self, workers: int = 8, progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Copy/move every pending file; returns throughput stats and failures.
+        """
+        if not os.path.exists(self.path):
+            self._log({"job_id": self.job_id, "move": self.move, "verify": self.verify,
+                       "overwrite": self.overwrite, "folders": self.folders,
+                       "transfers": [list(t) for t in self.transfers]})
+        pending = [i for i in range(len(self.transfers)) if i not in self.done]
+        started = time.perf_counter()
+        stats = {"copied": 0, "bytes": 0, "methods": {}, "failed": []}
+        lock = threading.Lock()
+
+        def step(i: int) -> None:
+            try:
+                result = self._transfer(i)
+            except OSError as e:
+                with lock:
+                    stats["failed"].append(f"{self.transfers[i].src}: {e}")
+                return
+            self._log({"done": i})
+            with lock:
+                self.done.add(i)
+                stats["copied"] += 1
+                stats["bytes"] += result["bytes"]
+                stats["methods"][result["how"]] = stats["methods"].get(result["how"], 0) + 1
+                if progress is not None:
+                    progress(len(self.done), len(self.transfers), stats["bytes"])
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(step, pending))
+        if self.move and len(self.done) == len(self.transfers):
+            for folder in self.folders:
+                for sub, _, _ in sorted(os.walk(folder), key=lambda w: -len(w[0])):
+                    try:
+                        os.rmdir(sub)
+                    except OSError:
+                        pass  # something new was put there; leave it
+        seconds = time.perf_counter() - started
+        return {
+            "job_id": self.job_id,
+            "files": len(self.transfers),
+            "done": len(self.done),
+            "skipped": len(self.transfers) - len(pending),
+            **stats,
+            "seconds": round(seconds, 3),
+            "mb_per_s": round(stats["bytes"] / seconds / 1e6, 1) if seconds and stats["bytes"] else None,
+            "complete": len(self.done) == len(self.transfers),
+        }
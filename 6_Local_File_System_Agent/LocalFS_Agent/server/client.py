@@ -3,8 +3,9 @@ from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.prebuilt import create_react_agent
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
-from langgraph.checkpoint.memory import InMemorySaver
 from langchain_google_genai import ChatGoogleGenerativeAI
+from fileops_pool import client_config, ensure_server
+from agent_memory import close_checkpointer, new_thread_id, open_checkpointer, thread_config, trim_history
 import asyncio
 import getpass
 import os
@@ -19,25 +20,18 @@ if "GROQ_API_KEY" not in os.environ:
     os.environ["GROQ_API_KEY"] = getpass.getpass("Enter your Groq API key: ")
 
 async def main():
-    client=MultiServerMCPClient(
-        {
-            "FileOps_HelperServer":{
-                "command":"python",
-                "args":["server/FileOps_helper.py"],
-                "transport":"stdio"
-            }
-        }
-    
-    )
-    
-    # client = MultiServerMCPClient({
-    # "FileOps_HelperServer": {
-    #     "url": "http://127.0.0.1:8000",  # HTTP endpoint of your running server
-    #     "transport": "streamable_http"
-    # }
-    # })
+    # shared long-lived server (started on first use, index stays loaded);
+    # ensure_server returns once it answers the server_status handshake
+    roots = [
+        r"C:\Users\manas\One\Desktop",
+        # r"C:\Users\ms\OneDrive\Desktop\Bright_data"
+        # r"C:\Users\manas\Documents",
+        # r"C:\Users\manas\Downloads",
+       
+    ]
+    await ensure_server(roots=roots)
+    client=MultiServerMCPClient(client_config())
     
-    await asyncio.sleep(1)  # wait 1 sec for server to be ready
     tools=await client.get_tools()
 
     
@@ -56,15 +50,6 @@ async def main():
     # )
     # 
     llm=ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite")
-    roots = [
-        r"C:\Users\manas\One\Desktop",
-        # r"C:\Users\ms\OneDrive\Desktop\Bright_data"
-        # r"C:\Users\manas\Documents",
-        # r"C:\Users\manas\Downloads",
-       
-    ]
-
-
 
     
 
@@ -73,14 +58,17 @@ async def main():
 
     system_message = f"All file queries are limited to these roots: {roots}"
     # system_message = "All file queries are limited to this root directory: " + " , ".join(roots)
-    checkpointer = InMemorySaver()
+    checkpointer = await open_checkpointer()
     agent = create_react_agent(
         llm, 
         tools, 
         prompt=open(r'server\sys_msg.txt').read().strip()+"\n"+system_message,
-        checkpointer=checkpointer
+        checkpointer=checkpointer,
+        pre_model_hook=trim_history(),
         )
-    config = {"configurable": {"thread_id": "1"}}
+    # set LOCALFS_THREAD_ID to continue an earlier conversation
+    thread_id = os.getenv("LOCALFS_THREAD_ID") or new_thread_id()
+    config = thread_config(thread_id)
 
     
 
@@ -101,10 +89,12 @@ async def main():
     ║                                                          ║
     ╚══════════════════════════════════════════════════════════╝
     """)
+    print(f"Conversation: {thread_id}")
     while True:
         user_input = input("You: ")
         if user_input.lower() == "exit":
             print("Exiting...")
+            await close_checkpointer(checkpointer)
             break
 
         response = await agent.ainvoke(
@@ -0,0 +1,419 @@
+# Columnar in-memory file index for the FileOps MCP server.
+# One row per file; metadata lives in NumPy arrays and file names in a single
+# bytes pool, so predicates run as vectorized masks instead of Python loops.
+
+import itertools
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SORT_KEYS = ("path", "size", "modified")
+# Per-row columns kept in over-allocated buffers (name_off has one extra entry).
+COLUMNS = ("dir_id", "size", "mtime", "ext_code", "alive")
+MIN_CAPACITY = 1024
+# Shared by all indexes, so a generation also tells a replaced index apart.
+_generations = itertools.count(1)
+
+
+class IndexObserver:
+    """
+    Base for structures derived from a ColumnarIndex; override the events you need.
+    Callbacks run under the index lock.
+    """
+
+    def rows_appended(self, start: int, stop: int) -> None:
+        """Rows [start, stop) were added."""
+
+    def rows_changed(self, rows: np.ndarray, old_size: np.ndarray, old_mtime: np.ndarray) -> None:
+        """size/mtime of existing rows were updated in place."""
+
+    def rows_deleted(self, rows: np.ndarray) -> None:
+        """Rows are about to be marked dead (their columns are still readable)."""
+
+    def rows_compacted(self, keep: np.ndarray, n_old: int) -> None:
+        """Rows were renumbered: new row i is old row keep[i]."""
+
+
+class ColumnarIndex:
+    """
+    Compact, array-backed file index.
+
+    Rows are ordered by (dir, name). Directory paths are interned in a sorted
+    table, so every folder subtree maps to a contiguous range of dir ids and a
+    folder filter is two integer comparisons per row.
+
+    Columns:
+        dir_id:  int32 id into `dirs`
+        name:    offsets into one bytes pool (fs-encoded file names)
+        size:    int64 bytes
+        mtime:   float64 UNIX timestamp
+        ext:     int32 code into `exts` (interned, lower-cased extension)
+        alive:   bool, False for rows deleted since the last compaction
+
+    Updates mark rows dead or append new rows; compact() drops dead rows and
+    restores (dir, name) order. Callers hold `lock` across mask/select/record
+    so a concurrent apply() cannot change row count mid-query.
+
+    Columns are views of over-allocated buffers that double when full, and the
+    name pool is a bytearray, so appending a few rows costs O(rows appended),
+    not O(index size). Rows appended since the last compaction are tracked per
+    folder, so path lookups never scan the whole dir_id column.
+
+    Derived structures subscribe() an IndexObserver to follow appends,
+    in-place changes, deletions and renumbering without a rebuild.
+    `generation` changes whenever the indexed content does, so results
+    computed from the index can be cached against it.
+    """
+
+    def __init__(self, dirs: List[str], dir_id: np.ndarray, name_pool: bytes,
+                 name_off: np.ndarray, size: np.ndarray, mtime: np.ndarray,
+                 ext_code: np.ndarray, exts: List[str]):
+        self.lock = threading.RLock()
+        self.dirs = dirs
+        self.exts = exts
+        self._ext_lookup = {e: i for i, e in enumerate(exts)}
+        self._set_columns(bytearray(name_pool), name_off, dir_id=dir_id, size=size, mtime=mtime,
+                          ext_code=ext_code, alive=np.ones(len(size), dtype=bool))
+        self._observers: list = []
+        self.generation = next(_generations)
+
+    def _set_columns(self, name_pool: bytearray, name_off: np.ndarray, **columns: np.ndarray) -> None:
+        """Install freshly (re)built columns; rows are in (dir, name) order."""
+        self._n = len(columns["size"])
+        self._cap = self._n
+        self._bufs = dict(columns, name_off=name_off)
+        self.name_pool = name_pool
+        self._view()
+        # rows [0, _sorted) are in dir order; later rows were appended, by folder
+        self._sorted = self._n
+        self._tail: Dict[str, List[int]] = {}
+        self._dead = 0
+
+    def _view(self) -> None:
+        for col in COLUMNS:
+            setattr(self, col, self._bufs[col][:self._n])
+        self.name_off = self._bufs["name_off"][:self._n + 1]
+
+    def _reserve(self, extra: int) -> None:
+        """Make room for `extra` more rows, doubling the buffers when full."""
+        need = self._n + extra
+        if need <= self._cap:
+            return
+        self._cap = max(need, 2 * self._cap, MIN_CAPACITY)
+        for col, buf in self._bufs.items():
+            grown = np.empty(self._cap + (col == "name_off"), dtype=buf.dtype)
+            used = self._n + (col == "name_off")
+            grown[:used] = buf[:used]
+            self._bufs[col] = grown
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[str, str, int, float, str]]) -> "ColumnarIndex":
+        """
+        Build from (dir, name, size, mtime, ext) rows already sorted by (dir, name).
+        """
+        dirs: List[str] = []
+        exts: List[str] = []
+        ext_lookup: Dict[str, int] = {}
+        dir_id, ext_code = array("i"), array("i")
+        size, mtime = array("q"), array("d")
+        name_off = array("q", [0])
+        pool = bytearray()
+        for d, name, sz, mt, ext in rows:
+            if not dirs or dirs[-1] != d:
+                dirs.append(d)
+            code = ext_lookup.get(ext)
+            if code is None:
+                code = ext_lookup[ext] = len(exts)
+                exts.append(ext)
+            dir_id.append(len(dirs) - 1)
+            ext_code.append(code)
+            size.append(sz)
+            mtime.append(mt)
+            pool += os.fsencode(name)
+            name_off.append(len(pool))
+        return cls(
+            dirs,
+            np.frombuffer(dir_id, dtype=np.int32).copy(),
+            bytes(pool),
+            np.frombuffer(name_off, dtype=np.int64).copy(),
+            np.frombuffer(size, dtype=np.int64).copy(),
+            np.frombuffer(mtime, dtype=np.float64).copy(),
+            np.frombuffer(ext_code, dtype=np.int32).copy(),
+            exts,
+        )
+
+    def __len__(self) -> int:
+        return self._n - self._dead
+
+    def _intern_ext(self, ext: str) -> int:
+        code = self._ext_lookup.get(ext)
+        if code is None:
+            code = self._ext_lookup[ext] = len(self.exts)
+            self.exts.append(ext)
+        return code
+
+    def subscribe(self, observer: IndexObserver) -> None:
+        self._observers.append(observer)
+
+    def unsubscribe(self, observer: IndexObserver) -> None:
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    def _delete_rows(self, rows: np.ndarray) -> None:
+        if len(rows):
+            for observer in self._observers:
+                observer.rows_deleted(rows)
+            self._dead += int(np.count_nonzero(self.alive[rows]))
+            self.alive[rows] = False
+
+    def _dir_index(self, d: str) -> int:
+        i = bisect_left(self.dirs, d)
+        return i if i < len(self.dirs) and self.dirs[i] == d else -1
+
+    # -------------------------
+    # Row access
+    # -------------------------
+    def name(self, i: int) -> str:
+        return os.fsdecode(bytes(self.name_pool[self.name_off[i]:self.name_off[i + 1]]))
+
+    def path(self, i: int) -> str:
+        return os.path.join(self.dirs[self.dir_id[i]], self.name(i))
+
+    def record(self, i: int) -> Dict:
+        """Materialize row i as the classic file metadata dict."""
+        i = int(i)
+        return {
+            "name": self.name(i),
+            "path": self.path(i),
+            "size": int(self.size[i]),
+            "modified": float(self.mtime[i]),
+            "ext": self.exts[self.ext_code[i]],
+        }
+
+    def records(self, rows: Iterable[int]) -> List[Dict]:
+        return [self.record(i) for i in rows]
+
+    def _dir_rows(self, d: str) -> List[int]:
+        """Live rows directly in folder d: a binary search in the sorted rows plus its appended ones."""
+        did = self._dir_index(d)
+        if did < 0:
+            return []
+        # keys of the column's dtype: int keys would cast the whole column
+        lo, hi = np.searchsorted(self.dir_id[:self._sorted], np.array([did, did + 1], dtype=self.dir_id.dtype))
+        rows = list(range(lo, hi)) + self._tail.get(d, [])
+        return [i for i in rows if self.alive[i]]
+
+    def find_rows(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Map each indexed path to its live row id (missing paths are left out)."""
+        by_dir: Dict[str, set] = {}
+        for p in paths:
+            d, name = os.path.split(p)
+            by_dir.setdefault(d, set()).add(name)
+        found = {}
+        for d, names in by_dir.items():
+            for i in self._dir_rows(d):
+                name = self.name(i)
+                if name in names:
+                    found[os.path.join(d, name)] = i
+        return found
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def apply(self, upserts: Sequence[Tuple[str, int, float]] = (), deletes: Sequence[str] = (),
+              tree_deletes: Sequence[str] = ()) -> None:
+        """
+        Apply a batch of changes.
+
+        Args:
+            upserts: (path, size, mtime) for created or modified files.
+            deletes: Paths of removed files.
+            tree_deletes: Folders whose whole subtree was removed.
+        """
+        with self.lock:
+            for folder in tree_deletes:
+                self._delete_rows(np.flatnonzero(self.alive & self.folder_mask(folder)))
+            found = self.find_rows(list(deletes) + [u[0] for u in upserts])
+            self._delete_rows(np.array([found.pop(p) for p in deletes if p in found], dtype=np.int64))
+            new, changed = {}, {}
+            for path, size, mtime in upserts:
+                i = found.get(path)
+                if i is None:
+                    new[path] = (path, size, mtime)
+                else:
+                    changed[i] = (size, mtime)
+            if changed:
+                rows = np.fromiter(changed, dtype=np.int64, count=len(changed))
+                old_size, old_mtime = self.size[rows], self.mtime[rows]
+                self.size[rows] = [size for size, _ in changed.values()]
+                self.mtime[rows] = [mtime for _, mtime in changed.values()]
+                for observer in self._observers:
+                    observer.rows_changed(rows, old_size, old_mtime)
+            if new:
+                self._append(list(new.values()))
+            self.generation = next(_generations)
+            if self._dead > len(self.alive) // 4:
+                self.compact()
+
+    def _append(self, rows: Sequence[Tuple[str, int, float]]) -> None:
+        new_dirs = {os.path.dirname(p) for p, _, _ in rows}
+        if any(self._dir_index(d) < 0 for d in new_dirs):
+            # new folders shift the sorted dir ids; the mapping is monotonic, so
+            # the sorted rows stay sorted
+            merged = sorted(new_dirs.union(self.dirs))
+            pos = {d: i for i, d in enumerate(merged)}
+            remap = np.fromiter((pos[d] for d in self.dirs), dtype=np.int32, count=len(self.dirs))
+            if self._n:
+                self.dir_id[:] = remap[self.dir_id]
+            self.dirs = merged
+
+        start, stop = self._n, self._n + len(rows)
+        names = [os.fsencode(os.path.basename(p)) for p, _, _ in rows]
+        self._reserve(len(rows))
+        bufs = self._bufs
+        lens = np.fromiter((len(n) for n in names), dtype=np.int64, count=len(names))
+        bufs["name_off"][start + 1:stop + 1] = bufs["name_off"][start] + np.cumsum(lens)
+        self.name_pool += b"".join(names)
+        bufs["dir_id"][start:stop] = [self._dir_index(os.path.dirname(p)) for p, _, _ in rows]
+        bufs["ext_code"][start:stop] = [self._intern_ext(os.path.splitext(p)[1].lower()) for p, _, _ in rows]
+        bufs["size"][start:stop] = [r[1] for r in rows]
+        bufs["mtime"][start:stop] = [r[2] for r in rows]
+        bufs["alive"][start:stop] = True
+        self._n = stop
+        self._view()
+        for i, (p, _, _) in enumerate(rows, start):
+            self._tail.setdefault(os.path.dirname(p), []).append(i)
+        for observer in self._observers:
+            observer.rows_appended(start, stop)
+
+    def compact(self) -> np.ndarray:
+        """
+        Drop dead rows and restore (dir, name) row order after appends.
+
+        Returns:
+            Old row ids in their new order, for remapping masks computed before.
+        """
+        with self.lock:
+            n_old = len(self.alive)
+            rank = np.arange(n_old, dtype=np.int64)
+            for d in self._tail:
+                rows = self._dir_rows(d)
+                rows.sort(key=self.name)
+                rank[rows] = np.arange(len(rows))
+            keep = np.flatnonzero(self.alive)
+            keep = keep[np.lexsort((rank[keep], self.dir_id[keep]))]
+
+            lens = np.diff(self.name_off)[keep]
+            off = np.zeros(len(keep) + 1, dtype=np.int64)
+            np.cumsum(lens, out=off[1:])
+            gather = np.repeat(self.name_off[keep] - off[:-1], lens) + np.arange(off[-1])
+            self._set_columns(bytearray(np.frombuffer(self.name_pool, dtype=np.uint8)[gather].tobytes()), off,
+                              dir_id=self.dir_id[keep], size=self.size[keep], mtime=self.mtime[keep],
+                              ext_code=self.ext_code[keep], alive=np.ones(len(keep), dtype=bool))
+            for observer in self._observers:
+                observer.rows_compacted(keep, n_old)
+            return keep
+
+    # -------------------------
+    # Predicates
+    # -------------------------
+    def ext_mask(self, exts: Sequence[str]) -> np.ndarray:
+        codes = [self._ext_lookup[e] for e in exts if e in self._ext_lookup]
+        if not codes:
+            return np.zeros(len(self.alive), dtype=bool)
+        return np.isin(self.ext_code, codes)
+
+    def folder_mask(self, folder: str) -> np.ndarray:
+        folder = os.path.abspath(folder)
+        prefix = folder if folder.endswith(os.sep) else folder + os.sep
+        lo = bisect_left(self.dirs, prefix)
+        hi = bisect_left(self.dirs, prefix[:-1] + chr(ord(os.sep) + 1))
+        mask = (self.dir_id >= lo) & (self.dir_id < hi)
+        exact = bisect_left(self.dirs, folder)
+        if exact < len(self.dirs) and self.dirs[exact] == folder:
+            mask |= self.dir_id == exact
+        return mask
+
+    def folder_rows(self, folder: str) -> np.ndarray:
+        """Live rows inside folder (recursive) in path order, located by binary search."""
+        with self.lock:
+            if self._tail:
+                self.compact()  # appended rows break the dir_id ordering
+            folder = os.path.abspath(folder)
+            prefix = folder.rstrip(os.sep) + os.sep
+            ranges = [bisect_left(self.dirs, prefix), bisect_left(self.dirs, prefix[:-1] + chr(ord(os.sep) + 1))]
+            exact = bisect_left(self.dirs, folder)
+            if exact < len(self.dirs) and self.dirs[exact] == folder:
+                ranges = [exact, exact + 1] + ranges
+            bounds = np.searchsorted(self.dir_id, np.array(ranges, dtype=self.dir_id.dtype)).reshape(-1, 2)
+            rows = np.concatenate([np.arange(lo, hi) for lo, hi in bounds])
+            return rows[self.alive[rows]]
+
+    def mask(self, exts: Optional[Sequence[str]] = None, min_size: Optional[int] = None,
+             max_size: Optional[int] = None, modified_after: Optional[float] = None,
+             modified_before: Optional[float] = None, folder: Optional[str] = None) -> np.ndarray:
+        """
+        Evaluate all given predicates in one vectorized pass; None means "any".
+        """
+        m = self.alive.copy()
+        if exts is not None:
+            m &= self.ext_mask(exts)
+        if min_size is not None:
+            m &= self.size >= min_size
+        if max_size is not None:
+            m &= self.size <= max_size
+        if modified_after is not None:
+            m &= self.mtime > modified_after
+        if modified_before is not None:
+            m &= self.mtime < modified_before
+        if folder is not None:
+            m &= self.folder_mask(folder)
+        return m
+
+    def select(self, mask: np.ndarray, sort_by: str = "path", descending: bool = False,
+               limit: int = 50, offset: int = 0) -> Tuple[int, np.ndarray]:
+        """
+        Order matching rows and return (total matches, row ids of the page).
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {SORT_KEYS}")
+        if sort_by == "path" and self._tail:
+            mask = mask[self.compact()]
+        rows = np.flatnonzero(mask)
+        total = len(rows)
+        offset, limit = max(offset, 0), max(limit, 0)
+        end = min(offset + limit, total)
+        if offset >= end:
+            return total, rows[:0]
+        if sort_by == "path":
+            page = rows[::-1] if descending else rows
+            return total, page[offset:end]
+        keys = (self.size if sort_by == "size" else self.mtime)[rows]
+        if descending:
+            keys = -keys
+        if end < total:
+            top = np.argpartition(keys, end - 1)[:end]
+            order = top[np.argsort(keys[top], kind="stable")]
+        else:
+            order = np.argsort(keys, kind="stable")
+        return total, rows[order[offset:end]]
+
+    # -------------------------
+    # Aggregates
+    # -------------------------
+    def ext_stats(self) -> List[Tuple[str, int, int]]:
+        """(extension, file count, total bytes) for every extension present."""
+        with self.lock:
+            n = len(self.exts)
+            codes = self.ext_code[self.alive]
+            counts = np.bincount(codes, minlength=n)
+            sizes = np.bincount(codes, weights=self.size[self.alive], minlength=n)
+        return [(self.exts[c], int(counts[c]), int(sizes[c])) for c in range(n) if counts[c]]
+
+    def nbytes(self) -> int:
+        arrays = (self.dir_id, self.name_off, self.size, self.mtime, self.ext_code, self.alive)
+        return len(self.name_pool) + sum(a.nbytes for a in arrays)
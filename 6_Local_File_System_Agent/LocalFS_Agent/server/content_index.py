@@ -0,0 +1,267 @@
+# Full-text content index for the FileOps MCP server.
+# Text-like files under the indexed roots are stored in an SQLite FTS5 table
+# (BM25 ranking, snippet extraction). Files are only re-read when their
+# size/mtime in the file index differ from what was indexed last time.
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+SCHEMA_VERSION = 1
+TABLES = ("content_docs", "content_fts")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_docs (
+    id    INTEGER PRIMARY KEY,
+    path  TEXT NOT NULL UNIQUE,
+    size  INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    ext   TEXT NOT NULL,
+    text  INTEGER NOT NULL  -- 0 when the file turned out to be binary/unreadable
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(
+    body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+TEXT_EXTS = (
+    ".txt", ".md", ".rst", ".csv", ".tsv", ".log", ".json", ".jsonl", ".yaml", ".yml",
+    ".toml", ".ini", ".cfg", ".conf", ".xml", ".html", ".htm", ".css", ".tex",
+    ".py", ".ipynb", ".js", ".jsx", ".ts", ".tsx", ".java", ".c", ".h", ".cpp", ".hpp",
+    ".cs", ".go", ".rs", ".rb", ".php", ".sh", ".bat", ".ps1", ".sql", ".r", ".kt",
+    ".swift", ".scala", ".lua", ".pl", ".env", ".properties",
+)
+# Only the first MAX_FILE_BYTES of a file are indexed.
+MAX_FILE_BYTES = 1_000_000
+BATCH = 500
+# Smaller updates (typically write-through of one file) are read on the calling thread.
+INLINE_READS = 16
+
+# progress(files_done, files_total)
+ProgressCallback = Callable[[int, int], None]
+
+
+def _read_text(path: str, max_bytes: int) -> Optional[str]:
+    """File contents up to max_bytes, or None for binary/unreadable files."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(max_bytes)
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def _fts_query(query: str, match_all: bool) -> str:
+    """Turn free text into an FTS5 expression; "quoted text" stays a phrase."""
+    parts = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        if phrase:
+            tokens = re.findall(r"\w+", phrase)
+            if tokens:
+                parts.append('"' + " ".join(tokens) + '"')
+        else:
+            parts += [f'"{t}"' for t in re.findall(r"\w+", word)]
+    return (" AND " if match_all else " OR ").join(parts)
+
+
+class ContentIndex:
+    """
+    BM25-ranked inverted index over the text of indexed files.
+
+    Args:
+        db_path: SQLite database file (a cache; rebuilt on schema changes).
+        max_bytes: Per-file cap on how much text is indexed.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = MAX_FILE_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            for table in TABLES:
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+        # bumped on every sync/apply; search results can be cached against it
+        self.generation = 0
+
+    @staticmethod
+    def wants(path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in TEXT_EXTS
+
+    # -------------------------
+    # Updating
+    # -------------------------
+    def _store(self, files: Sequence[Tuple[str, int, float]], workers: int,
+               progress: Optional[ProgressCallback] = None) -> int:
+        """Read and (re)index files; returns how many had text."""
+        indexed = 0
+        threaded = len(files) > INLINE_READS and workers > 1
+        with ThreadPoolExecutor(max_workers=workers) if threaded else nullcontext() as pool:
+            read = pool.map if threaded else map
+            for start in range(0, len(files), BATCH):
+                batch = files[start:start + BATCH]
+                texts = list(read(lambda f: _read_text(f[0], self.max_bytes), batch))
+                with self._lock, self._conn:
+                    self._delete(p for p, _, _ in batch)
+                    for (path, size, mtime), text in zip(batch, texts):
+                        cur = self._conn.execute(
+                            "INSERT INTO content_docs(path, size, mtime, ext, text) VALUES (?, ?, ?, ?, ?)",
+                            (path, size, mtime, os.path.splitext(path)[1].lower(), text is not None),
+                        )
+                        if text is not None:
+                            self._conn.execute("INSERT INTO content_fts(rowid, body) VALUES (?, ?)",
+                                               (cur.lastrowid, text))
+                            indexed += 1
+                if progress is not None:
+                    progress(start + len(batch), len(files))
+        return indexed
+
+    def _delete(self, paths: Iterable[str]) -> None:
+        """Drop docs by path (caller holds the lock and transaction)."""
+        for path in paths:
+            row = self._conn.execute("SELECT id FROM content_docs WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM content_fts WHERE rowid = ?", row)
+                self._conn.execute("DELETE FROM content_docs WHERE id = ?", row)
+
+    def sync(self, files: Iterable[Tuple[str, int, float]], workers: int = 8,
+             progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Make the index mirror `files` exactly.
+
+        Args:
+            files: (path, size, mtime) of every text-like file in the file index.
+            workers: Threads used to read files.
+            progress: Called with (files_done, files_to_read) while reading.
+
+        Returns:
+            Stats dict: files, read, indexed, removed, seconds.
+        """
+        started = time.perf_counter()
+        wanted = {path: (path, size, mtime) for path, size, mtime in files}
+        with self._lock:
+            known = {path: (size, mtime) for path, size, mtime in
+                     self._conn.execute("SELECT path, size, mtime FROM content_docs")}
+            gone = [p for p in known if p not in wanted]
+            if gone:
+                with self._conn:
+                    self._delete(gone)
+        changed = [row for path, row in wanted.items() if known.get(path) != row[1:]]
+        indexed = self._store(changed, workers, progress)
+        self.generation += 1
+        return {"files": len(wanted), "read": len(changed), "indexed": indexed,
+                "removed": len(gone), "seconds": round(time.perf_counter() - started, 3)}
+
+    def apply(self, upserts: Iterable[Tuple[str, int, float]] = (), deletes: Iterable[str] = (),
+              tree_deletes: Iterable[str] = ()) -> None:
+        """
+        Mirror a batch of file index changes (non-text files are ignored).
+
+        Args:
+            upserts: (path, size, mtime) for created or modified files.
+            deletes: Paths of removed files.
+            tree_deletes: Folders whose whole subtree was removed.
+        """
+        with self._lock, self._conn:
+            for folder in tree_deletes:
+                prefix = folder.rstrip(os.sep) + os.sep
+                self._delete([p for (p,) in self._conn.execute(
+                    "SELECT path FROM content_docs WHERE path >= ? AND path < ?",
+                    (prefix, prefix[:-1] + chr(ord(os.sep) + 1)),
+                )])
+            self._delete(deletes)
+        self._store([row for row in upserts if self.wants(row[0])], workers=4)
+        self.generation += 1
+
+    def retain(self, roots: Sequence[str]) -> int:
+        """Drop every doc outside roots; returns how many were removed."""
+        prefixes = [os.path.abspath(r).rstrip(os.sep) + os.sep for r in roots]
+        with self._lock:
+            gone = [p for (p,) in self._conn.execute("SELECT path FROM content_docs")
+                    if not any(p.startswith(prefix) for prefix in prefixes)]
+            if gone:
+                with self._conn:
+                    self._delete(gone)
+        if gone:
+            self.generation += 1
+        return len(gone)
+
+    # -------------------------
+    # Searching
+    # -------------------------
+    def search(self, query: str, exts: Optional[Sequence[str]] = None, folder: Optional[str] = None,
+               match_all: bool = True, limit: int = 20, offset: int = 0,
+               roots: Optional[Sequence[str]] = None) -> Dict:
+        """
+        BM25-ranked full-text search.
+
+        Args:
+            query: Words to look for; wrap text in double quotes for a phrase.
+            exts: Only files with these extensions ('.py').
+            folder: Only files inside this folder (recursive).
+            match_all: Require every word (otherwise any word matches).
+            limit: Maximum number of results to return.
+            offset: Number of matches to skip (for paging).
+            roots: Only files below one of these folders.
+
+        Returns:
+            Page of {name, path, size, modified, score, snippet}; higher scores rank first.
+        """
+        offset = max(offset, 0)
+        expr = _fts_query(query, match_all)
+        if not expr:
+            return {"total": 0, "offset": offset, "results": []}
+        where, args = ["content_fts MATCH ?"], [expr]
+        if exts:
+            where.append(f"d.ext IN ({', '.join('?' * len(exts))})")
+            args += list(exts)
+        if folder:
+            prefix = os.path.abspath(folder).rstrip(os.sep) + os.sep
+            where.append("d.path >= ? AND d.path < ?")
+            args += [prefix, prefix[:-1] + chr(ord(os.sep) + 1)]
+        if roots is not None:
+            clauses = []
+            for root in roots:
+                prefix = os.path.abspath(root).rstrip(os.sep) + os.sep
+                clauses.append("(d.path >= ? AND d.path < ?)")
+                args += [prefix, prefix[:-1] + chr(ord(os.sep) + 1)]
+            where.append("(" + (" OR ".join(clauses) or "0") + ")")
+        sql_from = ("FROM content_fts JOIN content_docs d ON d.id = content_fts.rowid WHERE "
+                    + " AND ".join(where))
+        with self._lock:
+            (total,) = self._conn.execute(f"SELECT COUNT(*) {sql_from}", args).fetchone()
+            rows = self._conn.execute(
+                f"SELECT d.path, d.size, d.mtime, bm25(content_fts) AS rank, "
+                f"snippet(content_fts, 0, '[', ']', ' … ', 16) {sql_from} "
+                f"ORDER BY rank LIMIT ? OFFSET ?",
+                args + [max(limit, 0), offset],
+            ).fetchall()
+        return {
+            "total": total,
+            "offset": offset,
+            "results": [
+                {"name": os.path.basename(path), "path": path, "size": size, "modified": mtime,
+                 "score": round(-rank, 4), "snippet": snippet}
+                for path, size, mtime, rank, snippet in rows
+            ],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def default_content_db_path() -> str:
+    return os.getenv("LOCALFS_CONTENT_DB", str(Path(__file__).with_name("fileops_content.db")))
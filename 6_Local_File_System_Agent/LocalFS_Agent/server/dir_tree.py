@@ -0,0 +1,240 @@
+# Directory size tree for the FileOps MCP server.
+# Every indexed folder (and its ancestors up to the index roots) is a node
+# carrying its own and rolled-up size, file count and newest mtime. The tree
+# follows ColumnarIndex changes incrementally, so disk-usage questions touch
+# only the nodes they return.
+
+import heapq
+import os
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from columnar_index import ColumnarIndex, IndexObserver
+
+
+class DirTree(IndexObserver):
+    """
+    Rolled-up folder statistics over a ColumnarIndex.
+
+    Per node: own_* covers files directly in the folder, total_*/newest the
+    whole subtree. Deletions can lower a subtree's newest mtime; such nodes are
+    flagged and recomputed the next time they are read.
+    """
+
+    def __init__(self, ix: ColumnarIndex, roots: Iterable[str] = ()):
+        self.ix = ix
+        self.roots = {os.path.abspath(r) for r in roots}
+        self.id: Dict[str, int] = {}
+        self.path: List[str] = []
+        self.parent: List[int] = []
+        self.children: List[List[int]] = []
+        self.own_size: List[int] = []
+        self.own_count: List[int] = []
+        self.own_newest: List[float] = []
+        self.total_size: List[int] = []
+        self.total_count: List[int] = []
+        self.newest: List[float] = []
+        self._stale_newest: set = set()
+
+        with ix.lock:
+            alive = ix.alive
+            ids, n = ix.dir_id[alive], len(ix.dirs)
+            size = np.bincount(ids, weights=ix.size[alive], minlength=n)
+            count = np.bincount(ids, minlength=n)
+            newest = np.full(n, -np.inf)
+            np.maximum.at(newest, ids, ix.mtime[alive])
+            nodes = [self._node(d) for d in ix.dirs]
+            ix.subscribe(self)
+
+        m = len(self.path)
+        own_size, own_count, own_newest = np.zeros(m, np.int64), np.zeros(m, np.int64), np.full(m, -np.inf)
+        own_size[nodes] = np.rint(size)
+        own_count[nodes] = count
+        own_newest[nodes] = newest
+        parent = np.array(self.parent, dtype=np.int64)
+        depth = np.zeros(m, dtype=np.int64)
+        for i in range(m):  # parents are always created before their children
+            depth[i] = depth[parent[i]] + 1 if parent[i] >= 0 else 0
+        total_size, total_count, total_newest = own_size.copy(), own_count.copy(), own_newest.copy()
+        for level in range(int(depth.max(initial=0)), 0, -1):
+            at = np.flatnonzero(depth == level)
+            np.add.at(total_size, parent[at], total_size[at])
+            np.add.at(total_count, parent[at], total_count[at])
+            np.maximum.at(total_newest, parent[at], total_newest[at])
+        self.own_size, self.own_count, self.own_newest = own_size.tolist(), own_count.tolist(), own_newest.tolist()
+        self.total_size, self.total_count, self.newest = total_size.tolist(), total_count.tolist(), total_newest.tolist()
+
+    def close(self) -> None:
+        self.ix.unsubscribe(self)
+
+    def _node(self, path: str) -> int:
+        """Node id for path, creating it and any missing ancestors."""
+        node = self.id.get(path)
+        if node is not None:
+            return node
+        up = os.path.dirname(path)
+        parent = -1 if path in self.roots or up == path else self._node(up)
+        node = self.id[path] = len(self.path)
+        self.path.append(path)
+        self.parent.append(parent)
+        self.children.append([])
+        if parent >= 0:
+            self.children[parent].append(node)
+        for column in (self.own_size, self.own_count, self.total_size, self.total_count):
+            column.append(0)
+        self.own_newest.append(-np.inf)
+        self.newest.append(-np.inf)
+        return node
+
+    # -------------------------
+    # Index maintenance (called by ColumnarIndex)
+    # -------------------------
+    def _add(self, rows: np.ndarray, sign: int, sizes: np.ndarray, mtimes: np.ndarray) -> None:
+        ix = self.ix
+        for did, size, mtime in zip(ix.dir_id[rows].tolist(), sizes.tolist(), mtimes.tolist()):
+            node = self._node(ix.dirs[did])
+            self.own_size[node] += sign * size
+            self.own_count[node] += sign
+            if sign > 0:
+                self.own_newest[node] = max(self.own_newest[node], mtime)
+            elif mtime >= self.own_newest[node]:
+                self._stale_newest.add(node)
+            while node >= 0:
+                self.total_size[node] += sign * size
+                self.total_count[node] += sign
+                if sign > 0:
+                    self.newest[node] = max(self.newest[node], mtime)
+                node = self.parent[node]
+
+    def rows_appended(self, start: int, stop: int) -> None:
+        rows = np.arange(start, stop)
+        self._add(rows, 1, self.ix.size[rows], self.ix.mtime[rows])
+
+    def rows_deleted(self, rows: np.ndarray) -> None:
+        self._add(rows, -1, self.ix.size[rows], self.ix.mtime[rows])
+
+    def rows_changed(self, rows: np.ndarray, old_size: np.ndarray, old_mtime: np.ndarray) -> None:
+        self._add(rows, -1, old_size, old_mtime)
+        self._add(rows, 1, self.ix.size[rows], self.ix.mtime[rows])
+
+    # -------------------------
+    # Reading
+    # -------------------------
+    def _refresh_newest(self) -> None:
+        """Recompute newest mtimes invalidated by deletions (own rows, then up the chain)."""
+        if not self._stale_newest:
+            return
+        ix = self.ix
+        stale = set()
+        for node in self._stale_newest:
+            if self.own_count[node]:
+                rows = ix.folder_rows(self.path[node])
+                rows = rows[ix.dir_id[rows] == bisect_left(ix.dirs, self.path[node])]
+                self.own_newest[node] = float(ix.mtime[rows].max())
+            else:
+                self.own_newest[node] = -np.inf
+            while node >= 0 and node not in stale:
+                stale.add(node)
+                node = self.parent[node]
+        # children before parents: deeper paths first
+        for node in sorted(stale, key=lambda n: -self.path[n].count(os.sep)):
+            self.newest[node] = max([self.own_newest[node]] + [self.newest[c] for c in self.children[node]])
+        self._stale_newest = set()
+
+    def find(self, folder: str) -> Optional[int]:
+        node = self.id.get(os.path.abspath(folder))
+        return node if node is not None and self.total_count[node] else None
+
+    def stats(self, node: int) -> Dict:
+        return {
+            "path": self.path[node],
+            "size": self.total_size[node],
+            "files": self.total_count[node],
+            "own_size": self.own_size[node],
+            "own_files": self.own_count[node],
+            "newest": self.newest[node] if self.total_count[node] else None,
+        }
+
+    def _largest_children(self, node: int) -> List[int]:
+        kids = [c for c in self.children[node] if self.total_count[c]]
+        return sorted(kids, key=self.total_size.__getitem__, reverse=True)
+
+    def du(self, folder: str, depth: int = 1, limit: int = 20) -> Optional[Dict]:
+        """
+        Folder stats with its largest subfolders nested `depth` levels deep.
+
+        Args:
+            folder: Folder path.
+            depth: How many levels of subfolders to include.
+            limit: Maximum subfolders listed per folder (largest first).
+
+        Returns:
+            Stats dict with a 'children' list, or None if nothing is indexed there.
+        """
+        with self.ix.lock:
+            node = self.find(folder)
+            if node is None:
+                return None
+            self._refresh_newest()
+            return self._du(node, depth, limit)
+
+    def _du(self, node: int, depth: int, limit: int) -> Dict:
+        out = self.stats(node)
+        if depth > 0:
+            kids = self._largest_children(node)
+            out["children"] = [self._du(c, depth - 1, limit) for c in kids[:limit]]
+            out["more_children"] = max(len(kids) - limit, 0)
+        return out
+
+    def top(self, folder: str, n: int = 10) -> List[Dict]:
+        """
+        The n largest folders below folder, found best-first: a folder is never
+        larger than its parent, so only the children of returned nodes are visited.
+        """
+        with self.ix.lock:
+            node = self.find(folder)
+            if node is None:
+                return []
+            self._refresh_newest()
+            heap = [(-self.total_size[c], c) for c in self.children[node] if self.total_count[c]]
+            heapq.heapify(heap)
+            out = []
+            while heap and len(out) < n:
+                _, c = heapq.heappop(heap)
+                out.append(self.stats(c))
+                for g in self.children[c]:
+                    if self.total_count[g]:
+                        heapq.heappush(heap, (-self.total_size[g], g))
+            return out
+
+    def treemap(self, folder: str, depth: int = 2, min_fraction: float = 0.02) -> Optional[Dict]:
+        """
+        Nested {name, size, files, children} for a treemap; subfolders smaller
+        than min_fraction of their parent are merged into one "(other)" entry.
+        """
+        with self.ix.lock:
+            node = self.find(folder)
+            if node is None:
+                return None
+            return self._treemap(node, depth, min_fraction)
+
+    def _treemap(self, node: int, depth: int, min_fraction: float) -> Dict:
+        size = self.total_size[node]
+        out = {"name": os.path.basename(self.path[node]) or self.path[node], "path": self.path[node],
+               "size": size, "files": self.total_count[node]}
+        if depth > 0 and self.children[node]:
+            kids, other, other_files = [], 0, 0
+            for c in self._largest_children(node):
+                if self.total_size[c] >= min_fraction * size and size:
+                    kids.append(self._treemap(c, depth - 1, min_fraction))
+                else:
+                    other += self.total_size[c]
+                    other_files += self.total_count[c]
+            if self.own_count[node]:
+                kids.append({"name": "(files)", "size": self.own_size[node], "files": self.own_count[node]})
+            if other_files:
+                kids.append({"name": "(other)", "size": other, "files": other_files})
+            out["children"] = kids
+        return out
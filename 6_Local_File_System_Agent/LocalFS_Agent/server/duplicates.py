@@ -0,0 +1,161 @@
+# Multi-stage duplicate detection for the FileOps MCP server.
+# Stage 1 buckets by size and folds hard links to the same inode together,
+# stage 2 hashes the head and tail of each file, stage 3 streams a full hash
+# only for files that still collide.
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import blake3
+
+    HASH_NAME = "blake3"
+    _new_hasher: Callable = blake3.blake3
+except ImportError:
+    try:
+        import xxhash
+
+        HASH_NAME = "xxh3_128"
+        _new_hasher = xxhash.xxh3_128
+    except ImportError:
+        HASH_NAME = "blake2b"
+        _new_hasher = hashlib.blake2b
+
+PARTIAL_BYTES = 4096
+CHUNK_BYTES = 1024 * 1024
+
+# (path, size, mtime)
+Candidate = Tuple[str, int, float]
+
+
+def partial_hash(path: str, size: int) -> str:
+    """Hash the first and last PARTIAL_BYTES of a file (the whole file if it is small)."""
+    h = _new_hasher()
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BYTES))
+        if size > 2 * PARTIAL_BYTES:
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+            h.update(f.read(PARTIAL_BYTES))
+        elif size > PARTIAL_BYTES:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    """Stream the whole file through the hasher in CHUNK_BYTES pieces."""
+    h = _new_hasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _bucket(items: Iterable[Tuple[str, Candidate]]) -> List[List[Candidate]]:
+    buckets: Dict[str, List[Candidate]] = {}
+    for key, c in items:
+        buckets.setdefault(key, []).append(c)
+    return [b for b in buckets.values() if len(b) > 1]
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino) if st.st_ino else None
+
+
+def _fold_links(buckets: List[List[Candidate]], workers: int
+                ) -> Tuple[List[List[Candidate]], Dict[Candidate, List[str]]]:
+    """Keep one candidate per (st_dev, st_ino) in each bucket; return the buckets and the folded paths."""
+    flat = [c for b in buckets for c in b]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        ids = dict(zip(flat, pool.map(lambda c: _file_id(c[0]), flat)))
+    links: Dict[Candidate, List[str]] = {}
+    kept = []
+    for b in buckets:
+        first: Dict[Tuple[int, int], Candidate] = {}
+        unique = []
+        for c in b:
+            fid = ids[c]
+            if fid is None or fid not in first:
+                if fid is not None:
+                    first[fid] = c
+                unique.append(c)
+            else:
+                links.setdefault(first[fid], []).append(c[0])
+        if len(unique) > 1:
+            kept.append(unique)
+    return kept, links
+
+
+def find_duplicate_groups(
+    candidates: Iterable[Candidate],
+    cache: Optional[Dict[Candidate, Tuple[Optional[str], Optional[str]]]] = None,
+    workers: int = 8,
+) -> Tuple[List[Dict], List[Tuple[Candidate, Optional[str], Optional[str]]]]:
+    """
+    Group files with identical content. Hard links to one inode count as a
+    single file: they are listed in the group's paths but free no space.
+
+    Args:
+        candidates: (path, size, mtime) for every file to consider.
+        cache: Known (partial, full) hashes keyed by (path, size, mtime).
+        workers: Thread pool size for hashing.
+
+    Returns:
+        (groups, new_hashes). Each group is {"hash", "size", "files", "paths"}, where
+        files is the number of distinct inodes behind paths; new_hashes
+        are (candidate, partial, full) tuples computed in this run, for caching.
+    """
+    cache = cache or {}
+    computed: Dict[Candidate, List[Optional[str]]] = {}
+
+    def cached(c: Candidate, stage: int) -> Optional[str]:
+        if c in computed and computed[c][stage]:
+            return computed[c][stage]
+        hit = cache.get(c)
+        return hit[stage] if hit else None
+
+    def run_stage(bucket_list: List[List[Candidate]], stage: int, fn) -> List[Tuple[str, Candidate]]:
+        todo = [c for b in bucket_list for c in b if cached(c, stage) is None]
+
+        def work(c: Candidate) -> Optional[str]:
+            try:
+                return fn(c)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for c, digest in zip(todo, pool.map(work, todo)):
+                computed.setdefault(c, [None, None])[stage] = digest
+        keyed = []
+        for b in bucket_list:
+            for c in b:
+                digest = cached(c, stage)
+                if digest is not None:
+                    keyed.append((f"{c[1]}:{digest}", c))
+        return keyed
+
+    # 1️⃣ size buckets
+    by_size, links = _fold_links(_bucket((str(c[1]), c) for c in candidates), workers)
+    # 2️⃣ head/tail hash
+    by_partial = _bucket(run_stage(by_size, 0, lambda c: partial_hash(c[0], c[1])))
+    # 3️⃣ full hash, only where the partial hash did not already cover the whole file
+    small = [b for b in by_partial if b[0][1] <= 2 * PARTIAL_BYTES]
+    large = [b for b in by_partial if b[0][1] > 2 * PARTIAL_BYTES]
+    by_full = small + _bucket(run_stage(large, 1, lambda c: full_hash(c[0])))
+
+    groups = []
+    for b in by_full:
+        c = b[0]
+        groups.append({
+            "hash": cached(c, 1) or cached(c, 0),
+            "size": c[1],
+            "files": len(b),
+            "paths": sorted(p for x in b for p in [x[0], *links.get(x, ())]),
+        })
+    new_hashes = [(c, cached(c, 0), cached(c, 1)) for c in computed]
+    return groups, new_hashes
@@ -0,0 +1,370 @@
+# Batched file operations for the FileOps MCP server.
+# A batch is validated against a simulated view of the filesystem before
+# anything is touched, split into waves of independent operations that run
+# on a thread pool, and journaled so it can be rolled back afterwards.
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from bulk_copy import fast_copy
+
+KINDS = ("move", "copy", "rename", "mkdir")
+
+
+class FileOp(NamedTuple):
+    kind: str
+    src: Optional[str]  # None for mkdir
+    dst: str
+
+
+def _within(path: str, folder: str) -> bool:
+    """True if path is folder or lies below it."""
+    return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
+
+
+def _ancestors(path: str) -> Iterable[str]:
+    parent = os.path.dirname(path)
+    while parent != path:
+        yield parent
+        path, parent = parent, os.path.dirname(parent)
+
+
+def _disk_kind(path: str) -> Optional[str]:
+    if os.path.isdir(path):
+        return "dir"
+    return "file" if os.path.lexists(path) else None
+
+
+class BatchPlan:
+    """
+    Validated, wave-scheduled form of a list of operation dicts.
+
+    Accepted operations:
+        {"op": "move" | "copy", "src": ..., "dst": ...}   dst may be an existing folder
+        {"op": "rename", "src": ..., "new_name": ...}
+        {"op": "mkdir", "path": ...}                       ("create_folder" also accepted)
+
+    Args:
+        operations: Operation dicts, applied in order.
+        roots: If given, every path must lie inside one of these folders.
+        guard: PathGuard every path is resolved through (refuses symlink escapes).
+    """
+
+    def __init__(self, operations: Sequence[Dict], roots: Sequence[str] = (), guard=None):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.guard = guard
+        self.ops: List[FileOp] = []
+        self.errors: List[str] = []
+        self._by_path: Dict[str, List[int]] = {}  # path -> ops with it as src or dst
+        self._below: Dict[str, List[int]] = {}    # folder -> ops with a dst strictly below it
+        for i, spec in enumerate(operations):
+            try:
+                op = self._validate(i, self._parse(spec))
+            except (KeyError, TypeError, ValueError, PermissionError) as e:
+                self.errors.append(f"#{i}: {e}")
+                op = None
+            # keep indexes aligned with the request; invalid entries become no-ops
+            self.ops.append(op or FileOp("noop", None, ""))
+            if op is not None:
+                for path in {op.src, op.dst} - {None}:
+                    self._by_path.setdefault(path, []).append(i)
+                for parent in _ancestors(op.dst):
+                    self._below.setdefault(parent, []).append(i)
+        self.waves = self._schedule() if not self.errors else []
+
+    # -------------------------
+    # Validation
+    # -------------------------
+    @staticmethod
+    def _parse(spec: Dict) -> FileOp:
+        kind = spec.get("op", "")
+        kind = "mkdir" if kind == "create_folder" else kind
+        if kind not in KINDS:
+            raise ValueError(f"unknown op {kind!r} (expected one of {KINDS})")
+        if kind == "mkdir":
+            return FileOp(kind, None, os.path.abspath(spec["path"]))
+        src = os.path.abspath(spec.get("src") or spec["path"])
+        if kind == "rename":
+            new_name = spec["new_name"]
+            if os.sep in new_name or new_name in ("", ".", ".."):
+                raise ValueError(f"new_name must be a plain file name, got {new_name!r}")
+            return FileOp(kind, src, os.path.join(os.path.dirname(src), new_name))
+        dst = spec["dst"]
+        if dst.endswith(("/", os.sep)):  # "into this folder", even if it does not exist yet
+            dst = os.path.join(dst, os.path.basename(src))
+        return FileOp(kind, src, os.path.abspath(dst))
+
+    def _kind(self, path: str, before: int) -> Optional[str]:
+        """'file', 'dir' or None for path as it will look just before op `before` runs."""
+        # only ops on the path itself, one of its ancestors, or (for the
+        # implicit parent folders) the newest one below it can affect it
+        candidates = set()
+        for p in (path, *_ancestors(path)):
+            ops = self._by_path.get(p, ())
+            candidates.update(ops[:bisect_left(ops, before)])
+        below = self._below.get(path, ())
+        n = bisect_left(below, before)
+        if n:
+            candidates.add(below[n - 1])
+        for k in sorted(candidates, reverse=True):
+            op = self.ops[k]
+            if op.kind in ("move", "rename") and _within(path, op.src):
+                return None
+            if op.kind in ("move", "rename", "copy") and _within(path, op.dst):
+                return self._kind(op.src + path[len(op.dst):], k)
+            if op.kind == "mkdir" and path == op.dst:
+                return "dir"
+            if op.kind != "noop" and _within(op.dst, path):
+                return "dir"  # parent folders are created on demand
+        return _disk_kind(path)
+
+    def _validate(self, i: int, op: FileOp) -> Optional[FileOp]:
+        for path in filter(None, (op.src, op.dst)):
+            if self.guard is not None:
+                self.guard.resolve(path)
+            if self.roots and not any(_within(path, r) for r in self.roots):
+                raise ValueError(f"{path} is outside the allowed roots")
+        if op.kind == "mkdir":
+            kind = self._kind(op.dst, i)
+            if kind == "file":
+                raise ValueError(f"{op.dst} exists and is a file")
+            return None if kind == "dir" else op
+        src_kind = self._kind(op.src, i)
+        if src_kind is None:
+            raise ValueError(f"source does not exist: {op.src}")
+        dst = op.dst
+        if op.kind != "rename" and self._kind(dst, i) == "dir":
+            dst = os.path.join(dst, os.path.basename(op.src))
+        if self._kind(dst, i) is not None:
+            raise ValueError(f"destination already exists: {dst}")
+        if src_kind == "dir" and _within(dst, op.src):
+            raise ValueError(f"cannot {op.kind} {op.src} into itself")
+        for parent in _ancestors(dst):
+            kind = self._kind(parent, i)
+            if kind == "file":
+                raise ValueError(f"{parent} is a file, not a folder")
+            if kind == "dir":
+                break
+        return op._replace(dst=dst)
+
+    # -------------------------
+    # Scheduling
+    # -------------------------
+    def _schedule(self) -> List[List[int]]:
+        """
+        Group ops into waves: an op runs after every earlier op whose paths
+        are equal to, inside, or above one of its own paths.
+        """
+        exact: Dict[str, int] = {}  # path -> latest wave touching exactly it
+        under: Dict[str, int] = {}  # folder -> latest wave touching something below it
+        waves: List[List[int]] = []
+        for i, op in enumerate(self.ops):
+            if op.kind == "noop":
+                continue
+            paths = [p for p in (op.src, op.dst) if p]
+            wave = 0
+            for path in paths:
+                wave = max(wave, under.get(path, -1) + 1, exact.get(path, -1) + 1)
+                for parent in _ancestors(path):
+                    wave = max(wave, exact.get(parent, -1) + 1)
+            for path in paths:
+                exact[path] = max(exact.get(path, -1), wave)
+                for parent in _ancestors(path):
+                    under[parent] = max(under.get(parent, -1), wave)
+            if wave == len(waves):
+                waves.append([])
+            waves[wave].append(i)
+        return waves
+
+    def describe(self) -> List[Dict]:
+        wave_of = {i: w for w, ops in enumerate(self.waves) for i in ops}
+        return [
+            {"op": op.kind, "src": op.src, "dst": op.dst, "wave": wave_of.get(i)}
+            for i, op in enumerate(self.ops) if op.kind != "noop"
+        ]
+
+
+class Journal:
+    """Append-only JSONL record of completed steps and how to undo them."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, entry: Dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @staticmethod
+    def read(path: str) -> List[Dict]:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+def _make_dirs(path: str) -> List[str]:
+    """makedirs that returns the folders it actually created, outermost first."""
+    missing = []
+    while not os.path.isdir(path):
+        missing.append(path)
+        path = os.path.dirname(path)
+    for folder in reversed(missing):
+        os.makedirs(folder, exist_ok=True)
+    return missing[::-1]
+
+
+def _run(op: FileOp) -> Dict:
+    """Execute one op; returns its undo record."""
+    if op.kind == "mkdir":
+        return {"undo": "rmdir", "paths": _make_dirs(op.dst)}
+    if os.path.lexists(op.dst):
+        # appeared after validation; never overwrite, the rollback depends on it
+        raise FileExistsError(f"destination already exists: {op.dst}")
+    if op.kind == "copy":
+        if os.path.isdir(op.src):
+            shutil.copytree(op.src, op.dst, symlinks=True, copy_function=fast_copy)
+        else:
+            fast_copy(op.src, op.dst, follow_symlinks=False)
+        return {"undo": "remove", "path": op.dst}
+    os.rename(op.src, op.dst) if op.kind == "rename" else shutil.move(op.src, op.dst, copy_function=fast_copy)
+    return {"undo": "move", "src": op.dst, "dst": op.src}
+
+
+def _undo(entry: Dict) -> None:
+    kind = entry["undo"]
+    if kind == "move":
+        if os.path.lexists(entry["dst"]):
+            raise FileExistsError(f"cannot restore {entry['dst']}: path exists again")
+        shutil.move(entry["src"], entry["dst"])
+    elif kind == "remove":
+        path = entry["path"]
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.unlink(path)
+    elif kind == "rmdir":
+        for folder in reversed(entry["paths"]):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass  # no longer empty or already gone
+
+
+def touched_paths(entries: Iterable[Dict]) -> Tuple[List[str], List[str]]:
+    """(files, dirs) an index refresh has to look at after these journal entries ran or were undone."""
+    files, dirs = [], []
+    for entry in entries:
+        if entry.get("undo") == "move":
+            paths = [entry["src"], entry["dst"]]
+        elif entry.get("undo") == "remove":
+            paths = [entry["path"]]
+        else:
+            continue
+        for path in paths:
+            (dirs if entry.get("is_dir") else files).append(path)
+    return files, dirs
+
+
+def apply_plan(plan: BatchPlan, journal_dir: str, workers: int = 8,
+               rollback_on_error: bool = True) -> Dict:
+    """
+    Execute a validated plan wave by wave, journaling every completed step.
+
+    Returns:
+        {"batch_id", "applied", "failed", "rolled_back", "entries", "seconds"}.
+    """
+    started = time.perf_counter()
+    batch_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    journal = Journal(os.path.join(journal_dir, f"{batch_id}.jsonl"))
+    journal.write({"batch_id": batch_id, "created": time.time(), "ops": plan.describe()})
+    entries: List[Dict] = []
+    failed: List[str] = []
+
+    def step(i: int) -> None:
+        op = plan.ops[i]
+        is_dir = op.kind == "mkdir" or os.path.isdir(op.src)
+        try:
+            entry = dict(_run(op), seq=i, is_dir=is_dir)
+        except OSError as e:
+            failed.append(f"#{i} {op.kind} {op.src or op.dst}: {e}")
+            return
+        journal.write(entry)
+        entries.append(entry)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for wave in plan.waves:
+            # create missing destination folders serially so parallel steps
+            # never race on them, and journal them so a rollback removes them
+            for i in wave:
+                op = plan.ops[i]
+                if op.kind == "mkdir":
+                    continue
+                try:
+                    created = _make_dirs(os.path.dirname(op.dst))
+                except OSError as e:
+                    failed.append(f"#{i} {op.kind} {op.src}: {e}")
+                    break
+                if created:
+                    entry = {"undo": "rmdir", "paths": created, "seq": i, "is_dir": True}
+                    journal.write(entry)
+                    entries.append(entry)
+            if not failed:
+                list(pool.map(step, wave))
+            if failed:
+                break
+    rolled_back = False
+    if failed and rollback_on_error:
+        rollback(journal, entries)
+        rolled_back = True
+    journal.close()
+    return {"batch_id": batch_id, "applied": len(entries), "failed": failed,
+            "rolled_back": rolled_back, "entries": entries,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def rollback(journal: Journal, entries: List[Dict]) -> List[str]:
+    """Undo entries newest-first; returns errors for steps that could not be undone."""
+    errors = []
+    for entry in reversed(entries):
+        try:
+            _undo(entry)
+        except OSError as e:
+            errors.append(f"#{entry['seq']}: {e}")
+    journal.write({"undone": True, "errors": errors})
+    return errors
+
+
+def undo_batch(journal_dir: str, batch_id: str) -> Dict:
+    """Roll back a previously applied batch from its journal."""
+    path = os.path.join(journal_dir, f"{os.path.basename(batch_id)}.jsonl")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No journal for batch {batch_id}")
+    lines = Journal.read(path)
+    if any(line.get("undone") for line in lines):
+        raise ValueError(f"Batch {batch_id} was already rolled back")
+    entries = [line for line in lines if "undo" in line]
+    journal = Journal(path)
+    try:
+        errors = rollback(journal, entries)
+    finally:
+        journal.close()
+    return {"batch_id": batch_id, "undone": len(entries) - len(errors), "errors": errors,
+            "entries": entries}
+
+
+def default_journal_dir() -> str:
+    path = os.getenv("LOCALFS_JOURNAL_DIR", str(Path(__file__).with_name("fileops_journal")))
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,123 @@
+# Bounded file reading for the FileOps MCP server.
+# Every helper touches only the bytes it returns (plus a small sniff/scan
+# window), so reading 5 KB of a multi-GB log costs 5 KB of I/O.
+
+import mmap
+import os
+import re
+from typing import Dict, List, Optional
+
+SNIFF_BYTES = 8192
+CHUNK_BYTES = 1 << 20
+MAX_LINE_CHARS = 500
+
+
+def is_binary(path: str) -> bool:
+    """Cheap check: a NUL byte in the first few KB means binary."""
+    with open(path, "rb") as f:
+        return b"\0" in f.read(SNIFF_BYTES)
+
+
+def _decode(data: bytes) -> str:
+    # errors="ignore" also drops a multibyte character cut at either edge
+    return data.decode("utf-8", errors="ignore")
+
+
+def read_range(path: str, offset: int = 0, length: int = 5000) -> str:
+    """Text of bytes [offset, offset + length); a negative offset counts from the end."""
+    with open(path, "rb") as f:
+        if offset < 0:
+            f.seek(max(os.fstat(f.fileno()).st_size + offset, 0))
+        else:
+            f.seek(offset)
+        return _decode(f.read(max(length, 0)))
+
+
+def _tail_start(mm: mmap.mmap, lines: int) -> int:
+    """Byte offset where the last `lines` lines begin."""
+    end = len(mm)
+    if end and mm[end - 1:end] == b"\n":
+        end -= 1  # a trailing newline does not start another line
+    for _ in range(lines):
+        end = mm.rfind(b"\n", 0, end)
+        if end < 0:
+            return 0
+    return end + 1
+
+
+def read_lines(path: str, start_line: int, end_line: Optional[int] = None, max_bytes: int = 5000) -> str:
+    """
+    Lines start_line..end_line (1-based, inclusive), capped at max_bytes.
+
+    Negative line numbers count from the end (-1 is the last line); those are
+    located by scanning backwards through a memory map, so only the tail of
+    the file is touched.
+    """
+    if start_line < 0:
+        if end_line is not None and end_line >= 0:
+            raise ValueError("end_line must also be negative when start_line is")
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = _tail_start(mm, -start_line)
+                stop = len(mm) if end_line in (None, -1) else _tail_start(mm, -end_line - 1)
+                return _decode(mm[start:min(stop, start + max_bytes)])
+    out = bytearray()
+    with open(path, "rb") as f:
+        for lineno, line in enumerate(f, 1):
+            if end_line is not None and lineno > end_line:
+                break
+            if lineno >= start_line:
+                out += line
+                if len(out) >= max_bytes:
+                    break
+    return _decode(bytes(out[:max_bytes]))
+
+
+def grep(path: str, pattern: str, regex: bool = False, ignore_case: bool = False,
+         max_matches: int = 100) -> Dict:
+    """
+    Search a file line by line in fixed-size chunks (memory stays ~CHUNK_BYTES).
+
+    Returns:
+        {"matches": [{"line", "offset", "text"}], "truncated": bool}; one entry per
+        matching line, `offset` is the byte offset of the line start.
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    needle = re.compile(pattern.encode() if regex else re.escape(pattern.encode()), flags | re.MULTILINE)
+    matches: List[Dict] = []
+    lineno, base = 1, 0  # line number / byte offset of the start of `buf`
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_BYTES)
+            buf = carry + chunk
+            if not buf:
+                break
+            # only scan complete lines; the tail waits for the next chunk
+            cut = buf.rfind(b"\n") + 1 if chunk and len(buf) < 4 * CHUNK_BYTES else len(buf)
+            if cut == 0:
+                carry = buf
+                continue
+            block, carry = buf[:cut], buf[cut:]
+            pos = counted = 0
+            while len(matches) < max_matches:
+                m = needle.search(block, pos)
+                if m is None or m.start() >= len(block):
+                    break
+                start = block.rfind(b"\n", 0, m.start()) + 1
+                end = block.find(b"\n", m.start())
+                end = len(block) if end < 0 else end
+                lineno += block.count(b"\n", counted, start)
+                counted = start
+                matches.append({"line": lineno, "offset": base + start,
+                                "text": _decode(block[start:end]).rstrip("\r")[:MAX_LINE_CHARS]})
+                pos = end + 1
+            if len(matches) >= max_matches:
+                return {"matches": matches, "truncated": True}
+            lineno += block.count(b"\n", counted)
+            base += cut
+            if not chunk:
+                break
+    return {"matches": matches, "truncated": False}
@@ -0,0 +1,182 @@
+# Shared FileOps MCP server for agent front-ends (app.py, client.py).
+# One long-lived server process speaking streamable HTTP is started on first
+# use and reused by every agent and session, so the index is loaded once and
+# stays warm. Readiness is an MCP handshake (server_status), not a fixed sleep.
+# The server is only started confined to roots, and every HTTP request must
+# carry the pool's shared secret (a bearer token), so other local processes
+# and web pages cannot drive it.
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+import secrets
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from mcp import ClientSession
+
+try:
+    from mcp.client.streamable_http import streamablehttp_client as _http_client
+except ImportError:  # renamed in newer mcp releases
+    from mcp.client.streamable_http import streamable_http_client as _http_client
+
+SERVER_NAME = "FileOps_HelperServer"
+SERVER_SCRIPT = Path(__file__).with_name("FileOps_helper.py")
+LOG_PATH = Path(__file__).with_name("fileops_server.log")
+TOKEN_ENV = "LOCALFS_MCP_TOKEN"
+
+logger = logging.getLogger(__name__)
+
+
+def default_url() -> str:
+    return os.getenv("LOCALFS_MCP_URL", "http://127.0.0.1:8765/mcp")
+
+
+def token_path() -> Path:
+    return Path(os.getenv("LOCALFS_MCP_TOKEN_FILE", str(Path(__file__).with_name("fileops_server.token"))))
+
+
+def pool_token() -> Optional[str]:
+    """The pool's shared secret: LOCALFS_MCP_TOKEN, else the token file written when the server was started."""
+    token = os.getenv(TOKEN_ENV)
+    if token:
+        return token
+    try:
+        return token_path().read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def _new_token() -> str:
+    token = secrets.token_urlsafe(32)
+    path = token_path()
+    # readable by the owner only
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    os.chmod(path, 0o600)
+    return token
+
+
+def _headers() -> Dict[str, str]:
+    token = pool_token()
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def default_roots() -> List[str]:
+    # same variable as path_guard.roots_from_env (this module is also imported as server.fileops_pool)
+    return [r for r in os.getenv("LOCALFS_ROOTS", "").split(os.pathsep) if r.strip()]
+
+
+def client_config(url: Optional[str] = None) -> Dict:
+    """MultiServerMCPClient connection config for the shared server."""
+    return {SERVER_NAME: {"url": url or default_url(), "transport": "streamable_http", "headers": _headers()}}
+
+
+def require_token(app, token: str):
+    """ASGI wrapper for the server: HTTP requests without 'Authorization: Bearer <token>' get 401."""
+    expected = f"Bearer {token}".encode()
+
+    async def guarded(scope, receive, send):
+        if scope["type"] == "http" and not hmac.compare_digest(
+                dict(scope["headers"]).get(b"authorization", b""), expected):
+            await send({"type": "http.response.start", "status": 401,
+                        "headers": [(b"content-type", b"text/plain"), (b"www-authenticate", b"Bearer")]})
+            await send({"type": "http.response.body", "body": b"missing or wrong token"})
+            return
+        await app(scope, receive, send)
+    return guarded
+
+
+async def probe(url: Optional[str] = None, timeout: float = 2.0) -> Optional[Dict]:
+    """server_status of the server at url, or None if nothing answers (or it refuses our token)."""
+    async def handshake():
+        async with _http_client(url or default_url(), headers=_headers()) as streams:
+            async with ClientSession(streams[0], streams[1]) as session:
+                await session.initialize()
+                return await session.call_tool("server_status")
+
+    try:
+        result = await asyncio.wait_for(handshake(), timeout)
+    except Exception:  # refused, timed out, not an MCP server, ...
+        return None
+    if result.isError or not result.content:
+        return None
+    return json.loads(result.content[0].text)
+
+
+def _spawn(url: str, watch: bool, roots: Sequence[str]) -> subprocess.Popen:
+    parts = urlsplit(url)
+    cmd = [sys.executable, str(SERVER_SCRIPT), "--transport", "streamable-http",
+           "--host", parts.hostname or "127.0.0.1", "--port", str(parts.port or 8765), "--warm"]
+    for root in roots:
+        cmd += ["--root", root]
+    if watch:
+        cmd.append("--watch")
+    env = {**os.environ, TOKEN_ENV: os.getenv(TOKEN_ENV) or _new_token()}
+    # own session / process group: the server outlives the front-end that started it
+    with open(LOG_PATH, "ab") as log:
+        return subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=log, env=env,
+                                start_new_session=True,
+                                creationflags=getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0))
+
+
+async def ensure_server(url: Optional[str] = None, timeout: float = 60.0, watch: bool = False,
+                        roots: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Connect to the shared server, starting it first if nothing is listening.
+
+    Args:
+        url: Streamable HTTP endpoint (default: LOCALFS_MCP_URL or http://127.0.0.1:8765/mcp).
+        timeout: Seconds to wait for a freshly started server to answer.
+        watch: Start the server with a filesystem watcher.
+        roots: Folders a newly started server is confined to (default: LOCALFS_ROOTS).
+
+    Returns:
+        The server's server_status dict.
+
+    Raises:
+        ValueError: If the server has to be started and no roots are configured.
+    """
+    url = url or default_url()
+    roots = list(roots or default_roots())
+    status = await probe(url)
+    if status is not None:
+        _check_roots(status, roots, url)
+        return status
+    if not roots:
+        raise ValueError("refusing to start the shared FileOps server unconfined; "
+                         "pass roots or set LOCALFS_ROOTS")
+    proc = _spawn(url, watch, roots)
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while time.monotonic() < deadline:
+        status = await probe(url)
+        if status is not None:
+            return status
+        if proc.poll() is not None:
+            # lost a race for the port to another front-end's server? then use that one
+            status = await probe(url)
+            if status is not None:
+                return status
+            raise RuntimeError(f"FileOps server exited with code {proc.returncode}; see {LOG_PATH}")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+    raise TimeoutError(f"FileOps server did not answer at {url} within {timeout}s; see {LOG_PATH}")
+
+
+def _check_roots(status: Dict, roots: Sequence[str], url: str) -> None:
+    """Warn when an already running server was started with other roots than this front-end's."""
+    norm = lambda paths: {os.path.normcase(os.path.realpath(p)) for p in paths}
+    allowed = status.get("allowed_roots") or []
+    if not allowed:
+        logger.warning("the shared FileOps server at %s is not confined to any roots", url)
+    elif roots and norm(roots) != norm(allowed):
+        logger.warning("the shared FileOps server is confined to %s, not %s; restart it to change roots",
+                       allowed, list(roots))
@@ -0,0 +1,255 @@
+# Persistent file index for the FileOps MCP server.
+# Files and directories are kept in SQLite so the server can start from the
+# last known state and a refresh only re-lists directories whose mtime moved.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from scanner import DEFAULT_EXCLUDES, ProgressCallback, scan
+
+# Bump when the layout changes; the database is a cache and is rebuilt.
+SCHEMA_VERSION = 2
+TABLES = ("roots", "dirs", "files", "hashes")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path     TEXT PRIMARY KEY,
+    excludes TEXT
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    path     TEXT PRIMARY KEY,
+    mtime    REAL NOT NULL,
+    children TEXT NOT NULL  -- JSON list of every subfolder name, before excludes
+);
+CREATE TABLE IF NOT EXISTS files (
+    path  TEXT PRIMARY KEY,
+    dir   TEXT NOT NULL,
+    name  TEXT NOT NULL,
+    size  INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    ino   INTEGER NOT NULL,
+    ext   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE TABLE IF NOT EXISTS hashes (
+    path    TEXT PRIMARY KEY,
+    size    INTEGER NOT NULL,
+    mtime   REAL NOT NULL,
+    algo    TEXT NOT NULL,
+    partial TEXT,
+    full    TEXT
+);
+"""
+
+
+def _subtree_bounds(root: str) -> tuple[str, str]:
+    """Half-open key range [lo, hi) covering every path strictly below root."""
+    prefix = root.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class IndexStore:
+    """
+    SQLite-backed file index keyed by path with size/mtime/inode.
+
+    A refresh stats every directory once; directories whose mtime is unchanged
+    reuse their stored file rows and child list, so only directories where
+    entries were added, removed or renamed are listed and their files stat'ed.
+    Content edits that do not touch the directory are picked up with full=True.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            for table in TABLES:
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+
+    # -------------------------
+    # Reading
+    # -------------------------
+    def roots(self) -> List[str]:
+        with self._lock:
+            return [r for (r,) in self._conn.execute("SELECT path FROM roots ORDER BY path")]
+
+    def excludes(self) -> Dict[str, List[str]]:
+        """Exclude globs each stored root was last scanned with."""
+        with self._lock:
+            return {r: json.loads(e) for r, e in self._conn.execute("SELECT path, excludes FROM roots")}
+
+    def iter_rows(self, roots: Optional[Iterable[str]] = None) -> Iterable[tuple]:
+        """
+        Stream (dir, name, size, mtime, ext) rows ordered by (dir, name).
+
+        Args:
+            roots: Restrict to files under these roots (default: all stored roots).
+        """
+        sql = "SELECT dir, name, size, mtime, ext FROM files"
+        args: list = []
+        if roots is not None:
+            clauses = []
+            for root in roots:
+                lo, hi = _subtree_bounds(os.path.abspath(root))
+                clauses.append("(path >= ? AND path < ?)")
+                args += [lo, hi]
+            sql += " WHERE " + (" OR ".join(clauses) or "0")
+        sql += " ORDER BY dir, name"
+        with self._lock:
+            cur = self._conn.execute(sql, args)
+            while True:
+                batch = cur.fetchmany(50_000)
+                if not batch:
+                    break
+                yield from batch
+
+    # -------------------------
+    # Incremental updates
+    # -------------------------
+    def apply(self, upserts: Iterable[tuple] = (), deletes: Iterable[str] = (),
+              tree_deletes: Iterable[str] = ()) -> None:
+        """
+        Persist a batch of file changes without rescanning.
+
+        Args:
+            upserts: (path, size, mtime, ino) for created or modified files.
+            deletes: Paths of removed files.
+            tree_deletes: Folders whose whole subtree was removed.
+        """
+        rows = [
+            (path, os.path.dirname(path), os.path.basename(path), size, mtime, ino,
+             os.path.splitext(path)[1].lower())
+            for path, size, mtime, ino in upserts
+        ]
+        with self._lock, self._conn:
+            for folder in tree_deletes:
+                lo, hi = _subtree_bounds(folder)
+                for table in ("files", "dirs"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE path = ? OR (path >= ? AND path < ?)",
+                        (folder, lo, hi),
+                    )
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in deletes])
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    # -------------------------
+    # Content hashes
+    # -------------------------
+    def get_hashes(self, algo: str) -> Dict[tuple, tuple]:
+        """Cached (partial, full) hashes keyed by (path, size, mtime)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime, partial, full FROM hashes WHERE algo = ?", (algo,)
+            ).fetchall()
+        return {(path, size, mtime): (partial, full) for path, size, mtime, partial, full in rows}
+
+    def put_hashes(self, algo: str, rows: Iterable[tuple]) -> None:
+        """Store ((path, size, mtime), partial, full) results; stale entries are replaced."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, size, mtime, algo, partial, full) for (path, size, mtime), partial, full in rows],
+            )
+
+    # -------------------------
+    # Refreshing
+    # -------------------------
+    def refresh(self, roots: Iterable[str], full: bool = False,
+                excludes: Sequence[str] = DEFAULT_EXCLUDES, max_depth: Optional[int] = None,
+                workers: int = 16, progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Bring the stored index up to date for the given roots.
+
+        Args:
+            roots: Folder paths to scan (in parallel).
+            full: If True, re-list every directory even if its mtime is unchanged.
+            excludes: Glob patterns for file/folder names to skip.
+            max_depth: Deepest folder level to index (root = 0); None for unlimited.
+            workers: Scanner thread pool size.
+            progress: Called with (dirs_done, files_seen) while scanning.
+
+        Returns:
+            Stats dict: files, dirs_scanned, dirs_reused, seconds.
+        """
+        started = time.perf_counter()
+        roots = [os.path.abspath(r) for r in roots]
+        stats = {"files": 0, "dirs_scanned": 0, "dirs_reused": 0}
+        excludes_key = json.dumps(sorted(excludes))
+        with self._lock, self._conn:
+            conn = self._conn
+            known: Dict[str, tuple] = {}
+            for root in roots:
+                row = conn.execute("SELECT excludes FROM roots WHERE path = ?", (root,)).fetchone()
+                if row is not None and row[0] != excludes_key:
+                    full = True  # previously skipped names may now be wanted
+                conn.execute("INSERT OR REPLACE INTO roots(path, excludes) VALUES (?, ?)",
+                             (root, excludes_key))
+                lo, hi = _subtree_bounds(root)
+                for path, mtime, children in conn.execute(
+                    "SELECT path, mtime, children FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                    (root, lo, hi),
+                ):
+                    known[path] = (mtime, children)
+
+            def reuse(path: str, mtime: float) -> Optional[List[str]]:
+                hit = known.get(path)
+                if full or hit is None or hit[0] != mtime:
+                    return None
+                return [os.path.join(path, name) for name in json.loads(hit[1])]
+
+            seen = set()
+            for result in scan(roots, excludes, max_depth, workers, progress, reuse):
+                d = result.path
+                seen.add(d)
+                if result.files is None:
+                    stats["dirs_reused"] += 1
+                    continue
+                stats["dirs_scanned"] += 1
+                conn.execute("DELETE FROM files WHERE dir = ?", (d,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (os.path.join(d, name), d, name, size, mtime, ino,
+                         os.path.splitext(name)[1].lower())
+                        for name, size, mtime, ino in result.files
+                    ],
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO dirs(path, mtime, children) VALUES (?, ?, ?)",
+                    (d, result.mtime, json.dumps([os.path.basename(c) for c in result.subdirs])),
+                )
+
+            gone = [(p,) for p in known if p not in seen]
+            if gone:
+                conn.executemany("DELETE FROM files WHERE dir = ?", gone)
+                conn.executemany("DELETE FROM dirs WHERE path = ?", gone)
+            # Files written through apply() have no dirs row; drop those whose
+            # folder the scan no longer reaches (deleted, excluded, too deep).
+            orphans = []
+            for root in roots:
+                lo, hi = _subtree_bounds(root)
+                orphans += [(d,) for (d,) in conn.execute(
+                    "SELECT DISTINCT dir FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)", (root, lo, hi),
+                ) if d not in seen]
+            if orphans:
+                conn.executemany("DELETE FROM files WHERE dir = ?", orphans)
+            (stats["files"],) = conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def default_db_path() -> str:
+    return os.getenv("LOCALFS_INDEX_DB", str(Path(__file__).with_name("fileops_index.db")))
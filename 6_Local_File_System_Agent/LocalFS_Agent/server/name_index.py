@@ -0,0 +1,291 @@
+# Filename search structures for the FileOps MCP server.
+# Lower-cased names are held in one "\0"-separated string with a hashed
+# trigram posting list and a sorted prefix array on top, so substring, prefix,
+# glob and fuzzy queries touch only candidate names instead of every entry.
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from columnar_index import ColumnarIndex, IndexObserver
+
+SEP = "\0"
+MODES = ("substring", "prefix", "glob", "fuzzy")
+# Verify at most this many trigram candidates in Python; past that one regex
+# pass over the whole name pool is cheaper.
+MAX_VERIFY = 20_000
+FUZZY_CANDIDATES = 2_000
+# Appended names are scanned linearly; past this many the index asks for a rebuild.
+MAX_DELTA = 50_000
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def _trigram_hashes(codepoints: np.ndarray) -> np.ndarray:
+    """32-bit hash of every consecutive (c0, c1, c2) codepoint triple."""
+    c = codepoints.astype(np.uint64)
+    h = (c[:-2] * np.uint64(0x9E3779B1)) ^ (c[1:-1] * np.uint64(0x85EBCA77)) ^ (c[2:] * np.uint64(0xC2B2AE3D))
+    return h & _MASK32
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+def _glob_regex(pattern: str) -> str:
+    """Translate a filename glob into a regex that cannot cross name separators."""
+    out, i = [], 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "*":
+            out.append(f"[^{SEP}]*")
+        elif ch == "?":
+            out.append(f"[^{SEP}]")
+        elif ch == "[":
+            j = i + 1
+            if pattern[j:j + 1] == "!":
+                j += 1
+            if pattern[j:j + 1] == "]":
+                j += 1
+            j = pattern.find("]", j)
+            if j < 0:
+                out.append(re.escape(ch))
+            else:
+                body = pattern[i + 1:j].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                elif body.startswith("^"):
+                    body = "\\" + body
+                out.append("[" + body + "]")
+                i = j
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return "".join(out)
+
+
+def _glob_literals(pattern: str) -> List[str]:
+    return [p for p in re.split(r"[*?]|\[[^\]]*\]", pattern) if p]
+
+
+def substring_distance(query: str, text: str) -> int:
+    """Smallest edit distance between query and any substring of text."""
+    prev = [0] * (len(text) + 1)
+    for i, qc in enumerate(query, 1):
+        cur = [i] + [0] * len(text)
+        for j, tc in enumerate(text, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (qc != tc))
+        prev = cur
+    return min(prev)
+
+
+class NameIndex(IndexObserver):
+    """
+    Search structure over the file names of a ColumnarIndex.
+
+    Names get stable ids (nid) at build time; `row_of` maps nid -> current row
+    (or -1). Rows appended later are kept in a small linearly-scanned delta and
+    compactions only remap `row_of`, so the structure follows index updates
+    without rebuilding until the delta grows past MAX_DELTA.
+    """
+
+    def __init__(self, ix: ColumnarIndex):
+        self.ix = ix
+        with ix.lock:
+            rows = np.flatnonzero(ix.alive)
+            names = [ix.name(i).lower() for i in rows.tolist()]
+            # ready for rows_appended/rows_compacted before the first callback can arrive
+            self.row_of = rows.astype(np.int64)
+            self.base = len(names)
+            self.delta: List[str] = []
+            ix.subscribe(self)
+
+        self.pool = SEP + SEP.join(names) + SEP
+        lengths = np.fromiter((len(n) + 1 for n in names), dtype=np.int64, count=len(names))
+        # starts[nid] is the separator before name nid; starts[base] is the final separator
+        self.starts = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.starts[1:])
+
+        cp = _codepoints(self.pool)
+        if len(cp) >= 3:
+            valid = (cp[:-2] != 0) & (cp[1:-1] != 0) & (cp[2:] != 0)
+            pos = np.flatnonzero(valid)
+            # owner[p - 1] is the nid of the name holding pool position p
+            owner = np.repeat(np.arange(len(names), dtype=np.uint64), lengths)
+            keys = np.sort((_trigram_hashes(cp)[pos] << np.uint64(32)) | owner[pos - 1])
+            if len(keys):
+                keys = keys[np.append(True, keys[1:] != keys[:-1])]
+        else:
+            keys = np.zeros(0, dtype=np.uint64)
+        codes = (keys >> np.uint64(32)).astype(np.uint32)
+        self.postings = (keys & _MASK32).astype(np.int64)
+        first = np.flatnonzero(np.append(True, codes[1:] != codes[:-1])) if len(codes) else np.zeros(0, np.int64)
+        self.codes = codes[first]
+        self.post_off = np.append(first, len(codes)).astype(np.int64)
+
+        self.sorted_nids = np.array(sorted(range(len(names)), key=names.__getitem__), dtype=np.int64)
+
+    @property
+    def stale(self) -> bool:
+        return len(self.delta) > MAX_DELTA
+
+    def close(self) -> None:
+        self.ix.unsubscribe(self)
+
+    # -------------------------
+    # Index maintenance (called by ColumnarIndex)
+    # -------------------------
+    def rows_appended(self, start: int, stop: int) -> None:
+        self.delta.extend(self.ix.name(i).lower() for i in range(start, stop))
+        self.row_of = np.concatenate([self.row_of, np.arange(start, stop, dtype=np.int64)])
+
+    def rows_compacted(self, keep: np.ndarray, n_old: int) -> None:
+        inverse = np.full(n_old, -1, dtype=np.int64)
+        inverse[keep] = np.arange(len(keep))
+        live = self.row_of >= 0
+        self.row_of[live] = inverse[self.row_of[live]]
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    def name(self, nid: int) -> str:
+        if nid >= self.base:
+            return self.delta[nid - self.base]
+        return self.pool[self.starts[nid] + 1:self.starts[nid + 1]]
+
+    def _posting(self, code: np.uint32) -> np.ndarray:
+        k = np.searchsorted(self.codes, code)
+        if k == len(self.codes) or self.codes[k] != code:
+            return self.postings[:0]
+        return self.postings[self.post_off[k]:self.post_off[k + 1]]
+
+    def _candidates(self, literal: str) -> Optional[np.ndarray]:
+        """Base nids containing every trigram of literal (None if literal is too short)."""
+        if len(literal) < 3:
+            return None
+        lists = sorted((self._posting(c) for c in np.unique(_trigram_hashes(_codepoints(literal)))), key=len)
+        cand = lists[0]
+        for other in lists[1:]:
+            if not len(cand):
+                break
+            cand = cand[np.isin(cand, other, assume_unique=True)]
+        return cand
+
+    def _scan(self, regex: str) -> np.ndarray:
+        """Base nids whose name matches regex, via one pass over the pool."""
+        pos = [m.start() for m in re.finditer(regex, self.pool)]
+        return np.unique(np.searchsorted(self.starts, np.array(pos, dtype=np.int64), side="right") - 1)
+
+    def _live(self, nids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(nids, rows) restricted to names whose row still exists."""
+        nids = np.asarray(nids, dtype=np.int64)
+        rows = self.row_of[nids]
+        ok = rows >= 0
+        ok[ok] = self.ix.alive[rows[ok]]
+        return nids[ok], rows[ok]
+
+    def _lengths(self, nids: np.ndarray) -> np.ndarray:
+        base = nids < self.base
+        out = np.empty(len(nids), dtype=np.int64)
+        out[base] = self.starts[nids[base] + 1] - self.starts[nids[base]] - 1
+        out[~base] = [len(self.delta[n - self.base]) for n in nids[~base].tolist()]
+        return out
+
+    def _prefix_nids(self, q: str) -> np.ndarray:
+        """Base nids whose name starts with q, in name order."""
+        lo = bisect_left(self.sorted_nids, q, key=self.name)
+        hi = bisect_right(self.sorted_nids, q + "\U0010ffff", key=self.name)
+        return self.sorted_nids[lo:hi]
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def search(self, query: str, mode: str = "substring", max_edits: int = 2) -> List[Tuple[int, float]]:
+        """
+        Find rows whose name matches query, best matches first.
+
+        Args:
+            query: Text, prefix or glob pattern (case-insensitive).
+            mode: One of 'substring', 'prefix', 'glob', 'fuzzy'.
+            max_edits: Typos tolerated in fuzzy mode.
+
+        Returns:
+            (row, score) pairs; lower scores rank first (edit distance in fuzzy mode).
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        q = query.lower()
+        with self.ix.lock:
+            if mode == "prefix":
+                return self._prefix(q)
+            if mode == "fuzzy":
+                return self._fuzzy(q, max_edits)
+            if mode == "glob":
+                regex = _glob_regex(q)
+                literals = sorted(_glob_literals(q), key=len, reverse=True)
+                compiled = re.compile(regex)
+                match = lambda name: compiled.fullmatch(name) is not None
+                cand = self._candidates(literals[0]) if literals else None
+                if cand is None or len(cand) > MAX_VERIFY:
+                    cand = self._scan(f"(?<={SEP}){regex}(?={SEP})")
+                else:
+                    cand = np.array([n for n in cand.tolist() if match(self.name(n))], dtype=np.int64)
+            elif not q:
+                cand = np.arange(self.base)
+                match = lambda name: True
+            else:
+                match = lambda name: q in name
+                cand = self._candidates(q)
+                if cand is None or len(cand) > MAX_VERIFY:
+                    cand = self._scan(re.escape(q))
+                else:
+                    cand = np.array([n for n in cand.tolist() if match(self.name(n))], dtype=np.int64)
+            delta = [self.base + k for k, name in enumerate(self.delta) if match(name)]
+            nids, rows = self._live(np.concatenate([cand, np.array(delta, dtype=np.int64)]))
+            # names starting with the query first, then shorter (closer) names
+            prefix = np.isin(nids, self._prefix_nids(q))
+            in_delta = np.flatnonzero(nids >= self.base)
+            prefix[in_delta] = [self.name(n).startswith(q) for n in nids[in_delta].tolist()]
+            order = np.lexsort((rows, self._lengths(nids), ~prefix))
+            return [(row, 0.0) for row in rows[order].tolist()]
+
+    def _prefix(self, q: str) -> List[Tuple[int, float]]:
+        nids = self._prefix_nids(q)
+        delta = [self.base + k for k, name in enumerate(self.delta) if name.startswith(q)]
+        if delta:
+            nids = np.array(sorted(nids.tolist() + delta, key=self.name), dtype=np.int64)
+        return [(row, 0.0) for row in self._live(nids)[1].tolist()]
+
+    def _fuzzy(self, q: str, max_edits: int) -> List[Tuple[int, float]]:
+        grams = np.unique(_trigram_hashes(_codepoints(q))) if len(q) >= 3 else []
+        # q-gram lemma: each edit destroys at most three of the query's trigrams
+        need = len(grams) - 3 * max_edits
+        if need > 0:
+            counts = np.bincount(np.concatenate([self._posting(c) for c in grams]), minlength=self.base)
+            cand = np.flatnonzero(counts >= need)
+            if len(cand) > FUZZY_CANDIDATES:
+                cand = cand[np.argpartition(-counts[cand], FUZZY_CANDIDATES)[:FUZZY_CANDIDATES]]
+            # same bound for the delta, counting trigrams with cheap substring tests
+            trigrams = {q[i:i + 3] for i in range(len(q) - 2)}
+            keep = lambda name: sum(t in name for t in trigrams) >= need
+        elif max_edits <= 0:
+            cand = self._scan(re.escape(q)) if q else np.arange(self.base)
+            keep = lambda name: q in name
+        else:
+            # no usable trigram bound (short query, many edits): every name is a
+            # candidate; each edit can drop at most one of the query's characters
+            chars = set(q)
+            keep = lambda name: sum(c not in name for c in chars) <= max_edits
+            cand = np.array([n for n in range(self.base) if keep(self.name(n))], dtype=np.int64)
+        delta = [self.base + k for k, name in enumerate(self.delta) if keep(name)]
+        nids, rows = self._live(np.concatenate([cand, np.array(delta, dtype=np.int64)]))
+        scored = []
+        for nid, row in zip(nids.tolist(), rows.tolist()):
+            name = self.name(nid)
+            d = substring_distance(q, name)
+            if d <= max_edits:
+                scored.append((d, not name.startswith(q), len(name), row))
+        scored.sort()
+        return [(row, float(d)) for d, _, _, row in scored]
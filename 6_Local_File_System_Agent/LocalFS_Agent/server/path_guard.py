@@ -0,0 +1,82 @@
+# Root confinement for FileOps MCP tools.
+# Every path a tool receives goes through PathGuard.resolve. Realpaths of
+# directories are cached, so a check costs a dict lookup plus one lstat of the
+# last component, and symlinks that lead outside the allowed roots are refused.
+
+import os
+import threading
+from typing import Dict, Iterable, List
+
+
+def _within(path: str, folder: str) -> bool:
+    """True if path is folder or lies below it."""
+    return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
+
+
+def _norm(path: str) -> str:
+    return os.path.normcase(path)
+
+
+class PathGuard:
+    """
+    Resolves tool paths and confines them to a fixed set of roots.
+
+    Args:
+        roots: Allowed folders; with no roots every path is allowed.
+    """
+
+    def __init__(self, roots: Iterable[str] = ()):
+        self.roots: List[str] = [os.path.realpath(os.path.expanduser(r)) for r in roots]
+        self._roots = [_norm(r) for r in self.roots]
+        self._real: Dict[str, str] = {}  # absolute dir path -> realpath
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.roots)
+
+    def _real_dir(self, folder: str) -> str:
+        real = self._real.get(folder)
+        if real is None:
+            real = os.path.realpath(folder)
+            # only cache folders that exist; a missing one may later appear as a symlink
+            if os.path.isdir(real):
+                with self._lock:
+                    self._real[folder] = real
+        return real
+
+    def allows(self, real: str) -> bool:
+        real = _norm(real)
+        return not self._roots or any(_within(real, r) for r in self._roots)
+
+    def resolve(self, path: str) -> str:
+        """
+        Absolute form of path.
+
+        Raises:
+            PermissionError: If the path, after following symlinks, is outside the roots.
+        """
+        path = os.path.abspath(os.path.expanduser(path))
+        if not self._roots:
+            return path
+        parent, name = os.path.split(path)
+        real = os.path.join(self._real_dir(parent), name) if name else self._real_dir(path)
+        if name and os.path.islink(real):
+            real = os.path.realpath(real)
+        if not self.allows(real):
+            raise PermissionError(f"{path} is outside the allowed roots {self.roots}")
+        return path
+
+    def forget(self, paths: Iterable[str]) -> None:
+        """Drop cached realpaths at or below paths (folders moved, deleted or replaced)."""
+        paths = [os.path.abspath(p) for p in paths]
+        if not paths or not self._real:
+            return
+        with self._lock:
+            for folder in [f for f in self._real if any(_within(f, p) for p in paths)]:
+                del self._real[folder]
+
+
+def roots_from_env() -> List[str]:
+    """Allowed roots from LOCALFS_ROOTS (separated by os.pathsep)."""
+    return [r for r in os.getenv("LOCALFS_ROOTS", "").split(os.pathsep) if r.strip()]
@@ -0,0 +1,108 @@
+# Parallel directory scanner for the FileOps index.
+# Each directory is listed once with os.scandir on a worker thread; the
+# DirEntry stat results are reused, and subdirectories fan back out to the
+# pool so slow (network) mounts are listed with many requests in flight.
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+DEFAULT_EXCLUDES = (".git", "node_modules", "__pycache__", ".venv")
+
+
+class DirResult(NamedTuple):
+    path: str
+    mtime: float
+    # (name, size, mtime, ino); None when the directory was reused unchanged
+    files: Optional[List[tuple]]
+    # every subfolder, including excluded ones, so callers can store a full child list
+    subdirs: List[str]
+
+
+# reuse(path, mtime) -> stored child dirs if the directory is unchanged, else None
+ReuseCallback = Callable[[str, float], Optional[List[str]]]
+# progress(dirs_done, files_seen)
+ProgressCallback = Callable[[int, int], None]
+
+
+def _excluded(name: str, excludes: Sequence[str]) -> bool:
+    return any(fnmatch(name, pattern) for pattern in excludes)
+
+
+def excluded_below(root: str, path: str, excludes: Sequence[str]) -> bool:
+    """True if scan(root) would skip path: a name on the way down from root matches."""
+    rel = os.path.relpath(path, root)
+    return rel != "." and any(_excluded(name, excludes) for name in rel.split(os.sep))
+
+
+def _list_dir(path: str, excludes: Sequence[str], reuse: Optional[ReuseCallback]) -> Optional[DirResult]:
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    if reuse is not None:
+        children = reuse(path, mtime)
+        if children is not None:
+            return DirResult(path, mtime, None, children)
+
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and not _excluded(entry.name, excludes):
+                        st = entry.stat()
+                        files.append((entry.name, st.st_size, st.st_mtime, st.st_ino))
+                except OSError:
+                    pass
+    except OSError:
+        return None
+    return DirResult(path, mtime, files, subdirs)
+
+
+def scan(
+    roots: Iterable[str],
+    excludes: Sequence[str] = DEFAULT_EXCLUDES,
+    max_depth: Optional[int] = None,
+    workers: int = 16,
+    progress: Optional[ProgressCallback] = None,
+    reuse: Optional[ReuseCallback] = None,
+) -> Iterator[DirResult]:
+    """
+    Walk all roots concurrently and yield one DirResult per directory.
+
+    Args:
+        roots: Folders to scan (scanned in parallel with each other).
+        excludes: Glob patterns matched against file and folder names.
+        max_depth: Deepest folder level to enter (root = 0); None for unlimited.
+        workers: Thread pool size.
+        progress: Called after each directory with running totals.
+        reuse: Lets the caller skip listing directories it already knows.
+
+    Yields:
+        DirResult for every directory visited, in completion order.
+    """
+    dirs_done = files_seen = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {
+            pool.submit(_list_dir, os.path.abspath(r), excludes, reuse): 0 for r in roots
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                depth = pending.pop(fut)
+                result = fut.result()
+                if result is None:
+                    continue
+                if max_depth is None or depth < max_depth:
+                    for sub in result.subdirs:
+                        if not _excluded(os.path.basename(sub), excludes):
+                            pending[pool.submit(_list_dir, sub, excludes, reuse)] = depth + 1
+                dirs_done += 1
+                files_seen += len(result.files or ())
+                if progress is not None:
+                    progress(dirs_done, files_seen)
+                yield result
@@ -0,0 +1,125 @@
+# Result cache for read-only FileOps MCP tools.
+# Entries are keyed on (tool, arguments, version), where the version is what
+# the answer depends on: the index generation for index queries, the file's
+# mtime/size for file reads. A changed version simply misses, and the stale
+# entry ages out of the LRU.
+
+import functools
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+# version(arguments) -> hashable; arguments are the call's bound arguments with defaults
+VersionFn = Callable[[Dict], Hashable]
+
+
+class ToolCache:
+    """
+    LRU cache bounded by entry count and (approximate, JSON-encoded) result size.
+
+    Args:
+        max_entries: Maximum number of cached results.
+        max_bytes: Maximum total size of cached results.
+        max_item_bytes: Results larger than this are never cached.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 max_item_bytes: int = 4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (result, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tool: str, what: str) -> None:
+        counters = self._stats.setdefault(tool, {"hits": 0, "misses": 0, "uncached": 0})
+        counters[what] += 1
+
+    def _get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._count(key[0], "hits")
+            else:
+                self._count(key[0], "misses")
+            return entry
+
+    def _put(self, key: tuple, result) -> None:
+        try:
+            nbytes = len(json.dumps(result, default=str))
+        except (TypeError, ValueError):
+            return
+        if nbytes > self.max_item_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def cached(self, version: VersionFn) -> Callable:
+        """
+        Decorator for a read-only tool function.
+
+        If version() raises OSError (e.g. the file is gone) the call bypasses the
+        cache, so the tool reports the error itself. Exceptions are not cached.
+        """
+        def decorate(fn: Callable) -> Callable:
+            sig = inspect.signature(fn)
+            tool = fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                bound = sig.bind(*args, **kwargs)
+                bound.apply_defaults()
+                try:
+                    key = (tool, json.dumps(bound.arguments, sort_keys=True, default=str),
+                           version(bound.arguments))
+                except OSError:
+                    with self._lock:
+                        self._count(tool, "uncached")
+                    return fn(*args, **kwargs)
+                entry = self._get(key)
+                if entry is not None:
+                    return entry[0]
+                result = fn(*args, **kwargs)
+                self._put(key, result)
+                return result
+
+            return wrapper
+
+        return decorate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            per_tool = {tool: dict(c) for tool, c in sorted(self._stats.items())}
+            hits = sum(c["hits"] for c in per_tool.values())
+            misses = sum(c["misses"] for c in per_tool.values())
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                "tools": per_tool,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
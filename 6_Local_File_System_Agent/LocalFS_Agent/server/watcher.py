@@ -0,0 +1,161 @@
+# Filesystem watcher that keeps the FileOps index live.
+# Uses watchdog (inotify on Linux) when available and falls back to periodic
+# directory-mtime polling through the persistent index store.
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # polling fallback only
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# on_change(files, dirs): paths that may have been created, modified or removed
+ChangeCallback = Callable[[List[str], List[str]], None]
+
+
+class _Coalescer:
+    """
+    Collects changed paths and flushes them once no new event arrived for
+    `debounce` seconds (or `max_delay` seconds after the first one), so a bulk
+    copy produces one batch instead of thousands of index updates.
+    """
+
+    def __init__(self, on_change: ChangeCallback, debounce: float, max_delay: float):
+        self.on_change = on_change
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending: Dict[str, bool] = {}  # path -> is_dir
+        self._first = self._last = 0.0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="fileops-coalescer", daemon=True)
+        self._thread.start()
+
+    def add(self, path: str, is_dir: bool) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first = now
+            self._last = now
+            self._pending[path] = self._pending.get(path, False) or is_dir
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                due = min(self._last + self.debounce, self._first + self.max_delay)
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                batch, self._pending = self._pending, {}
+            files = [p for p, is_dir in batch.items() if not is_dir]
+            dirs = [p for p, is_dir in batch.items() if is_dir]
+            try:
+                self.on_change(files, dirs)
+            except Exception:
+                logger.exception("Failed to apply %d filesystem changes", len(batch))
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self, coalescer: _Coalescer):
+        super().__init__()
+        self.coalescer = coalescer
+
+    def on_any_event(self, event) -> None:
+        # A directory "modified" event only says its entries changed; the
+        # entries report their own events, so rescanning the folder is wasted.
+        if event.event_type in ("opened", "closed", "closed_no_write"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            return
+        self.coalescer.add(event.src_path, event.is_directory)
+        dest = getattr(event, "dest_path", "")
+        if dest:
+            self.coalescer.add(dest, event.is_directory)
+
+
+class FileWatcher:
+    """
+    Keeps the index in sync with the filesystem.
+
+    Args:
+        on_change: Called with (files, dirs) batches of changed paths.
+        on_poll: Called every `poll_interval` seconds when native events are unavailable.
+        debounce: Quiet period before a batch is flushed.
+        max_delay: Upper bound on how long a change can wait during continuous activity.
+        poll_interval: Seconds between polls in fallback mode.
+    """
+
+    def __init__(self, on_change: ChangeCallback, on_poll: Callable[[], None],
+                 debounce: float = 0.5, max_delay: float = 5.0, poll_interval: float = 30.0):
+        self.on_change = on_change
+        self.on_poll = on_poll
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.mode: Optional[str] = None
+        self._observer = None
+        self._coalescer: Optional[_Coalescer] = None
+        self._poll_stop = threading.Event()
+
+    def start(self, roots: Iterable[str]) -> None:
+        roots = list(roots)
+        if Observer is not None:
+            try:
+                self._coalescer = _Coalescer(self.on_change, self.debounce, self.max_delay)
+                self._observer = Observer()
+                self._schedule(roots)
+                self._observer.start()
+                self.mode = "events"
+                logger.info("Watching %s for changes", roots)
+                return
+            except OSError as e:  # e.g. inotify watch limit reached
+                logger.warning("Native file events unavailable (%s); polling instead", e)
+                self._coalescer.stop()
+                self._observer = None
+        self.mode = "poll"
+        threading.Thread(target=self._poll, name="fileops-poller", daemon=True).start()
+        logger.info("Polling %s every %ss", roots, self.poll_interval)
+
+    def watch(self, roots: Iterable[str]) -> None:
+        """Switch the watched roots (used when refresh_index changes them)."""
+        if self._observer is not None:
+            self._observer.unschedule_all()
+            self._schedule(list(roots))
+
+    def _schedule(self, roots: List[str]) -> None:
+        handler = _Handler(self._coalescer)
+        for root in roots:
+            self._observer.schedule(handler, root, recursive=True)
+
+    def _poll(self) -> None:
+        while not self._poll_stop.wait(self.poll_interval):
+            try:
+                self.on_poll()
+            except Exception:
+                logger.exception("Index poll failed")
+
+    def stop(self) -> None:
+        self._poll_stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._coalescer is not None:
+            self._coalescer.stop()
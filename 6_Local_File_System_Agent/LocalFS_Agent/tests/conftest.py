@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+
+# FileOps_helper opens its databases at import time; keep them out of server/
+_state = tempfile.mkdtemp(prefix="localfs-tests-")
+os.environ.setdefault("LOCALFS_INDEX_DB", os.path.join(_state, "index.db"))
+os.environ.setdefault("LOCALFS_CONTENT_DB", os.path.join(_state, "content.db"))
+os.environ.setdefault("LOCALFS_JOURNAL_DIR", os.path.join(_state, "journal"))
@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+
+from columnar_index import ColumnarIndex, IndexObserver
+
+
+def _live(ix):
+    return {ix.path(i): int(ix.size[i]) for i in np.flatnonzero(ix.alive).tolist()}
+
+
+def test_updates_match_a_fresh_build():
+    rng = random.Random(0)
+    ix = ColumnarIndex.build(("/a", f"x{i:04d}", i, 0.0, "") for i in range(500))
+    expected = {f"/a/x{i:04d}": i for i in range(500)}
+    for step in range(2000):
+        if rng.random() < 0.6 or not expected:
+            path = f"/{rng.choice('abc')}/{rng.choice('xy')}{rng.randrange(1000):04d}"
+            ix.apply([(path, step, 0.0)])
+            expected[path] = step
+        else:
+            path = rng.choice(sorted(expected))
+            ix.apply(deletes=[path])
+            del expected[path]
+        assert len(ix) == len(expected)
+    assert _live(ix) == expected
+    assert ix.find_rows(["/a/x0001", "/b/y0002", "/nope/z"]).keys() <= expected.keys()
+    for folder in ("/a", "/b", "/c"):
+        paths = [ix.path(i) for i in ix.folder_rows(folder)]
+        assert paths == sorted(p for p in expected if p.startswith(folder + "/"))
+
+
+def test_appends_grow_buffers_without_moving_existing_rows():
+    ix = ColumnarIndex.build([("/a", "f", 1, 0.0, "")])
+    for i in range(3000):
+        ix.apply([(f"/a/g{i}", i, 0.0)])
+    assert len(ix) == 3001 and len(ix.size) == len(ix.alive) == 3001
+    assert ix.name(0) == "f" and ix.name(3000) == "g2999"
+    assert ix.find_rows(["/a/g1234"]) == {"/a/g1234": 1235}
+
+
+def test_observers_see_appends_and_compaction():
+    events = []
+
+    class Recorder(IndexObserver):
+        def rows_appended(self, start, stop):
+            events.append(("appended", start, stop))
+
+        def rows_compacted(self, keep, n_old):
+            events.append(("compacted", keep.tolist(), n_old))
+
+    ix = ColumnarIndex.build([("/a", "b", 1, 0.0, ""), ("/a", "d", 1, 0.0, "")])
+    ix.subscribe(Recorder())
+    ix.apply([("/a/c", 1, 0.0), ("/a/a", 1, 0.0)])
+    ix.compact()
+    assert events[0] == ("appended", 2, 4)
+    # /a/a, /a/b, /a/c, /a/d from old rows 3, 0, 2, 1
+    assert events[1] == ("compacted", [3, 0, 2, 1], 4)
+    assert [ix.name(i) for i in range(4)] == ["a", "b", "c", "d"]
@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+import pytest
+
+import FileOps_helper as H
+from path_guard import PathGuard
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """
+    root/            allowed root
+      notes.txt      "secret inside"
+      src/data.txt   regular file
+      src/link.txt   -> outside/secret.txt
+      leak.txt       -> outside/secret.txt
+    outside/secret.txt
+    """
+    root, outside = tmp_path / "root", tmp_path / "outside"
+    (root / "src").mkdir(parents=True)
+    outside.mkdir()
+    (outside / "secret.txt").write_text("secret outside")
+    (root / "notes.txt").write_text("secret inside")
+    (root / "src" / "data.txt").write_text("plain data")
+    os.symlink(outside / "secret.txt", root / "src" / "link.txt")
+    os.symlink(outside / "secret.txt", root / "leak.txt")
+
+    # the server keeps its state in module globals; restore them afterwards
+    for name in ("guard", "index", "index_roots"):
+        monkeypatch.setattr(H, name, getattr(H, name))
+    monkeypatch.setattr(H, "guard", PathGuard())
+    H.content.retain([])
+    asyncio.run(H.refresh_index([str(tmp_path)]))
+    return root, outside
+
+
+def _paths(page):
+    return sorted(r["path"] for r in page["results"])
+
+
+def test_search_content_stays_inside_roots(tree):
+    root, outside = tree
+    assert str(outside / "secret.txt") in _paths(H.search_content("secret"))
+
+    H._confine([str(root)])
+    page = H.search_content("secret")
+    assert _paths(page) == [str(root / "notes.txt")]
+    assert page["total"] == 1
+    # docs outside the roots are gone from the content index; links inside
+    # them that point out are only dropped from results
+    stored = _paths(H.content.search("outside"))
+    assert stored == [str(root / "leak.txt"), str(root / "src" / "link.txt")]
+    assert "secret outside" not in str(page)
+
+
+def test_search_content_folder_outside_roots_is_refused(tree):
+    root, outside = tree
+    H._confine([str(root)])
+    with pytest.raises(PermissionError):
+        H.search_content("secret", folder=str(outside))
+
+
+def test_bulk_transfer_refuses_links_leaving_the_roots(tree):
+    root, _ = tree
+    H._confine([str(root)])
+    with pytest.raises(PermissionError):
+        asyncio.run(H.bulk_transfer([str(root / "src")], str(root / "copy")))
+    assert not (root / "copy" / "src" / "link.txt").exists()
+
+
+def test_bulk_transfer_inside_roots(tree):
+    root, _ = tree
+    os.remove(root / "src" / "link.txt")
+    H._confine([str(root)])
+    asyncio.run(H.bulk_transfer([str(root / "src")], str(root / "copy")))
+    assert (root / "copy" / "src" / "data.txt").read_text() == "plain data"
+    with pytest.raises(PermissionError):
+        asyncio.run(H.bulk_transfer([str(root / "src")], str(tree[1])))
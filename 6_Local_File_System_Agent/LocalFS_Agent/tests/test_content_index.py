@@ -0,0 +1,29 @@
+import content_index
+from content_index import INLINE_READS, ContentIndex
+
+
+def _write(tmp_path, n):
+    files = []
+    for i in range(n):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(f"needle number{i}")
+        st = path.stat()
+        files.append((str(path), st.st_size, st.st_mtime))
+    return files
+
+
+def test_small_apply_reads_inline(tmp_path, monkeypatch):
+    ci = ContentIndex(str(tmp_path / "content.db"))
+    pools = []
+    real = content_index.ThreadPoolExecutor
+    monkeypatch.setattr(content_index, "ThreadPoolExecutor",
+                        lambda *a, **kw: pools.append(1) or real(*a, **kw))
+
+    ci.apply(_write(tmp_path, 1))
+    assert pools == []
+    assert ci.search("needle")["total"] == 1
+
+    ci.apply(_write(tmp_path, INLINE_READS + 1))
+    assert pools == [1]
+    assert ci.search("needle")["total"] == INLINE_READS + 1
+    ci.close()
@@ -0,0 +1,33 @@
+import os
+
+from duplicates import find_duplicate_groups
+
+
+def _candidates(*paths):
+    return [(str(p), os.path.getsize(p), os.path.getmtime(p)) for p in paths]
+
+
+def test_hard_links_are_one_file(tmp_path):
+    a, b, c = tmp_path / "a", tmp_path / "b", tmp_path / "c"
+    a.write_bytes(b"x" * 100)
+    os.link(a, b)
+    c.write_bytes(b"x" * 100)
+
+    groups, _ = find_duplicate_groups(_candidates(a, b))
+    assert groups == []
+
+    groups, _ = find_duplicate_groups(_candidates(a, b, c))
+    assert len(groups) == 1
+    assert groups[0]["files"] == 2
+    assert groups[0]["paths"] == sorted(map(str, (a, b, c)))
+
+
+def test_distinct_copies_are_grouped(tmp_path):
+    paths = [tmp_path / n for n in "abc"]
+    for p in paths:
+        p.write_bytes(b"y" * 20000)
+    (tmp_path / "d").write_bytes(b"y" * 19999 + b"z")
+
+    groups, hashes = find_duplicate_groups(_candidates(*paths, tmp_path / "d"))
+    assert [(g["files"], g["paths"]) for g in groups] == [(3, sorted(map(str, paths)))]
+    assert len(hashes) == 4
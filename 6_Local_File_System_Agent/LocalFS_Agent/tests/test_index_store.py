@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pytest
+
+from index_store import IndexStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = IndexStore(str(tmp_path / "index.db"))
+    yield s
+    s.close()
+
+
+def _paths(store, root):
+    return sorted(os.path.join(d, name) for d, name, *_ in store.iter_rows([root]))
+
+
+def _row(path):
+    st = os.stat(path)
+    return (path, st.st_size, st.st_mtime, st.st_ino)
+
+
+@pytest.mark.parametrize("full", [False, True], ids=["incremental", "full"])
+def test_refresh_drops_written_files_of_deleted_folder(store, tmp_path, full):
+    root = tmp_path / "root"
+    (root / "keep").mkdir(parents=True)
+    (root / "keep" / "a.txt").write_text("a")
+    store.refresh([str(root)])
+
+    # a file written through apply() into a folder the scan never saw
+    (root / "new").mkdir()
+    ghost = root / "new" / "ghost.txt"
+    ghost.write_text("boo")
+    store.apply([_row(str(ghost))])
+    assert str(ghost) in _paths(store, str(root))
+
+    shutil.rmtree(root / "new")
+    store.refresh([str(root)], full=full)
+    assert _paths(store, str(root)) == [str(root / "keep" / "a.txt")]
+
+
+def test_refresh_picks_up_and_drops_external_changes(store, tmp_path):
+    root = tmp_path / "root"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "a.txt").write_text("a")
+    (root / "b.txt").write_text("b")
+    stats = store.refresh([str(root)])
+    assert stats["dirs_scanned"] == 2 and stats["files"] == 2
+
+    shutil.rmtree(root / "sub")
+    (root / "c.txt").write_text("c")
+    store.refresh([str(root)])
+    assert _paths(store, str(root)) == [str(root / "b.txt"), str(root / "c.txt")]
+
+    # nothing changed: every folder is reused
+    assert store.refresh([str(root)])["dirs_scanned"] == 0
+
+
+def test_refresh_honours_excludes(store, tmp_path):
+    root = tmp_path / "root"
+    (root / ".git").mkdir(parents=True)
+    (root / ".git" / "HEAD").write_text("ref")
+    (root / "app.log").write_text("x")
+    (root / "app.py").write_text("x")
+    store.refresh([str(root)], excludes=[".git", "*.log"])
+    assert _paths(store, str(root)) == [str(root / "app.py")]
+    assert store.excludes() == {str(root): sorted([".git", "*.log"])}
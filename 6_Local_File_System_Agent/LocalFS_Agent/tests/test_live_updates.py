@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+import FileOps_helper as H
+from path_guard import PathGuard
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    # the server keeps its state in module globals; restore them afterwards
+    for name in ("guard", "index", "index_roots"):
+        monkeypatch.setattr(H, name, getattr(H, name))
+    monkeypatch.setattr(H, "guard", PathGuard())
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "ok.js").write_text("x")
+    asyncio.run(H.refresh_index([str(tmp_path)], exclude=[".git", "node_modules", "*.log"]))
+    return tmp_path
+
+
+def _indexed(root):
+    return sorted(r["path"] for r in H.files_in_folder(str(root), limit=1000)["results"])
+
+
+def test_write_through_skips_excluded_paths(root):
+    (root / ".git").mkdir()
+    H.write_file(str(root / ".git" / "HEAD"), "ref")
+    H.write_file(str(root / "pkg" / "debug.log"), "x")
+    H.write_file(str(root / "pkg" / "new.js"), "x")
+    assert _indexed(root) == [str(root / "pkg" / "new.js"), str(root / "pkg" / "ok.js")]
+
+
+def test_watcher_events_skip_excluded_paths(root):
+    modules = root / "pkg" / "node_modules" / "dep"
+    modules.mkdir(parents=True)
+    (modules / "index.js").write_text("x")
+    (root / "pkg" / "b.js").write_text("x")
+    H.sync_paths(files=[str(modules / "index.js")], dirs=[str(root / "pkg")])
+    assert _indexed(root) == [str(root / "pkg" / "b.js"), str(root / "pkg" / "ok.js")]
@@ -0,0 +1,45 @@
+import pytest
+
+from columnar_index import ColumnarIndex
+from name_index import NameIndex, substring_distance
+
+NAMES = ["abc", "abd", "xyz", "report_final.txt", "Report_Draft.md", "notes.txt", "archive.tar.gz"]
+
+
+@pytest.fixture
+def ix():
+    return ColumnarIndex.build(("/d", name, 1, 0.0, "") for name in sorted(NAMES))
+
+
+def _search(names, ix, query, mode, **kw):
+    return [ix.name(row) for row, _ in names.search(query, mode, **kw)]
+
+
+@pytest.mark.parametrize("query, mode, expected", [
+    ("report", "substring", ["report_final.txt", "Report_Draft.md"]),
+    ("rep", "prefix", ["report_draft.md", "report_final.txt"]),
+    ("*.tar.gz", "glob", ["archive.tar.gz"]),
+    ("*.t?t", "glob", ["notes.txt", "report_final.txt"]),
+])
+def test_exact_modes(ix, query, mode, expected):
+    got = _search(NameIndex(ix), ix, query, mode)
+    assert sorted(map(str.lower, got)) == sorted(map(str.lower, expected))
+
+
+@pytest.mark.parametrize("query, max_edits", [
+    ("abc", 1),   # one trigram: no usable q-gram bound
+    ("ab", 1),    # shorter than a trigram
+    ("repotr", 2),
+    ("report_finel", 1),
+    ("abc", 0),
+])
+def test_fuzzy_finds_every_name_within_max_edits(ix, query, max_edits):
+    expected = {n for n in NAMES if substring_distance(query, n.lower()) <= max_edits}
+    assert set(_search(NameIndex(ix), ix, query, "fuzzy", max_edits=max_edits)) == expected
+
+
+def test_fuzzy_covers_appended_names(ix):
+    names = NameIndex(ix)
+    ix.apply([("/e/abe", 1, 0.0), ("/e/report_finl.txt", 1, 0.0)], [], [])
+    assert "abe" in _search(names, ix, "abc", "fuzzy", max_edits=1)
+    assert "report_finl.txt" in _search(names, ix, "report_final", "fuzzy", max_edits=1)
@@ -0,0 +1,339 @@
+# src/stacksnap/agent/batch.py
+#
+# Batch analysis of many repositories (a whole GitHub org).
+#
+#   python -m stacksnap.agent.batch repos.txt -o results.jsonl --parquet results.parquet
+#
+# Pipeline: fetch workers (one pooled httpx client, analysis cache) feed a
+# queue of stacks that summarizer tasks send to the LLM in batches
+# (chain.abatch). Every finished repo is appended to the JSONL output at once,
+# so an interrupted run resumes by skipping the repos already written.
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from stacksnap.tools.github_fetch import make_client, parse_repo_url
+from stacksnap.tools.report import compact_stack, fast_report
+from stacksnap.tools.stacksnap_tool import analyze_repo_cached_async, store_report
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pip install pyarrow
+    pa = pq = None
+
+FETCH_CONCURRENCY = 32
+LLM_BATCH_SIZE = 8
+LLM_WORKERS = 2
+
+# summarizer(list of stack_info) -> one report per stack
+Summarizer = Callable[[List[Dict[str, List[str]]]], Awaitable[List[Any]]]
+OnResult = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def read_repo_urls(inputs: Iterable[str]) -> List[str]:
+    """
+    Repo URLs from arguments that are URLs or files of them (one per line,
+    '#' comments, or JSONL with a "repo_url" field). Duplicates are dropped.
+    """
+    urls = []
+    for item in inputs:
+        if os.path.isfile(item):
+            with open(item, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    urls.append(json.loads(line)["repo_url"] if line.startswith("{") else line)
+        else:
+            urls.append(item)
+    return list(dict.fromkeys(u.strip() for u in urls if u.strip()))
+
+
+def repo_key(repo_url: str) -> str:
+    owner, repo = parse_repo_url(repo_url)
+    return f"{owner}/{repo}".lower()
+
+
+def completed_repos(output: str) -> set:
+    """Repos already analyzed successfully in an earlier run's JSONL output."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(repo_key(record["repo_url"]))
+    return done
+
+
+def llm_summarizer() -> Summarizer:
+    """Batches the workflow's inspector chain (loads the LLM on first use)."""
+    from stacksnap.agent.workflow import inspector_chain
+
+    chain = inspector_chain()
+
+    async def summarize(stacks: List[Dict[str, List[str]]]) -> List[Any]:
+        return await chain.abatch([{"stack": compact_stack(s)} for s in stacks], return_exceptions=True)
+
+    return summarize
+
+
+class StageTimer:
+    """Total/mean seconds per pipeline stage."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float, count: int = 1) -> None:
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + count
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {"total": round(total, 3), "count": self.counts[stage],
+                    "mean": round(total / self.counts[stage], 4) if self.counts[stage] else 0.0}
+            for stage, total in self.totals.items()
+        }
+
+
+async def run_batch(
+    repo_urls: Iterable[str],
+    output: Optional[str] = None,
+    summarize: bool = True,
+    summarizer: Optional[Summarizer] = None,
+    fetch_concurrency: int = FETCH_CONCURRENCY,
+    llm_batch_size: int = LLM_BATCH_SIZE,
+    llm_workers: int = LLM_WORKERS,
+    resume: bool = True,
+    on_result: Optional[OnResult] = None,
+    fast: bool = False,
+) -> Dict[str, Any]:
+    """
+    Analyze many repos; fetching, parsing and LLM summarization overlap.
+
+    Args:
+        repo_urls: GitHub repo URLs.
+        output: JSONL file; records are appended as repos finish. Without it
+            records are returned in "results".
+        summarize: Also write the LLM report (reports already cached are reused).
+        summarizer: Replaces the LLM chain (e.g. a cheaper model).
+        resume: Skip repos already written with status "ok" to `output`.
+        on_result: Awaited with each record as it is finished.
+        fast: Write the deterministic report (signature database) instead of
+            calling the LLM; LLM reports already cached are still used.
+
+    Returns:
+        {"summary": {...throughput and per-stage timings...}, "results": [...]}
+
+    Raises:
+        ValueError: If summarizing with llm_workers < 1 (nothing would finish the records).
+    """
+    if summarize and not fast and llm_workers < 1:
+        raise ValueError("llm_workers must be at least 1 when summarizing")
+    started = time.perf_counter()
+    urls, seen = [], set()
+    for url in repo_urls:
+        try:
+            key = repo_key(url)
+        except ValueError as e:
+            print(f"[Warning] Skipping {url}: {e}")
+            continue
+        if key not in seen:
+            seen.add(key)
+            urls.append(url)
+    done = completed_repos(output) if output and resume else set()
+    todo = [u for u in urls if repo_key(u) not in done]
+
+    timer = StageTimer()
+    results: List[Dict[str, Any]] = []
+    counts = {"ok": 0, "error": 0, "cached_reports": 0}
+    out = open(output, "a", encoding="utf-8") if output else None
+    if summarize and summarizer is None and todo and not fast:
+        summarizer = llm_summarizer()
+
+    async def finish(record: Dict[str, Any]) -> None:
+        t0 = time.perf_counter()
+        counts[record["status"]] += 1
+        if out is not None:
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+        else:
+            results.append(record)
+        timer.add("write", time.perf_counter() - t0)
+        if on_result is not None:
+            await on_result(record)
+
+    url_queue: asyncio.Queue = asyncio.Queue()
+    for url in todo:
+        url_queue.put_nowait(url)
+    llm_queue: asyncio.Queue = asyncio.Queue()
+    # manifest key -> records waiting on its report; repos with identical
+    # manifests (forks, templates) share one LLM call
+    waiting: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def fetcher(http) -> None:
+        while not url_queue.empty():
+            url = url_queue.get_nowait()
+            t0 = time.perf_counter()
+            try:
+                analysis = await analyze_repo_cached_async(url, client=http)
+            except Exception as e:
+                await finish({"repo_url": url, "status": "error", "error": f"fetch: {e}"})
+                continue
+            elapsed = time.perf_counter() - t0
+            timer.add("fetch_parse", elapsed)
+            record = {
+                "repo_url": url,
+                "status": "ok",
+                "commit": analysis["context"].get("commit", ""),
+                "stack_info": analysis["stack_info"],
+                "report": analysis["report"],
+                "cached": analysis["cached"],
+                "file_extensions": analysis["context"].get("file_extensions", {}),
+                "timings": {"fetch_parse": round(elapsed, 3)},
+            }
+            key = analysis["manifest_key"]
+            if summarize and fast and record["report"] is None:
+                record["report"] = fast_report(record["stack_info"])
+                await finish(record)
+            elif summarize and record["report"] is None:
+                if key in waiting:
+                    waiting[key].append(record)
+                else:
+                    waiting[key] = [record]
+                    await llm_queue.put((record, key))
+            else:
+                counts["cached_reports"] += record["report"] is not None
+                await finish(record)
+
+    async def summarizer_worker() -> None:
+        while True:
+            batch = [await llm_queue.get()]
+            while len(batch) < llm_batch_size and not llm_queue.empty():
+                batch.append(llm_queue.get_nowait())
+            stops = batch.count(None)
+            for _ in range(stops - 1):
+                llm_queue.put_nowait(None)  # the other workers' stop signals
+            batch = [item for item in batch if item is not None]
+            if batch:
+                t0 = time.perf_counter()
+                try:
+                    reports = await summarizer([record["stack_info"] for record, _ in batch])
+                except Exception as e:
+                    reports = [e] * len(batch)
+                elapsed = time.perf_counter() - t0
+                timer.add("summarize", elapsed, len(batch))
+                for (_, key), report in zip(batch, reports):
+                    if not isinstance(report, Exception):
+                        store_report(key, report)
+                    for record in waiting.pop(key):
+                        record["timings"]["summarize"] = round(elapsed / len(batch), 3)
+                        if isinstance(report, Exception):
+                            record.update(status="error", error=f"summarize: {report}")
+                        else:
+                            record["report"] = report
+                        await finish(record)
+            if stops:
+                return
+
+    try:
+        async with make_client(fetch_concurrency) as http:
+            workers = [asyncio.create_task(summarizer_worker())
+                       for _ in range(llm_workers if summarize and not fast else 0)]
+            await asyncio.gather(*(fetcher(http) for _ in range(min(fetch_concurrency, len(todo)) or 1)))
+            for _ in workers:
+                llm_queue.put_nowait(None)
+            await asyncio.gather(*workers)
+    finally:
+        if out is not None:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    finished = counts["ok"] + counts["error"]
+    summary = {
+        "repos": len(urls),
+        "skipped": len(urls) - len(todo),
+        "ok": counts["ok"],
+        "errors": counts["error"],
+        "cached_reports": counts["cached_reports"],
+        "elapsed": round(elapsed, 3),
+        "repos_per_minute": round(finished / elapsed * 60, 1) if elapsed else 0.0,
+        "stages": timer.summary(),
+    }
+    return {"summary": summary, "results": results}
+
+
+def write_parquet(jsonl_path: str, parquet_path: str) -> int:
+    """Convert batch JSONL to Parquet (nested fields as JSON strings). Returns rows written."""
+    if pq is None:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+    columns: Dict[str, List[Any]] = {k: [] for k in
+                                     ("repo_url", "status", "error", "commit", "cached", "report",
+                                      "stack_info", "file_extensions", "timings")}
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            for name, values in columns.items():
+                value = record.get(name)
+                values.append(json.dumps(value) if isinstance(value, dict) else value)
+    pq.write_table(pa.table(columns), parquet_path)
+    return len(columns["repo_url"])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analyze many GitHub repos with StackSnap.")
+    parser.add_argument("inputs", nargs="+", help="repo URLs and/or files of repo URLs (txt or JSONL)")
+    parser.add_argument("-o", "--output", default="stacksnap_results.jsonl", help="JSONL results (appended)")
+    parser.add_argument("--parquet", help="also write the results as Parquet")
+    parser.add_argument("--no-llm", action="store_true", help="stack info only, no LLM report")
+    parser.add_argument("--fast", action="store_true", help="report from the signature database, no LLM")
+    parser.add_argument("--no-resume", action="store_true", help="re-analyze repos already in the output")
+    parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY, help="repos fetched at once")
+    parser.add_argument("--batch-size", type=int, default=LLM_BATCH_SIZE, help="stacks per LLM batch")
+    parser.add_argument("--llm-workers", type=int, default=LLM_WORKERS, help="LLM batches in flight")
+    args = parser.parse_args(argv)
+    if args.llm_workers < 1 and not (args.no_llm or args.fast):
+        parser.error("--llm-workers must be at least 1 (or use --no-llm / --fast)")
+
+    urls = read_repo_urls(args.inputs)
+    total = len(urls)
+    progress = {"n": 0}
+
+    async def report_progress(record: Dict[str, Any]) -> None:
+        progress["n"] += 1
+        mark = "✓" if record["status"] == "ok" else "✗ " + record.get("error", "")
+        print(f"[{progress['n']}/{total}] {record['repo_url']} {mark}")
+
+    result = asyncio.run(run_batch(
+        urls, output=args.output, summarize=not args.no_llm,
+        fetch_concurrency=args.concurrency, llm_batch_size=args.batch_size,
+        llm_workers=args.llm_workers, resume=not args.no_resume, on_result=report_progress, fast=args.fast,
+    ))
+    summary = result["summary"]
+    if args.parquet:
+        rows = write_parquet(args.output, args.parquet)
+        print(f"Wrote {rows} rows to {args.parquet}")
+
+    print("\n=== STACKSNAP BATCH ===")
+    print(f"Repos: {summary['repos']} (skipped {summary['skipped']} already done), "
+          f"ok {summary['ok']}, errors {summary['errors']}, cached reports {summary['cached_reports']}")
+    print(f"Elapsed: {summary['elapsed']}s  Throughput: {summary['repos_per_minute']} repos/minute")
+    for stage, t in summary["stages"].items():
+        print(f"  {stage:<12} total {t['total']:>9.3f}s  mean {t['mean']:.4f}s  x{t['count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@ from langgraph.graph import StateGraph,MessagesState,START,END
 from typing_extensions import Annotated,List
 from langgraph.graph.message import BaseMessage,add_messages
 from langchain_core.prompts import ChatPromptTemplate
-from stacksnap.tools.stacksnap_tool import stacks_analyzer
+from stacksnap.tools.stacksnap_tool import analyze_repo_cached_async, store_report
+from stacksnap.tools.report import compact_stack, fast_report
 from langchain_core.output_parsers import StrOutputParser
 from stacksnap.utils.model_loader import ModelLoader
 import os
@@ -18,19 +19,32 @@ class StackSnapState(MessagesState):
     repo_url:str
     result:dict
     stack_info:dict
+    manifest_key:str
+    refresh:bool
+    cached:str
+    fast:bool   # report from the signature database only, no LLM call
 
 
 
-def gather_context(state:StackSnapState)->StackSnapState:
+async def gather_context(state:StackSnapState)->StackSnapState:
     repo_url=state.get("repo_url","")
 
-    # 1️⃣ Gather repo context + stack
-    context, stack_info = stacks_analyzer(repo_url)
-
-    return {"repo_url":repo_url,"stack_info":stack_info}
-
-def stack_inspector(state:StackSnapState)->StackSnapState:
-    stack_info=state.get("stack_info",{})
+    # 1️⃣ Gather repo context + stack (cached per commit / manifest content)
+    analysis = await analyze_repo_cached_async(repo_url, refresh=state.get("refresh", False))
+    update = {"repo_url":repo_url,"stack_info":analysis["stack_info"],
+              "manifest_key":analysis["manifest_key"],"cached":analysis["cached"]}
+    if analysis["report"] is not None:
+        update["result"] = analysis["report"]
+    return update
+
+def route_after_gather(state:StackSnapState)->str:
+    # same manifests were already reported on: skip the LLM
+    if state.get("cached") == "report":
+        return END
+    return "fast_report" if state.get("fast", False) else "stack_inspector"
+
+def inspector_chain():
+    """prompt | llm | str parser used to write the stack report."""
     current_dir = os.path.dirname(os.path.abspath(__file__))
     # path=os.path.join(current_dir, "..", "prompt_library", "prompt.txt")
     # template=open(path).read().strip()
@@ -42,12 +56,20 @@ def stack_inspector(state:StackSnapState)->StackSnapState:
     with open(path, "r", encoding="utf-8") as f:
         template = f.read().strip()
     prompt=ChatPromptTemplate.from_template(template)
-   
+    return prompt|llm|StrOutputParser()
 
-    chain=prompt|llm|StrOutputParser()
-    response=chain.invoke({"stack":stack_info})
+async def stack_inspector(state:StackSnapState)->StackSnapState:
+    stack_info=state.get("stack_info",{})
+    chain=inspector_chain()
+    # pre-classified and truncated: a fraction of the tokens of the full stack_info
+    response=await chain.ainvoke({"stack":compact_stack(stack_info)})
+    store_report(state.get("manifest_key",""), response)
     return {"stack_info":stack_info,"result":response}
 
+async def fast_report_node(state:StackSnapState)->StackSnapState:
+    # deterministic report; not stored, so a later LLM run still writes its own
+    return {"result":fast_report(state.get("stack_info",{}))}
+
     
     
 
@@ -55,9 +77,11 @@ def analyze_repo():
     graph = StateGraph(StackSnapState)
     graph.add_node("gather_context", gather_context)
     graph.add_node("stack_inspector", stack_inspector)
+    graph.add_node("fast_report", fast_report_node)
     graph.add_edge(START, "gather_context")
-    graph.add_edge("gather_context", "stack_inspector")
+    graph.add_conditional_edges("gather_context", route_after_gather, ["stack_inspector", "fast_report", END])
     graph.add_edge("stack_inspector", END)
+    graph.add_edge("fast_report", END)
     app=graph.compile()
 
     return app
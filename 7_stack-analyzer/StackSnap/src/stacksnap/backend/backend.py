@@ -1,10 +1,27 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from stacksnap.agent.workflow import analyze_repo
+from stacksnap.agent.batch import run_batch
+from stacksnap.backend.jobs import ClientLimitExceeded, JobManager
+from stacksnap.tools.analyzers import blob_cache
+from stacksnap.tools.github_fetch import parse_repo_url
+from stacksnap.tools.stacksnap_tool import analyze_repo_cached_async
+from stacksnap.utils.analysis_cache import get_cache
 from fastapi.middleware.cors import CORSMiddleware
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await jobs.stop()
+
 # Initialize FastAPI app
-app = FastAPI(title="StackSnap API")
+app = FastAPI(title="StackSnap API", lifespan=lifespan)
 
 
 # ✅ Enable CORS for frontend
@@ -19,9 +36,69 @@ app.add_middleware(
 # Define request body
 class RepoRequest(BaseModel):
     repo_url: str
+    refresh: bool = False  # re-check the repo's HEAD instead of trusting the cached one
+    fast: bool = False  # deterministic report from the signature database, no LLM call
+
+class DependencyRequest(BaseModel):
+    repo_url: str
+    package: Optional[str] = None  # also report who pulls this package in, and why
+    ecosystem: Optional[str] = None  # npm | pypi | cargo | go
+    full: bool = False  # include every package and edge, not just the direct ones
+
+class BatchRequest(BaseModel):
+    repo_urls: List[str] = Field(min_length=1)
+    summarize: bool = True  # False: stack info only, no LLM report
+    fast: bool = False  # deterministic reports instead of the LLM
 
 # Load LangGraph app once
 graph_app = analyze_repo()
+
+
+async def run_analysis(job, emit) -> dict:
+    """Run the graph for one job, reporting each finished node as progress."""
+    final = {}
+    async for update in graph_app.astream(
+        {"repo_url": job.params["repo_url"], "refresh": job.params["refresh"], "fast": job.params["fast"]},
+        stream_mode="updates"
+    ):
+        for node, values in update.items():
+            final.update(values or {})
+            await emit(node, cached=final.get("cached", ""))
+    return final
+
+async def run_batch_job(job, emit) -> dict:
+    """Run a batch, reporting every finished repo as progress."""
+    total = len(job.params["repo_urls"])
+    progress = {"n": 0}
+
+    async def on_result(record: dict) -> None:
+        progress["n"] += 1
+        await emit("repo", done=progress["n"], total=total,
+                   repo_url=record["repo_url"], repo_status=record["status"])
+
+    return await run_batch(job.params["repo_urls"], summarize=job.params["summarize"],
+                           fast=job.params["fast"], on_result=on_result)
+
+jobs = JobManager(run_analysis)
+
+
+def client_id(request: Request) -> str:
+    """Clients are told apart by X-Client-Id, else by address."""
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+
+async def submit_job(request: RepoRequest, http_request: Request):
+    try:
+        owner, repo = parse_repo_url(request.repo_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # a refresh must not join a run that may still use the cached HEAD
+        key = f"{owner}/{repo}".lower() + (":fast" if request.fast else "") + (":refresh" if request.refresh else "")
+        return await jobs.submit(key,
+                                 {"repo_url": request.repo_url, "refresh": request.refresh, "fast": request.fast},
+                                 client_id(http_request))
+    except ClientLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
 def format_result_text(text: str) -> str:
     """Convert \n text into HTML-friendly format with bullets."""
 
@@ -33,13 +110,100 @@ def format_result_text(text: str) -> str:
     )
     return formatted
 @app.post("/analyze")
-async def analyze_repo_endpoint(request: RepoRequest):
+async def analyze_repo_endpoint(request: RepoRequest, http_request: Request):
+    job, _ = await submit_job(request, http_request)
+    await job.wait()
     try:
-
-        response = graph_app.invoke({"repo_url": request.repo_url})
+        if job.error is not None:
+            raise RuntimeError(job.error)
+        response = job.result
+        cached = response.get("cached", "")
         if "result" in response:
             print(response["result"])
             response = format_result_text(response["result"])
-        return {"status": "success", "data": response}
+        return {"status": "success", "data": response, "cached": cached}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job_endpoint(request: RepoRequest, http_request: Request):
+    """Queue an analysis; poll GET /jobs/{job_id} or stream GET /jobs/{job_id}/events."""
+    job, deduplicated = await submit_job(request, http_request)
+    return {"status": "success", "data": {"job_id": job.id, "status": job.status, "deduplicated": deduplicated}}
+
+
+@app.post("/analyze/batch", status_code=202)
+async def analyze_batch_endpoint(request: BatchRequest, http_request: Request):
+    """
+    Queue a batch of repos as one job. Results and throughput are in the job's
+    result ({"summary", "results"}); /jobs/{job_id}/events streams per-repo progress.
+    """
+    urls = list(dict.fromkeys(request.repo_urls))
+    key = "batch:" + hashlib.sha256(json.dumps([sorted(urls), request.summarize, request.fast]).encode()).hexdigest()
+    try:
+        job, deduplicated = await jobs.submit(key, {"repo_urls": urls, "summarize": request.summarize,
+                                                    "fast": request.fast},
+                                              client_id(http_request), runner=run_batch_job)
+    except ClientLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"status": "success", "data": {"job_id": job.id, "status": job.status,
+                                          "repos": len(urls), "deduplicated": deduplicated}}
+
+
+@app.post("/dependencies")
+async def dependencies_endpoint(request: DependencyRequest):
+    """Resolved dependency graph of a repo (from its lockfiles), optionally queried for one package."""
+    try:
+        analysis = await analyze_repo_cached_async(request.repo_url, with_graph=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    graph = analysis["graph"]
+    data = graph.to_dict() if request.full else {
+        "summary": graph.summary(),
+        "direct": [dict(vars(p), id=p.id) for p in graph.direct()],
+    }
+    if request.package:
+        data["query"] = {
+            "package": request.package,
+            "versions": [p.id for p in graph.find(request.package, request.ecosystem)],
+            "dependents": [p.id for p in graph.dependents(request.package, request.ecosystem)],
+            "path": graph.path_to(request.package, request.ecosystem),
+        }
+    return {"status": "success", "data": data}
+
+
+@app.get("/jobs/stats")
+async def job_stats():
+    return {"status": "success", "data": jobs.stats()}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return {"status": "success", "data": job.snapshot()}
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: one per progress step, then the final snapshot as 'result'."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+
+    async def stream():
+        async for event in job.follow():
+            yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+        yield f"event: result\ndata: {json.dumps(job.snapshot(), default=str)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    cache = get_cache()
+    return {"status": "success", "data": cache.stats() if cache is not None else None,
+            "parsed_files": blob_cache.stats()}
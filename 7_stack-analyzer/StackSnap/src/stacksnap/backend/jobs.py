@@ -0,0 +1,181 @@
+# src/stacksnap/backend/jobs.py
+#
+# In-process job queue for the StackSnap API.
+# Analyses are submitted as jobs and run by a fixed number of worker tasks on
+# the server's event loop, so a slow repo never blocks other requests.
+# Submitting a repo that is already queued or running returns the existing
+# job, and each client may only have a bounded number of jobs in flight.
+
+import asyncio
+import itertools
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+MAX_WORKERS = int(os.getenv("STACKSNAP_WORKERS", "16"))
+MAX_JOBS_PER_CLIENT = int(os.getenv("STACKSNAP_CLIENT_LIMIT", "4"))
+JOB_TTL = 600  # seconds finished jobs stay pollable
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "error"
+
+Emit = Callable[..., Awaitable[None]]
+Runner = Callable[["Job", Emit], Awaitable[Any]]
+
+
+class ClientLimitExceeded(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key: str, params: Dict[str, Any], client: str, runner: Optional[Runner] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.params = params
+        self.runner = runner
+        self.owner = client  # the submitter; only this client's limit counts the job
+        self.clients = {client}
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Condition()
+        self._seq = itertools.count()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    async def _emit(self, stage: str, **data) -> None:
+        self.events.append({"seq": next(self._seq), "stage": stage, "status": self.status,
+                            "time": round(time.time() - self.created_at, 3), **data})
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait(self) -> "Job":
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.finished)
+        return self
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        """Every event of the job (past ones first) until it finishes."""
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.events) > sent or self.finished)
+            while sent < len(self.events):
+                yield self.events[sent]
+                sent += 1
+            if self.finished and sent == len(self.events):
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "params": self.params,
+            "status": self.status,
+            "stage": self.events[-1]["stage"] if self.events else None,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Args:
+        runner: async runner(job, emit) -> result; `await emit(stage, **data)` reports progress.
+        workers: Analyses run at the same time; further jobs wait in the queue.
+        per_client: Unfinished jobs one client may have (deduplicated joins excluded).
+    """
+
+    def __init__(self, runner: Runner, workers: int = MAX_WORKERS, per_client: int = MAX_JOBS_PER_CLIENT):
+        self.runner = runner
+        self.workers = workers
+        self.per_client = per_client
+        self.jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[str, Job] = {}  # dedup key -> unfinished job
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _start(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queue, self._tasks = None, []
+
+    def _prune(self) -> None:
+        cutoff = time.time() - JOB_TTL
+        for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def active_for(self, client: str) -> int:
+        return sum(1 for j in self._in_flight.values() if j.owner == client)
+
+    async def submit(self, key: str, params: Dict[str, Any], client: str,
+                     runner: Optional[Runner] = None) -> "tuple[Job, bool]":
+        """
+        (job, deduplicated): the unfinished job for `key` if there is one,
+        else a new queued job run by `runner` (default: the manager's).
+
+        Raises:
+            ClientLimitExceeded: If `client` already has per_client jobs in flight.
+        """
+        self._start()
+        self._prune()
+        job = self._in_flight.get(key)
+        if job is not None:
+            job.clients.add(client)
+            return job, True
+        if self.active_for(client) >= self.per_client:
+            raise ClientLimitExceeded(f"{client} already has {self.per_client} analyses in flight")
+        job = Job(key, params, client, runner)
+        self.jobs[job.id] = job
+        self._in_flight[key] = job
+        await job._emit("queued", position=self._queue.qsize())
+        self._queue.put_nowait(job)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        await job._emit("started")
+        try:
+            job.result = await (job.runner or self.runner)(job, job._emit)
+            job.status = DONE
+        except asyncio.CancelledError:
+            job.status, job.error = FAILED, "cancelled"
+            raise
+        except Exception as e:
+            job.status, job.error = FAILED, str(e)
+        finally:
+            job.finished_at = time.time()
+            self._in_flight.pop(job.key, None)
+            await job._emit(job.status, elapsed=round(job.finished_at - job.created_at, 3))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "per_client": self.per_client,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": sum(1 for j in self._in_flight.values() if j.status == RUNNING),
+            "jobs": len(self.jobs),
+        }
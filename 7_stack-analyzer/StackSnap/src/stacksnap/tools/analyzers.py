@@ -0,0 +1,320 @@
+# src/stacksnap/tools/analyzers.py
+#
+# Registry of manifest analyzers.
+# Each analyzer is a plugin registered for filename patterns; it turns one
+# file into an AnalyzerResult (stack entries, plus the file's dependency
+# information for the graph). Results are cached per blob (content hash), and
+# large files are parsed in a process pool so batch runs use every core.
+#
+# Adding an ecosystem:
+#
+#   @register("mix", "mix.exs", language="Elixir", ecosystem="hex")
+#   def analyze_mix(path: str, content: str) -> AnalyzerResult:
+#       return AnalyzerResult(libraries=MIX_DEP.findall(content))
+#
+# Register at import time (module level): pool workers import this module
+# and look analyzers up by name.
+
+import fnmatch
+import multiprocessing
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from stacksnap.tools.lockfiles import DependencyGraph, FileDeps, assemble_graph, parse_dependency_file
+from stacksnap.tools.signatures import get_signatures
+from stacksnap.utils.analysis_cache import git_blob_sha
+
+# Bump when an analyzer's output changes (part of the per-blob cache key)
+ANALYZER_VERSION = 2
+
+POOL_MIN_BYTES = 256 * 1024  # smaller files are parsed inline (pickling costs more)
+POOL_WORKERS = int(os.getenv("STACKSNAP_PARSE_WORKERS", "0")) or min(8, os.cpu_count() or 1)
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # source bytes whose results are kept
+
+_GEM = re.compile(r'^\s*gem\s+["\']([^"\']+)["\']', re.M)
+_GRADLE_DEP = re.compile(r'implementation\s+["\']([^"\']+)["\']')
+_POM_NS = {"m": "http://maven.apache.org/POM/4.0.0"}
+
+
+@dataclass
+class AnalyzerResult:
+    languages: List[str] = field(default_factory=list)
+    frameworks: List[str] = field(default_factory=list)
+    libraries: List[str] = field(default_factory=list)
+    devops: List[str] = field(default_factory=list)
+    others: List[str] = field(default_factory=list)
+    deps: Optional[FileDeps] = None  # lockfile subgraph / manifest requirements
+    ecosystem: Optional[str] = None  # of `libraries`, for the signature lookup
+
+
+AnalyzerFn = Callable[[str, str], AnalyzerResult]
+
+
+@dataclass(frozen=True)
+class Analyzer:
+    name: str
+    patterns: Tuple[str, ...]  # fnmatch patterns on the lowercased file name
+    fn: AnalyzerFn
+    language: Optional[str] = None  # reported even if the file fails to parse
+    ecosystem: Optional[str] = None  # package ecosystem of the libraries it reports
+
+
+_analyzers: Dict[str, Analyzer] = {}
+_exact: Dict[str, Analyzer] = {}
+_globs: List[Tuple[re.Pattern, Analyzer]] = []
+
+
+def register(name: str, *patterns: str, language: Optional[str] = None,
+             ecosystem: Optional[str] = None) -> Callable[[AnalyzerFn], AnalyzerFn]:
+    """Decorator: analyze files whose name matches any of `patterns` with the function."""
+    def decorate(fn: AnalyzerFn) -> AnalyzerFn:
+        analyzer = Analyzer(name, tuple(p.lower() for p in patterns), fn, language, ecosystem)
+        _analyzers[name] = analyzer
+        for pattern in analyzer.patterns:
+            if any(c in pattern for c in "*?["):
+                _globs.append((re.compile(fnmatch.translate(pattern)), analyzer))
+            else:
+                _exact[pattern] = analyzer
+        return fn
+    return decorate
+
+
+def find_analyzer(path: str) -> Optional[Analyzer]:
+    name = path.rpartition("/")[2].lower()
+    analyzer = _exact.get(name)
+    if analyzer is None:
+        analyzer = next((a for pattern, a in _globs if pattern.match(name)), None)
+    return analyzer
+
+
+def analyzers() -> List[Analyzer]:
+    return list(_analyzers.values())
+
+
+# -------------------------
+# Built-in analyzers
+# -------------------------
+def _dependency_file(path: str, content: str) -> AnalyzerResult:
+    """Manifests and lockfiles whose dependencies go into the graph (see lockfiles.py)."""
+    return AnalyzerResult(deps=parse_dependency_file(path, content))
+
+
+def _language_only(path: str, content: str) -> AnalyzerResult:
+    return AnalyzerResult()
+
+
+for _name, _patterns, _language, _fn in (
+    ("python", ("requirements.txt", "pyproject.toml", "setup.py", "poetry.lock", "uv.lock"), "Python",
+     _dependency_file),
+    ("python-other", ("*requirements.txt", "pipfile"), "Python", _language_only),
+    ("node", ("package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock"), "JavaScript/Node.js",
+     _dependency_file),
+    ("rust", ("cargo.toml", "cargo.lock"), "Rust", _dependency_file),
+    ("go", ("go.mod", "go.sum"), "Go", _dependency_file),
+):
+    register(_name, *_patterns, language=_language)(_fn)
+
+
+@register("gemfile", "gemfile", language="Ruby", ecosystem="rubygems")
+def analyze_gemfile(path: str, content: str) -> AnalyzerResult:
+    return AnalyzerResult(libraries=_GEM.findall(content))
+
+
+@register("gradle", "build.gradle", language="Java/Kotlin", ecosystem="maven")
+def analyze_gradle(path: str, content: str) -> AnalyzerResult:
+    return AnalyzerResult(libraries=_GRADLE_DEP.findall(content))
+
+
+@register("maven", "pom.xml", language="Java", ecosystem="maven")
+def analyze_pom(path: str, content: str) -> AnalyzerResult:
+    root = ET.fromstring(content)
+    libraries = []
+    for dep in root.findall(".//m:dependency", _POM_NS):
+        group = dep.find("m:groupId", _POM_NS)
+        artifact = dep.find("m:artifactId", _POM_NS)
+        if group is not None and artifact is not None:
+            libraries.append(f"{group.text}:{artifact.text}")
+    return AnalyzerResult(libraries=libraries)
+
+
+@register("devops", "*dockerfile", "*makefile")
+def analyze_devops(path: str, content: str) -> AnalyzerResult:
+    return AnalyzerResult(devops=[path])
+
+
+# -------------------------
+# Running analyzers
+# -------------------------
+def _run(analyzer: Analyzer, path: str, content: str) -> AnalyzerResult:
+    try:
+        result = analyzer.fn(path, content)
+    except Exception as e:
+        print(f"[Warning] Failed to parse {path}: {e}")
+        result = AnalyzerResult()
+    if analyzer.language and analyzer.language not in result.languages:
+        result.languages.insert(0, analyzer.language)
+    result.ecosystem = result.ecosystem or analyzer.ecosystem
+    return result
+
+
+def _run_named(name: str, path: str, content: str) -> AnalyzerResult:
+    """Pool entry point: analyzers are looked up by name in the worker."""
+    return _run(_analyzers[name], path, content)
+
+
+class BlobCache:
+    """LRU of analyzer results keyed by (analyzer, path, blob SHA), bounded by source bytes."""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, Tuple[AnalyzerResult, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: tuple) -> Optional[AnalyzerResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, result: AnalyzerResult, nbytes: int) -> None:
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+blob_cache = BlobCache()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process pool for large files (spawned workers: safe in threaded servers)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def reset_pool() -> None:
+    """Shut the pool down; the next large file starts a new one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def analyze_files(manifests: Dict[str, str], use_pool: bool = True) -> Dict[str, AnalyzerResult]:
+    """
+    AnalyzerResult per file. Cached results are reused; files of at least
+    POOL_MIN_BYTES are parsed in the process pool, the rest inline.
+    Files no analyzer matches are reported under "others".
+    """
+    results: Dict[str, AnalyzerResult] = {}
+    large = []
+    for path, content in manifests.items():
+        analyzer = find_analyzer(path)
+        if analyzer is None:
+            results[path] = AnalyzerResult(others=[path])
+            continue
+        key = (analyzer.name, ANALYZER_VERSION, path, git_blob_sha(content))
+        cached = blob_cache.get(key)
+        if cached is not None:
+            results[path] = cached
+        elif use_pool and POOL_WORKERS > 1 and len(content) >= POOL_MIN_BYTES:
+            large.append((key, analyzer, path, content))
+        else:
+            results[path] = _run(analyzer, path, content)
+            blob_cache.put(key, results[path], len(content))
+
+    if len(large) == 1:
+        # one big file: a worker would only add pickling
+        key, analyzer, path, content = large[0]
+        results[path] = _run(analyzer, path, content)
+        blob_cache.put(key, results[path], len(content))
+    elif large:
+        try:
+            pool = get_pool()
+            futures = [pool.submit(_run_named, analyzer.name, path, content) for _, analyzer, path, content in large]
+            parsed = [future.result() for future in futures]
+        except BrokenProcessPool as e:
+            print(f"[Warning] Parser pool failed ({e}), parsing inline")
+            reset_pool()
+            parsed = [_run(analyzer, path, content) for _, analyzer, path, content in large]
+        for (key, _, path, content), result in zip(large, parsed):
+            results[path] = result
+            blob_cache.put(key, result, len(content))
+    return {path: results[path] for path in manifests}
+
+
+def dependency_graph(results: Dict[str, AnalyzerResult]) -> DependencyGraph:
+    return assemble_graph(r.deps for r in results.values() if r.deps is not None)
+
+
+def build_stack(results: Dict[str, AnalyzerResult]) -> Dict[str, object]:
+    """Combine per-file results into the stack_info categories."""
+    stack = {"Languages": [], "Frameworks": [], "Libraries": [], "DevOps": [], "Others": []}
+    packages = []  # (ecosystem, name) to classify
+    for result in results.values():
+        stack["Languages"] += result.languages
+        stack["Frameworks"] += result.frameworks
+        stack["Libraries"] += result.libraries
+        stack["DevOps"] += result.devops
+        stack["Others"] += result.others
+        if result.ecosystem:
+            packages += [(result.ecosystem, name) for name in result.libraries]
+
+    # Direct dependencies of every ecosystem with a lockfile/manifest parser
+    graph = dependency_graph(results)
+    direct = graph.direct()
+    stack["Libraries"] += [p.name for p in direct]
+    packages += [(p.ecosystem, p.name) for p in direct]
+
+    # Frameworks and library categories from the signature database
+    classification = get_signatures().classify(packages)
+    stack["Frameworks"] += classification.frameworks
+
+    # Remove duplicates
+    for key in stack:
+        stack[key] = list(dict.fromkeys(stack[key]))
+
+    # e.g. {"Database/ORM": ["Prisma"], "Testing": ["Jest"], "Other": [...unknown packages]}
+    stack["Categories"] = dict(classification.categories)
+    if classification.unclassified:
+        stack["Categories"]["Other"] = classification.unclassified
+    # Package counts per ecosystem, e.g. {"npm": {"packages": 812, "direct": 31, ...}}
+    if len(graph):
+        stack["Dependencies"] = graph.summary()
+    return stack
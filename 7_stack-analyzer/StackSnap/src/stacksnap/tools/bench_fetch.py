@@ -0,0 +1,200 @@
+# src/stacksnap/tools/bench_fetch.py
+#
+# Benchmark: serial manifest probing vs. concurrent pooled fetching.
+#
+#   python -m stacksnap.tools.bench_fetch --latency 0.05 --repeat 3
+#
+# Starts a local stub of raw.githubusercontent.com + the GitHub trees API
+# (fixed per-request latency, most candidate paths 404) and times:
+#   serial      the pre-async gather loop (one requests.get per candidate)
+#   concurrent  all candidates + the tree at once over one httpx client
+#   tree        tree first, then only the manifests it lists (no 404 probes)
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import requests
+
+from stacksnap.tools import github_fetch
+
+# Same candidate layout as stacksnap_tool (kept here so the benchmark does not need langchain)
+MANIFESTS = [
+    "package.json", "yarn.lock", "package-lock.json",
+    "requirements.txt", "Pipfile", "pyproject.toml", "setup.py", "environment.yml",
+    "Cargo.toml", "go.mod", "composer.json", "Gemfile",
+    "build.gradle", "pom.xml", ".csproj", "packages.config",
+    "Dockerfile", "Makefile",
+    "poetry.lock", "uv.lock", "Cargo.lock", "go.sum",
+]
+FOLDERS = ["", "packages", "examples", "apps"]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default backlog of 5 drops concurrent connects
+
+
+STUB_SHA = "0" * 39 + "1"  # the stub repo's only commit
+
+
+def _route(files: Dict[str, str], tree: str, path: str):
+    if path.startswith("/api/") and "/git/trees/" in path:
+        return 200, tree
+    if path.startswith("/api/") and path.endswith("/commits/HEAD"):
+        return 200, STUB_SHA
+    if path.startswith("/raw/"):
+        rel = path.split("/", 5)[-1]  # /raw/<owner>/<repo>/<ref>/<path>
+        if rel in files:
+            return 200, files[rel]
+    return 404, "404: Not Found"
+
+
+def _serve(files: Dict[str, str], latency: float, tree_blobs: int, counter, ready) -> None:
+    entries = [{"path": p, "type": "blob"} for p in files]
+    entries += [{"path": f"src/mod{i}.py", "type": "blob"} for i in range(tree_blobs)]
+    tree = json.dumps({"tree": entries})
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True  # headers and body are separate writes
+
+        def do_GET(self):
+            with counter.get_lock():
+                counter.value += 1
+            time.sleep(latency)
+            status, body = _route(files, tree, self.path)
+            etag = f'"{hash(body)}"'
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, ""
+            data = body.encode()
+            self.send_response(status)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = _Server(("127.0.0.1", 0), Handler)
+    ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+class StubGitHub:
+    """
+    Local stand-in for raw.githubusercontent.com and the GitHub trees API,
+    serving one fake repository from a separate process (so it does not
+    compete with the client for the GIL).
+
+    Routes: /raw/<owner>/<repo>/<ref>/<path>,
+    /api/repos/<owner>/<repo>/git/trees/<ref> and
+    /api/repos/<owner>/<repo>/commits/HEAD (honours If-None-Match); every
+    response is delayed by `latency` seconds to stand in for the network
+    round-trip.
+    """
+
+    def __init__(self, files: Dict[str, str], latency: float = 0.05, tree_blobs: int = 2000):
+        self.files = files
+        self.latency = latency
+        self.tree_blobs = tree_blobs
+        self._counter = multiprocessing.Value("i", 0)
+        self._process: Optional[multiprocessing.Process] = None
+        self.url = ""
+
+    @property
+    def requests(self) -> int:
+        return self._counter.value
+
+    def __enter__(self) -> "StubGitHub":
+        ours, theirs = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.files, self.latency, self.tree_blobs, self._counter, theirs),
+            daemon=True,
+        )
+        self._process.start()
+        self.url = f"http://127.0.0.1:{ours.recv()}"
+        github_fetch.RAW_BASE = self.url + "/raw"
+        github_fetch.API_BASE = self.url + "/api"
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join()
+
+
+def sample_repo() -> Dict[str, str]:
+    return {
+        "README.md": "# demo\n",
+        "package.json": json.dumps({"dependencies": {"react": "^18.0.0"}}),
+        "requirements.txt": "fastapi\nuvicorn\n",
+        "Dockerfile": "FROM python:3.12\n",
+        "apps/package.json": json.dumps({"dependencies": {"next": "14"}}),
+        # outside the probed folders: only tree-driven discovery finds it
+        "services/api/pyproject.toml": "[project]\nname = 'api'\n",
+    }
+
+
+def candidates() -> List[str]:
+    readmes = [f"{f}/{n}" if f else n for f in FOLDERS for n in ("README.md", "readme.md")]
+    return readmes + [f"{f}/{m}" if f else m for f in FOLDERS for m in MANIFESTS]
+
+
+def serial(owner: str, repo: str) -> int:
+    """The original loop: one blocking GET per candidate, then the tree."""
+    found = 0
+    with requests.Session() as session:
+        for path in candidates():
+            r = session.get(f"{github_fetch.RAW_BASE}/{owner}/{repo}/HEAD/{path}", timeout=10)
+            found += r.status_code == 200
+        session.get(f"{github_fetch.API_BASE}/repos/{owner}/{repo}/git/trees/HEAD?recursive=1", timeout=10)
+    return found
+
+
+async def tree_driven(owner: str, repo: str, max_concurrency: int) -> int:
+    async with github_fetch.make_client(max_concurrency) as client:
+        tree, _ = await github_fetch.fetch_tree(client, owner, repo)
+        wanted = [item["path"] for item in tree
+                  if item["path"].rsplit("/", 1)[-1] in MANIFESTS + ["README.md"]]
+        files = await github_fetch.fetch_files(client, owner, repo, wanted, max_concurrency)
+    return len(files)
+
+
+async def concurrent(owner: str, repo: str, max_concurrency: int) -> int:
+    async with github_fetch.make_client(max_concurrency) as client:
+        files, _ = await asyncio.gather(
+            github_fetch.fetch_files(client, owner, repo, candidates(), max_concurrency),
+            github_fetch.fetch_tree(client, owner, repo),
+        )
+    return len(files)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub round-trip seconds")
+    parser.add_argument("--concurrency", type=int, default=github_fetch.MAX_CONCURRENCY)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with StubGitHub(sample_repo(), latency=args.latency) as stub:
+        print(f"{args.latency * 1000:.0f} ms latency per request")
+        for name, run in (("serial", lambda: serial("o", "r")),
+                          ("concurrent", lambda: asyncio.run(concurrent("o", "r", args.concurrency))),
+                          ("tree", lambda: asyncio.run(tree_driven("o", "r", args.concurrency)))):
+            best = float("inf")
+            before = stub.requests
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                found = run()
+                best = min(best, time.perf_counter() - started)
+            per_run = (stub.requests - before) // args.repeat
+            print(f"{name:<11} {best:7.3f}s  {per_run:3d} requests  ({found} files found)")
+
+
+if __name__ == "__main__":
+    main()
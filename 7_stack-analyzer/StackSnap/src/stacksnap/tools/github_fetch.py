@@ -0,0 +1,131 @@
+# src/stacksnap/tools/github_fetch.py
+#
+# Concurrent GitHub fetching for StackSnap.
+# All requests of one analysis share a pooled httpx.AsyncClient (keep-alive)
+# and run concurrently up to a bound, so gathering ~80 candidate files costs a
+# few round-trips instead of one round-trip per file.
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+# Overridable so benchmarks (and GitHub Enterprise) can point elsewhere
+RAW_BASE = os.getenv("STACKSNAP_RAW_BASE", "https://raw.githubusercontent.com")
+API_BASE = os.getenv("STACKSNAP_API_BASE", "https://api.github.com")
+
+MAX_CONCURRENCY = 16
+TIMEOUT = 10.0
+
+
+def parse_repo_url(repo_url: str) -> Tuple[str, str]:
+    """(owner, repo) from a GitHub URL like https://github.com/owner/repo."""
+    parts = repo_url.rstrip("/").split("/")
+    if len(parts) < 2 or not parts[-2] or not parts[-1]:
+        raise ValueError(f"Invalid GitHub URL: {repo_url}")
+    return parts[-2], parts[-1].removesuffix(".git")
+
+
+def make_client(max_connections: int = MAX_CONCURRENCY, timeout: float = TIMEOUT) -> httpx.AsyncClient:
+    """Pooled client; reuse one for every request of an analysis (or many analyses)."""
+    headers = {}
+    token = os.getenv("GITHUB_TOKEN")
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return httpx.AsyncClient(
+        timeout=timeout,
+        follow_redirects=True,
+        headers=headers,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+
+
+async def resolve_head(client: httpx.AsyncClient, owner: str, repo: str,
+                       etag: Optional[str] = None) -> Tuple[Optional[str], Optional[str], bool]:
+    """
+    Commit SHA that HEAD points to, as (sha, etag, not_modified).
+
+    With `etag` from an earlier call the request is conditional: if HEAD has
+    not moved GitHub answers 304 (free of rate limit) and this returns
+    (None, etag, True), meaning "keep the SHA you have". (None, None, False)
+    on error.
+    """
+    url = f"{API_BASE}/repos/{owner}/{repo}/commits/HEAD"
+    headers = {"Accept": "application/vnd.github.sha"}
+    if etag:
+        headers["If-None-Match"] = etag
+    try:
+        r = await client.get(url, headers=headers)
+        if r.status_code == 304:
+            return None, etag, True
+        if r.status_code == 200:
+            return r.text.strip(), r.headers.get("etag"), False
+        print(f"[Warning] Could not resolve HEAD: HTTP {r.status_code}")
+    except httpx.HTTPError as e:
+        print(f"[Warning] Error resolving HEAD: {e}")
+    return None, None, False
+
+
+async def fetch_file_async(client: httpx.AsyncClient, owner: str, repo: str, path: str,
+                           ref: str = "HEAD") -> str:
+    """Raw file text at `ref`, or "" if it does not exist or the request fails."""
+    url = f"{RAW_BASE}/{owner}/{repo}/{ref}/{path}"
+    try:
+        r = await client.get(url)
+        if r.status_code == 200:
+            return r.text
+    except httpx.HTTPError as e:
+        print(f"[Warning] Failed to fetch {path}: {e}")
+    return ""
+
+
+async def fetch_files(client: httpx.AsyncClient, owner: str, repo: str, paths: Iterable[str],
+                      max_concurrency: int = MAX_CONCURRENCY, ref: str = "HEAD") -> Dict[str, str]:
+    """
+    Fetch many raw files concurrently (at most max_concurrency in flight).
+
+    Returns:
+        {path: text} for the files that exist, in the order of `paths`.
+    """
+    paths = list(dict.fromkeys(paths))
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def one(path: str) -> str:
+        async with sem:
+            return await fetch_file_async(client, owner, repo, path, ref)
+
+    texts = await asyncio.gather(*(one(p) for p in paths))
+    return {p: t for p, t in zip(paths, texts) if t}
+
+
+async def fetch_tree(client: httpx.AsyncClient, owner: str, repo: str,
+                     ref: str = "HEAD") -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Entries of the recursive git tree at `ref`, and whether GitHub truncated
+    the listing (very large repos). ([], False) on error.
+    """
+    url = f"{API_BASE}/repos/{owner}/{repo}/git/trees/{ref}?recursive=1"
+    try:
+        r = await client.get(url)
+        if r.status_code == 200:
+            data = r.json()
+            return data.get("tree", []), bool(data.get("truncated"))
+        print(f"[Warning] Could not fetch repo tree: HTTP {r.status_code}")
+    except httpx.HTTPError as e:
+        print(f"[Warning] Error fetching repo tree: {e}")
+    return [], False
+
+
+def run_sync(coro: Coroutine) -> Any:
+    """
+    Run a coroutine from synchronous code, even if this thread already runs an
+    event loop (e.g. a sync graph invoked inside a FastAPI handler).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
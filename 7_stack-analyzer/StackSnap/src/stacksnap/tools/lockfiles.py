@@ -0,0 +1,651 @@
+# src/stacksnap/tools/lockfiles.py
+#
+# Lockfile + manifest parsers that build a resolved dependency graph.
+#
+# Line-oriented lockfiles (yarn classic/berry, poetry.lock, uv.lock,
+# Cargo.lock, go.sum) are scanned line by line and folded straight into the
+# graph, without building a TOML/YAML document first. package-lock.json is
+# decoded once (streamed with ijson when it is installed) and only the
+# (name, version, dependency names) of each entry are kept.
+#
+# Manifests (package.json, pyproject.toml, requirements.txt, Cargo.toml,
+# go.mod) say which packages are direct dependencies; a lockfile in the same
+# folder supplies the resolved versions and the edges between packages.
+
+import io
+import itertools
+import json
+import re
+import tomllib
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import ijson  # pip install ijson (optional: streams package-lock.json)
+except ImportError:
+    ijson = None
+
+# (name, version spec, dev) as declared in a manifest
+Requirement = Tuple[str, str, bool]
+# (path, subgraph of a lockfile or None, (ecosystem, name, spec, dev) requirements of a manifest)
+FileDeps = Tuple[str, Optional["DependencyGraph"], List[Tuple[str, str, str, bool]]]
+
+_PEP508_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+_PEP440_PIN = re.compile(r"^===?\s*([^\s,;*]+)$")
+_PYPI_SEP = re.compile(r"[-_.]+")
+_TOML_PAIR = re.compile(r'^\s*("[^"]+"|[A-Za-z0-9_.\-]+)\s*=\s*(.*)$')
+_TOML_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_PY_STRING = re.compile(r"""(["'])((?:(?!\1)[^\\]|\\.)*)\1""")
+_UV_DEP = re.compile(r'\{\s*name\s*=\s*"([^"]+)"(?:[^}]*?\bversion\s*=\s*"([^"]+)")?')
+_GO_REQUIRE = re.compile(r"^([^\s]+)\s+(v[^\s]+)(\s*//\s*indirect)?")
+
+
+def _folder(path: str) -> str:
+    return path.rpartition("/")[0]
+
+
+def _basename(path: str) -> str:
+    return path.rpartition("/")[2]
+
+
+def normalize_name(ecosystem: str, name: str) -> str:
+    """PyPI names compare case-insensitively with -, _ and . equivalent (PEP 503)."""
+    return _PYPI_SEP.sub("-", name).lower() if ecosystem == "pypi" else name
+
+
+# -------------------------
+# Graph
+# -------------------------
+@dataclass
+class Package:
+    name: str
+    version: str
+    ecosystem: str
+    source: str = ""  # lockfile or manifest the package was read from
+    direct: bool = False
+    dev: bool = False
+    resolved: bool = True  # False: version is a manifest spec, no lockfile pinned it
+
+    @property
+    def id(self) -> str:
+        return f"{self.ecosystem}:{self.name}@{self.version}"
+
+
+class DependencyGraph:
+    """Packages (one node per ecosystem/name/version) and 'depends on' edges."""
+
+    def __init__(self):
+        self.packages: Dict[str, Package] = {}
+        self.edges: Dict[str, Set[str]] = {}
+        self._by_name: Dict[Tuple[str, str], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def add(self, ecosystem: str, name: str, version: str, source: str = "",
+            direct: bool = False, dev: bool = False, resolved: bool = True) -> str:
+        """Add (or merge into) a package node; returns its id."""
+        name = normalize_name(ecosystem, name)
+        pkg = Package(name, version, ecosystem, source, direct, dev, resolved)
+        existing = self.packages.get(pkg.id)
+        if existing is None:
+            self.packages[pkg.id] = pkg
+            self._by_name.setdefault((ecosystem, name.lower()), []).append(pkg.id)
+            return pkg.id
+        existing.direct |= direct
+        existing.dev = existing.dev and dev  # dev only if every path to it is
+        return existing.id
+
+    def link(self, parent: str, child: str) -> None:
+        if parent != child:
+            self.edges.setdefault(parent, set()).add(child)
+
+    def ids(self, name: str, ecosystem: Optional[str] = None) -> List[str]:
+        ecosystems = [ecosystem] if ecosystem else sorted({e for e, _ in self._by_name})
+        return [pid for e in ecosystems for pid in self._by_name.get((e, normalize_name(e, name).lower()), [])]
+
+    def find(self, name: str, ecosystem: Optional[str] = None) -> List[Package]:
+        return [self.packages[pid] for pid in self.ids(name, ecosystem)]
+
+    def mark_direct(self, ecosystem: str, name: str, spec: str, source: str, dev: bool = False) -> None:
+        """
+        Mark a manifest's requirement as direct: the versions a lockfile in the
+        same folder resolved it to, or an unresolved node carrying the spec.
+        """
+        folder = _folder(source)
+        matches = [pid for pid in self.ids(name, ecosystem)
+                   if self.packages[pid].resolved and _folder(self.packages[pid].source) == folder]
+        # a lockfile that knows its roots already picked the version
+        matches = [pid for pid in matches if self.packages[pid].direct] or matches
+        if not matches:
+            pin = _PEP440_PIN.match(spec or "") if ecosystem == "pypi" else None
+            matches = [self.add(ecosystem, name, pin.group(1) if pin else spec or "*", source,
+                                dev=dev, resolved=pin is not None)]
+        for pid in matches:
+            pkg = self.packages[pid]
+            pkg.dev = dev if not pkg.direct else pkg.dev and dev
+            pkg.direct = True
+
+    def merge(self, other: "DependencyGraph", supplementary: bool = False) -> None:
+        """
+        Add another graph's packages and edges (copies; `other` is not modified).
+        supplementary: skip packages this graph already has from the same folder.
+        """
+        remap: Dict[str, str] = {}
+        for pid, p in other.packages.items():
+            if supplementary and any(_folder(q.source) == _folder(p.source) for q in self.find(p.name, p.ecosystem)):
+                continue
+            remap[pid] = self.add(p.ecosystem, p.name, p.version, p.source, p.direct, p.dev, p.resolved)
+        for parent, children in other.edges.items():
+            if parent in remap:
+                for child in children:
+                    if child in remap:
+                        self.link(remap[parent], remap[child])
+
+    def direct(self) -> List[Package]:
+        return [p for p in self.packages.values() if p.direct]
+
+    def dependencies(self, pid: str, transitive: bool = False) -> List[Package]:
+        if not transitive:
+            return [self.packages[c] for c in sorted(self.edges.get(pid, ()))]
+        seen, queue = set(), deque(self.edges.get(pid, ()))
+        while queue:
+            child = queue.popleft()
+            if child not in seen:
+                seen.add(child)
+                queue.extend(self.edges.get(child, ()))
+        return [self.packages[c] for c in sorted(seen)]
+
+    def dependents(self, name: str, ecosystem: Optional[str] = None) -> List[Package]:
+        """Packages that depend directly on any version of `name`."""
+        targets = set(self.ids(name, ecosystem))
+        return [self.packages[p] for p, children in self.edges.items() if targets & children]
+
+    def path_to(self, name: str, ecosystem: Optional[str] = None) -> Optional[List[str]]:
+        """Shortest chain of ids from a direct dependency to `name` ("why is it installed?")."""
+        targets = set(self.ids(name, ecosystem))
+        parents: Dict[str, Optional[str]] = {p.id: None for p in self.direct()}
+        queue = deque(parents)
+        while queue:
+            pid = queue.popleft()
+            if pid in targets:
+                path = []
+                while pid is not None:
+                    path.append(pid)
+                    pid = parents[pid]
+                return path[::-1]
+            for child in sorted(self.edges.get(pid, ())):
+                if child not in parents:
+                    parents[child] = pid
+                    queue.append(child)
+        return None
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Per ecosystem: packages, direct, dev and unresolved counts."""
+        out: Dict[str, Dict[str, int]] = {}
+        for p in self.packages.values():
+            counts = out.setdefault(p.ecosystem, {"packages": 0, "direct": 0, "dev": 0, "unresolved": 0})
+            counts["packages"] += 1
+            counts["direct"] += p.direct
+            counts["dev"] += p.dev
+            counts["unresolved"] += not p.resolved
+        return out
+
+    def to_dict(self) -> Dict:
+        return {
+            "summary": self.summary(),
+            "packages": [dict(asdict(p), id=p.id) for p in self.packages.values()],
+            "edges": [[parent, child] for parent, children in self.edges.items() for child in sorted(children)],
+        }
+
+
+def _lines(text: str) -> Iterator[str]:
+    """Lines without building a list (lockfiles can be megabytes)."""
+    for line in io.StringIO(text):
+        yield line.rstrip("\r\n")
+
+
+# -------------------------
+# Manifests -> requirements
+# -------------------------
+def _pep508(requirement: str) -> Optional[Tuple[str, str]]:
+    """(name, spec) of a PEP 508 requirement string."""
+    match = _PEP508_NAME.match(requirement)
+    if not match:
+        return None
+    spec = requirement[match.end():].split(";")[0].strip()
+    if spec.startswith("["):  # extras
+        spec = spec.partition("]")[2].strip()
+    return match.group(1), spec
+
+
+def requirements_txt(content: str) -> List[Requirement]:
+    reqs = []
+    for line in _lines(content):
+        line = line.split(" #")[0].strip()
+        if not line or line.startswith(("#", "-", "git+", "http:", "https:")):
+            continue  # comments, options (-r, -e, --hash ...) and URL installs
+        parsed = _pep508(line)
+        if parsed:
+            reqs.append((parsed[0], parsed[1], False))
+    return reqs
+
+
+def setup_py(content: str) -> List[Requirement]:
+    """Best effort: string literals inside install_requires=[...]."""
+    match = re.search(r"install_requires\s*=\s*\[(.*?)\]", content, re.S)
+    if not match:
+        return []
+    return [(name, spec, False) for name, spec in
+            filter(None, (_pep508(s) for _, s in _PY_STRING.findall(match.group(1))))]
+
+
+def pyproject_toml(content: str) -> List[Requirement]:
+    """PEP 621 ([project], optional deps, PEP 735 dependency-groups) and Poetry dialects."""
+    data = tomllib.loads(content)
+    reqs: List[Requirement] = []
+
+    def pep508_list(items, dev):
+        for item in items or []:
+            parsed = _pep508(item) if isinstance(item, str) else None
+            if parsed:
+                reqs.append((parsed[0], parsed[1], dev))
+
+    project = data.get("project", {})
+    pep508_list(project.get("dependencies"), False)
+    for extra in project.get("optional-dependencies", {}).values():
+        pep508_list(extra, False)
+    for group in data.get("dependency-groups", {}).values():
+        pep508_list(group, True)
+
+    poetry = data.get("tool", {}).get("poetry", {})
+    tables = [(poetry.get("dependencies", {}), False), (poetry.get("dev-dependencies", {}), True)]
+    tables += [(g.get("dependencies", {}), name != "main") for name, g in poetry.get("group", {}).items()]
+    for table, dev in tables:
+        for name, spec in table.items():
+            if name.lower() != "python":
+                reqs.append((name, spec if isinstance(spec, str) else spec.get("version", "")
+                             if isinstance(spec, dict) else "", dev))
+    return reqs
+
+
+def package_json(content: str) -> List[Requirement]:
+    data = json.loads(content)
+    reqs = [(name, spec, False) for name, spec in data.get("dependencies", {}).items()]
+    reqs += [(name, spec, True) for name, spec in data.get("devDependencies", {}).items()]
+    return reqs
+
+
+def cargo_toml(content: str) -> List[Requirement]:
+    data = tomllib.loads(content)
+    reqs = []
+    for table, dev in (("dependencies", False), ("build-dependencies", False), ("dev-dependencies", True)):
+        for name, spec in data.get(table, {}).items():
+            reqs.append((name, spec if isinstance(spec, str) else spec.get("version", ""), dev))
+    for name, spec in data.get("workspace", {}).get("dependencies", {}).items():
+        reqs.append((name, spec if isinstance(spec, str) else spec.get("version", ""), False))
+    return reqs
+
+
+def go_mod(content: str) -> List[Tuple[str, str, bool]]:
+    """(module, version, indirect) from single-line and block `require`s."""
+    reqs, in_block = [], False
+    for line in _lines(content):
+        line = line.strip()
+        if in_block:
+            if line.startswith(")"):
+                in_block = False
+                continue
+            body = line
+        elif line.startswith("require ("):
+            in_block = True
+            continue
+        elif line.startswith("require "):
+            body = line[len("require "):].strip()
+        else:
+            continue
+        match = _GO_REQUIRE.match(body)
+        if match:
+            reqs.append((match.group(1), match.group(2), bool(match.group(3))))
+    return reqs
+
+
+# -------------------------
+# Lockfiles -> graph
+# -------------------------
+def _npm_name(location: str) -> str:
+    return location.rpartition("node_modules/")[2]
+
+
+def _npm_resolve(locations: Dict[str, str], location: str, name: str) -> Optional[str]:
+    """Node's lookup: <location>/node_modules/<name>, then each enclosing node_modules."""
+    while True:
+        candidate = f"{location}/node_modules/{name}" if location else f"node_modules/{name}"
+        if candidate in locations:
+            return locations[candidate]
+        if not location:
+            return None
+        cut = location.rfind("/node_modules/")
+        location = location[:cut] if cut != -1 else ""
+
+
+def parse_package_lock(graph: DependencyGraph, text: str, source: str) -> None:
+    """package-lock.json / npm-shrinkwrap.json, lockfileVersion 1, 2 and 3."""
+    if ijson is not None:
+        entries = ijson.kvitems(io.BytesIO(text.encode("utf-8")), "packages")
+        first = next(entries, None)
+        if first is None:  # v1 has no "packages" map
+            _parse_package_lock_v1(graph, json.loads(text).get("dependencies", {}), source)
+            return
+        entries = itertools.chain([first], entries)
+    else:
+        data = json.loads(text)
+        if "packages" not in data:
+            _parse_package_lock_v1(graph, data.get("dependencies", {}), source)
+            return
+        entries = data["packages"].items()
+
+    locations: Dict[str, str] = {}   # node_modules location -> package id
+    wants: List[Tuple[Optional[str], str, List[str]]] = []  # (package id or None for a workspace, location, deps)
+    for location, entry in entries:
+        deps = [*entry.get("dependencies", {}), *entry.get("optionalDependencies", {})]
+        if "node_modules/" not in location:
+            # the root project ("") and workspace folders: their deps are direct
+            deps += list(entry.get("devDependencies", {}))
+            wants.append((None, location, deps))
+            continue
+        if entry.get("link"):
+            continue
+        pid = graph.add("npm", entry.get("name") or _npm_name(location), str(entry.get("version", "")),
+                        source, dev=bool(entry.get("dev") or entry.get("devOptional")))
+        locations[location] = pid
+        wants.append((pid, location, deps))
+
+    for pid, location, deps in wants:
+        for name in deps:
+            child = _npm_resolve(locations, location, name)
+            if child is None:
+                continue
+            if pid is None:
+                graph.packages[child].direct = True
+            else:
+                graph.link(pid, child)
+
+
+def _parse_package_lock_v1(graph: DependencyGraph, deps: dict, source: str,
+                           scopes: Tuple[Dict[str, str], ...] = ()) -> Dict[str, str]:
+    """v1 nests packages under "dependencies"; requires resolve innermost scope first."""
+    scope = {name: graph.add("npm", name, str(entry.get("version", "")), source, dev=bool(entry.get("dev")))
+             for name, entry in deps.items()}
+    chain = (scope,) + scopes
+    for name, entry in deps.items():
+        nested = _parse_package_lock_v1(graph, entry["dependencies"], source, chain) \
+            if entry.get("dependencies") else {}
+        for wanted in entry.get("requires", {}):
+            child = nested.get(wanted) or next((s[wanted] for s in chain if wanted in s), None)
+            if child:
+                graph.link(scope[name], child)
+    return scope
+
+
+def _yarn_descriptor_name(descriptor: str) -> str:
+    return descriptor[:descriptor.index("@", 1)] if "@" in descriptor[1:] else descriptor
+
+
+def _yarn_pair(line: str) -> Tuple[str, str]:
+    """`key "value"` (classic) or `key: value` (berry), keys possibly quoted."""
+    if line.startswith('"'):
+        end = line.index('"', 1)
+        key, rest = line[1:end], line[end + 1:]
+    else:
+        key, _, rest = line.partition(" ")
+        if key.endswith(":"):
+            key = key[:-1]
+    return key, rest.strip().lstrip(":").strip().strip('"')
+
+
+def parse_yarn_lock(graph: DependencyGraph, text: str, source: str) -> None:
+    """yarn.lock, classic (v1) and berry (v2+)."""
+    entries: List[dict] = []
+    entry: Optional[dict] = None
+    in_deps = False
+    for line in _lines(text):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        indent = len(line) - len(line.lstrip(" "))
+        if indent == 0:
+            in_deps = False
+            entry = None
+            if stripped.endswith(":") and not stripped.startswith("__metadata"):
+                descriptors = [d.strip().strip('"') for d in stripped[:-1].split(",")]
+                entry = {"descriptors": descriptors, "version": "", "deps": []}
+                entries.append(entry)
+        elif entry is None:
+            continue
+        elif indent == 2:
+            key, value = _yarn_pair(stripped)
+            in_deps = key in ("dependencies", "optionalDependencies") and not value
+            if key == "version":
+                entry["version"] = value
+        elif in_deps:
+            entry["deps"].append(_yarn_pair(stripped))
+
+    by_descriptor: Dict[str, str] = {}
+    workspaces: List[dict] = []
+    for entry in entries:
+        if any("@workspace:" in d for d in entry["descriptors"]):
+            workspaces.append(entry)
+            continue
+        pid = graph.add("npm", _yarn_descriptor_name(entry["descriptors"][0]), entry["version"], source)
+        entry["id"] = pid
+        for descriptor in entry["descriptors"]:
+            by_descriptor[descriptor] = pid
+
+    def resolve(name: str, spec: str) -> Optional[str]:
+        return by_descriptor.get(f"{name}@{spec}") or by_descriptor.get(f"{name}@npm:{spec}")
+
+    for entry in entries:
+        for name, spec in entry["deps"]:
+            child = resolve(name, spec)
+            if child is None:
+                continue
+            if "id" in entry:
+                graph.link(entry["id"], child)
+            else:
+                graph.packages[child].direct = True  # a berry workspace's own dependency
+
+
+def _toml_value(raw: str) -> str:
+    match = _TOML_STRING.match(raw.strip())
+    return match.group(1) if match else raw.strip()
+
+
+def _toml_packages(text: str) -> Iterator[dict]:
+    """
+    [[package]] blocks of poetry.lock / uv.lock / Cargo.lock as flat dicts:
+    top-level string keys, plus "deps" [(section, line)] for dependency lines.
+    """
+    package: Optional[dict] = None
+    section = ""
+    array_key: Optional[str] = None
+    for line in _lines(text):
+        stripped = line.strip()
+        if array_key is not None:
+            if stripped.startswith("]"):
+                array_key = None
+            else:
+                package["deps"].append((array_key, stripped))
+            continue
+        if stripped.startswith("["):
+            if stripped == "[[package]]":
+                if package is not None:
+                    yield package
+                package, section = {"deps": []}, "package"
+            else:
+                section = stripped.strip("[]")
+            continue
+        if package is None:
+            continue
+        match = _TOML_PAIR.match(line)
+        if not match:
+            continue
+        key, raw = match.group(1).strip('"'), match.group(2).strip()
+        if section == "package":
+            if key == "dependencies" and raw.startswith("["):
+                if raw.endswith("]"):
+                    package["deps"].append((key, raw))
+                else:
+                    array_key = key
+            elif raw.startswith("[") and not raw.endswith("]"):
+                array_key = "_skip"  # files = [, wheels = [ ...
+            else:
+                package[key] = raw if raw.startswith("{") else _toml_value(raw)
+        elif section in ("package.dependencies", "package.dev-dependencies", "package.optional-dependencies"):
+            package["deps"].append((section, f"{key} = {raw}"))
+            if raw.startswith("[") and not raw.endswith("]"):
+                # uv lists entries on the following lines; poetry's alternative
+                # constraints for one package only need the key above
+                array_key = section if section != "package.dependencies" else "_skip"
+    if package is not None:
+        yield package
+
+
+def parse_poetry_lock(graph: DependencyGraph, text: str, source: str) -> None:
+    links: List[Tuple[str, str]] = []
+    for package in _toml_packages(text):
+        dev = package.get("category") == "dev" or ("groups" in package and '"main"' not in package["groups"])
+        pid = graph.add("pypi", package.get("name", ""), package.get("version", ""), source, dev=dev)
+        for section, line in package["deps"]:
+            if section == "package.dependencies":
+                links.append((pid, line.split("=", 1)[0].strip().strip('"')))
+    _link_by_name(graph, "pypi", links, source)
+
+
+def parse_uv_lock(graph: DependencyGraph, text: str, source: str) -> None:
+    links: List[Tuple[Optional[str], str, Optional[str], bool]] = []  # (parent or None for the project, name, version, dev)
+    for package in _toml_packages(text):
+        src = package.get("source", "")
+        is_project = "editable" in src or "virtual" in src
+        pid = None if is_project else graph.add("pypi", package.get("name", ""), package.get("version", ""), source)
+        for section, line in package["deps"]:
+            if section == "_skip":
+                continue
+            dev = section == "package.dev-dependencies"
+            for name, version in _UV_DEP.findall(line):
+                links.append((pid, name, version or None, dev))
+    for parent, name, version, dev in links:
+        candidates = [pid for pid in graph.ids(name, "pypi") if graph.packages[pid].source == source
+                      and (version is None or graph.packages[pid].version == version)]
+        for child in candidates:
+            if parent is None:
+                graph.packages[child].direct = True
+                graph.packages[child].dev = dev
+            else:
+                graph.link(parent, child)
+
+
+def parse_cargo_lock(graph: DependencyGraph, text: str, source: str) -> None:
+    links: List[Tuple[Optional[str], str, Optional[str]]] = []
+    for package in _toml_packages(text):
+        # workspace members have no source; their dependencies are the direct ones
+        pid = graph.add("cargo", package["name"], package.get("version", ""), source) if "source" in package else None
+        for section, line in package["deps"]:
+            if section != "dependencies":
+                continue
+            for dep in _TOML_STRING.findall(line):
+                name, _, version = dep.partition(" ")
+                links.append((pid, name, version.split(" ")[0] or None))
+    for parent, name, version in links:
+        for child in graph.ids(name, "cargo"):
+            if graph.packages[child].source == source and (version is None or graph.packages[child].version == version):
+                if parent is None:
+                    graph.packages[child].direct = True
+                else:
+                    graph.link(parent, child)
+
+
+def _link_by_name(graph: DependencyGraph, ecosystem: str, links: List[Tuple[str, str]], source: str) -> None:
+    for parent, name in links:
+        for child in graph.ids(name, ecosystem):
+            if graph.packages[child].source == source:
+                graph.link(parent, child)
+
+
+def _go_version_key(version: str) -> Tuple:
+    core = version.lstrip("v").split("-")[0].split("+")[0]
+    return tuple(int(p) if p.isdigit() else 0 for p in core.split("."))
+
+
+def parse_go_mod(graph: DependencyGraph, text: str, source: str) -> None:
+    for module, version, indirect in go_mod(text):
+        graph.add("go", module, version, source, direct=not indirect)
+
+
+def parse_go_sum(graph: DependencyGraph, text: str, source: str) -> None:
+    """
+    Every module at the newest version go.sum has a hash for. Supplementary:
+    merged only for modules go.mod did not list.
+    """
+    newest: Dict[str, str] = {}
+    for line in _lines(text):
+        parts = line.split()
+        if len(parts) != 3 or parts[1].endswith("/go.mod"):
+            continue
+        module, version = parts[0], parts[1]
+        if module not in newest or _go_version_key(version) > _go_version_key(newest[module]):
+            newest[module] = version
+    for module, version in newest.items():
+        graph.add("go", module, version, source)
+
+
+LOCKFILE_PARSERS: Dict[str, Callable[[DependencyGraph, str, str], None]] = {
+    "package-lock.json": parse_package_lock,
+    "npm-shrinkwrap.json": parse_package_lock,
+    "yarn.lock": parse_yarn_lock,
+    "poetry.lock": parse_poetry_lock,
+    "uv.lock": parse_uv_lock,
+    "Cargo.lock": parse_cargo_lock,
+    "go.mod": parse_go_mod,
+    "go.sum": parse_go_sum,
+}
+
+# Lockfiles that only fill in what the other files of their folder left out
+SUPPLEMENTARY = {"go.sum"}
+
+MANIFEST_REQUIREMENTS: Dict[str, Tuple[str, Callable[[str], List[Requirement]]]] = {
+    "package.json": ("npm", package_json),
+    "pyproject.toml": ("pypi", pyproject_toml),
+    "requirements.txt": ("pypi", requirements_txt),
+    "setup.py": ("pypi", setup_py),
+    "Cargo.toml": ("cargo", cargo_toml),
+}
+
+
+def parse_dependency_file(path: str, text: str) -> FileDeps:
+    """Dependency information of one file: a lockfile subgraph and/or manifest requirements."""
+    name = _basename(path)
+    graph, requirements = None, []
+    if name in LOCKFILE_PARSERS:
+        graph = DependencyGraph()
+        LOCKFILE_PARSERS[name](graph, text, path)
+    elif name in MANIFEST_REQUIREMENTS:
+        ecosystem, parse = MANIFEST_REQUIREMENTS[name]
+        requirements = [(ecosystem, req_name, spec, dev) for req_name, spec, dev in parse(text)]
+    return path, graph, requirements
+
+
+def assemble_graph(parts: Iterable[FileDeps]) -> DependencyGraph:
+    """Merge per-file results: lockfiles, then supplementary lockfiles, then manifest requirements."""
+    parts = list(parts)
+    graph = DependencyGraph()
+    for supplementary in (False, True):
+        for path, subgraph, _ in parts:
+            if subgraph is not None and (_basename(path) in SUPPLEMENTARY) == supplementary:
+                graph.merge(subgraph, supplementary)
+    for path, _, requirements in parts:
+        for ecosystem, name, spec, dev in requirements:
+            graph.mark_direct(ecosystem, name, spec, path, dev)
+    return graph
+
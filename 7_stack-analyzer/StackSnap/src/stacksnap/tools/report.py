@@ -0,0 +1,82 @@
+# src/stacksnap/tools/report.py
+#
+# Text built from stack_info without the LLM:
+#   compact_stack  short pre-classified stack for the LLM prompt
+#   fast_report    the whole report, for "fast" mode (no LLM call)
+
+import json
+from typing import Any, Dict, List
+
+MAX_PER_CATEGORY = 10  # names listed per category before "+N more"
+MAX_OTHER = 15  # unclassified packages listed
+
+
+def _names(items: List[str], limit: int) -> str:
+    shown = ", ".join(items[:limit])
+    return f"{shown} (+{len(items) - limit} more)" if len(items) > limit else shown
+
+
+def _categories(stack_info: Dict[str, Any]) -> Dict[str, List[str]]:
+    # stack_info cached before the signature database has no "Categories"
+    return stack_info.get("Categories") or ({"Other": stack_info["Libraries"]} if stack_info.get("Libraries") else {})
+
+
+def _dependency_counts(stack_info: Dict[str, Any]) -> str:
+    return ", ".join(f"{eco} {c['packages']} ({c['direct']} direct)"
+                     for eco, c in stack_info.get("Dependencies", {}).items())
+
+
+def compact_stack(stack_info: Dict[str, Any]) -> str:
+    """
+    The stack as compact JSON for the prompt: libraries grouped by category
+    and truncated, instead of every package name.
+    """
+    categories = _categories(stack_info)
+    compact = {
+        "Languages": stack_info.get("Languages", []),
+        "Frameworks": stack_info.get("Frameworks", []),
+        "Libraries": {
+            category: _names(names, MAX_OTHER if category == "Other" else MAX_PER_CATEGORY)
+            for category, names in categories.items()
+        },
+        "DevOps": stack_info.get("DevOps", []),
+        "Others": stack_info.get("Others", []),
+    }
+    counts = _dependency_counts(stack_info)
+    if counts:
+        compact["Packages"] = counts
+    return json.dumps({k: v for k, v in compact.items() if v}, ensure_ascii=False, separators=(",", ":"))
+
+
+def fast_report(stack_info: Dict[str, Any]) -> str:
+    """A report in the prompt's format, written from the classified stack alone."""
+    languages = stack_info.get("Languages", [])
+    frameworks = stack_info.get("Frameworks", [])
+    categories = _categories(stack_info)
+    devops = stack_info.get("DevOps", [])
+
+    summary = f"This project uses {_names(languages, 4) or 'no detected language'}"
+    if frameworks:
+        summary += f", built with {_names(frameworks, 4)}"
+    notable = [f"{names[0]} ({category})" for category, names in categories.items() if category != "Other" and names]
+    if notable:
+        summary += f". Notable libraries: {_names(notable, 4)}"
+    if devops:
+        summary += f". Build and deployment: {_names(devops, 3)}"
+    summary += "."
+
+    lines = [summary, "", "Point-wise stack info:"]
+    lines.append(f"- Languages: {_names(languages, MAX_PER_CATEGORY) or 'None'}")
+    lines.append(f"- Frameworks: {_names(frameworks, MAX_PER_CATEGORY) or 'None'}")
+    if categories:
+        lines.append("- Libraries:")
+        for category, names in categories.items():
+            lines.append(f"  - {category}: {_names(names, MAX_OTHER if category == 'Other' else MAX_PER_CATEGORY)}")
+    else:
+        lines.append("- Libraries: None")
+    lines.append(f"- DevOps: {_names(devops, MAX_PER_CATEGORY) or 'None'}")
+    lines.append(f"- Others: {_names(stack_info.get('Others', []), MAX_PER_CATEGORY) or 'None'}")
+    counts = _dependency_counts(stack_info)
+    if counts:
+        lines.append(f"- Packages: {counts}")
+    return "\n".join(lines)
@@ -0,0 +1,106 @@
+# src/stacksnap/tools/signatures.py
+#
+# Signature database: package -> (display name, category) per ecosystem.
+# Classifies dependencies deterministically, so frameworks are detected for
+# every ecosystem and the LLM gets a short pre-classified stack instead of
+# every library name.
+#
+# The data lives in signatures.json:
+#   "packages": {ecosystem: {package: [display name, category]}}
+# A package ending in "*" matches by prefix ("@angular/*", "org.springframework:*").
+# Ecosystems: pypi, npm, cargo, go, maven (group:artifact), rubygems.
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from stacksnap.tools.lockfiles import normalize_name
+
+SIGNATURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signatures.json")
+
+_GO_MAJOR = re.compile(r"/v\d+$")
+
+
+@dataclass(frozen=True)
+class Signature:
+    name: str  # display name, e.g. "Next.js"
+    category: str  # e.g. "Frontend framework"
+    ecosystem: str
+
+
+@dataclass
+class Classification:
+    frameworks: List[str] = field(default_factory=list)
+    categories: Dict[str, List[str]] = field(default_factory=dict)  # category -> display names
+    unclassified: List[str] = field(default_factory=list)  # package names
+
+
+class SignatureDB:
+    def __init__(self, data: dict):
+        self.version = data.get("version", 0)
+        self.framework_categories = set(data.get("framework_categories", []))
+        self._exact: Dict[str, Dict[str, Signature]] = {}
+        self._prefixes: Dict[str, List[Tuple[str, Signature]]] = {}
+        for ecosystem, packages in data.get("packages", {}).items():
+            exact, prefixes = {}, []
+            for package, (name, category) in packages.items():
+                signature = Signature(name, category, ecosystem)
+                if package.endswith("*"):
+                    prefixes.append((package[:-1], signature))
+                else:
+                    exact[package] = signature
+            self._exact[ecosystem] = exact
+            self._prefixes[ecosystem] = sorted(prefixes, key=lambda p: -len(p[0]))  # longest first
+
+    @classmethod
+    def load(cls, path: str = SIGNATURES_PATH) -> "SignatureDB":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _keys(self, ecosystem: str, name: str) -> List[str]:
+        """Lookup keys for a package name, most specific first."""
+        if ecosystem == "pypi":
+            return [normalize_name("pypi", name)]
+        if ecosystem == "maven":
+            return [":".join(name.split(":")[:2])]  # drop the version of gradle coordinates
+        if ecosystem == "go":
+            # submodules and major versions: github.com/labstack/echo/v4 -> github.com/labstack/echo
+            parts = _GO_MAJOR.sub("", name).split("/")
+            return ["/".join(parts[:i]) for i in range(len(parts), 1, -1)]
+        return [name.lower()]
+
+    def lookup(self, ecosystem: str, name: str) -> Optional[Signature]:
+        exact = self._exact.get(ecosystem, {})
+        keys = self._keys(ecosystem, name)
+        for key in keys:
+            if key in exact:
+                return exact[key]
+        for prefix, signature in self._prefixes.get(ecosystem, ()):
+            if keys[0].startswith(prefix):
+                return signature
+        return None
+
+    def classify(self, packages: Iterable[Tuple[str, str]]) -> Classification:
+        """Sort (ecosystem, name) pairs into frameworks, other categories and unknowns."""
+        result = Classification()
+        for ecosystem, name in packages:
+            signature = self.lookup(ecosystem, name)
+            if signature is None:
+                result.unclassified.append(name)
+            elif signature.category in self.framework_categories:
+                result.frameworks.append(signature.name)
+            else:
+                result.categories.setdefault(signature.category, []).append(signature.name)
+        result.frameworks = list(dict.fromkeys(result.frameworks))
+        result.categories = {c: list(dict.fromkeys(names)) for c, names in sorted(result.categories.items())}
+        result.unclassified = list(dict.fromkeys(result.unclassified))
+        return result
+
+
+@lru_cache(maxsize=1)
+def get_signatures() -> SignatureDB:
+    """The bundled signature database (loaded once)."""
+    return SignatureDB.load()
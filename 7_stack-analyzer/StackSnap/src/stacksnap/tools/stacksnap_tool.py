@@ -1,14 +1,15 @@
 # src/stacksnap/tools/stacksnap_tool.py
 
-import requests
-import json
-import re
-import toml  # pip install toml
-import xml.etree.ElementTree as ET
+import asyncio
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Dict, List
 from langchain_core.tools import tool
-from typing import Dict, Tuple, Any
+from typing import Dict, Tuple, Any, Optional
+from contextlib import nullcontext
+import httpx
+from stacksnap.tools.github_fetch import fetch_files, fetch_tree, make_client, parse_repo_url, resolve_head, run_sync
+from stacksnap.tools.analyzers import analyze_files, build_stack, dependency_graph
+from stacksnap.utils.analysis_cache import AnalysisCache, get_cache, manifest_key
 
 
 # -------------------------
@@ -19,17 +20,29 @@ manifest_files = [
     "requirements.txt", "Pipfile", "pyproject.toml", "setup.py", "environment.yml",
     "Cargo.toml", "go.mod", "composer.json", "Gemfile",
     "build.gradle", "pom.xml", ".csproj", "packages.config",
-    "Dockerfile", "Makefile"
+    "Dockerfile", "Makefile",
+    # lockfiles: resolved versions for the dependency graph
+    "poetry.lock", "uv.lock", "Cargo.lock", "go.sum"
 ]
 
-# Common folders to check in monorepos
+# Common folders to check in monorepos (probing fallback when the repo tree is unavailable)
 common_folders = ["", "packages", "examples", "apps"]
 
+readme_names = ["README.md", "readme.md"]
+
+# Vendored / generated folders whose manifests describe someone else's code
+skip_folders = {"node_modules", "vendor", "third_party", ".git", "dist", "build", "target",
+                ".venv", "venv", "site-packages", "__pycache__", ".next", "bower_components"}
+
+# Upper bound on manifests downloaded per repo (monorepos can have hundreds)
+MAX_MANIFESTS = 40
+
 # -------------------------
 # Pydantic context model
 # -------------------------
 class RepoContext(BaseModel):
     url: HttpUrl
+    commit: str = ""  # resolved commit SHA, "" if analyzed at an unresolved HEAD
     readme: str = Field(default="", max_length=5000)
     manifests: Dict[str, str] = Field(default_factory=dict)
     file_extensions: Dict[str, int] = Field(default_factory=dict)
@@ -37,200 +50,211 @@ class RepoContext(BaseModel):
 # -------------------------
 # Helper functions
 # -------------------------
-def fetch_file(owner: str, repo: str, path: str) -> str:
-    """
-    Fetch a raw file from GitHub repo. Returns empty string if not found or error occurs.
-    """
-    url = f"https://raw.githubusercontent.com/{owner}/{repo}/HEAD/{path}"
-    try:
-        r = requests.get(url, timeout=10)
-        if r.status_code == 200:
-            return r.text
-    except requests.RequestException as e:
-        print(f"[Warning] Failed to fetch {path}: {e}")
-    return ""
+def is_manifest(path: str) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    return name in manifest_files or name.endswith(".csproj")
+
+def _manifest_priority(path: str) -> tuple:
+    """Shallow paths first, then the usual monorepo folders, then manifest kind order."""
+    folder, _, name = path.rpartition("/")
+    top = folder.split("/", 1)[0]
+    kind = manifest_files.index(name) if name in manifest_files else manifest_files.index(".csproj")
+    return (
+        path.count("/"),
+        common_folders.index(top) if top in common_folders else len(common_folders),
+        kind,
+        path,
+    )
 
-def gather_context_api(state: dict) -> dict:
+def select_manifests(tree: List[dict], limit: int = MAX_MANIFESTS) -> List[str]:
+    """Manifest paths that exist in the repo tree, best first, at most `limit`."""
+    found = [
+        item["path"] for item in tree
+        if item.get("type") == "blob" and is_manifest(item["path"])
+        and not skip_folders.intersection(item["path"].split("/")[:-1])
+    ]
+    return sorted(found, key=_manifest_priority)[:limit]
+
+def select_readme(tree: List[dict]) -> List[str]:
+    """README paths from the tree: the root one first, then common folders."""
+    names = {n.lower() for n in readme_names}
+    found = [item["path"] for item in tree
+             if item.get("type") == "blob" and item["path"].rsplit("/", 1)[-1].lower() in names]
+    ranked = [p for p in found if "/" not in p] + [
+        p for folder in common_folders[1:] for p in found if p.rpartition("/")[0] == folder
+    ]
+    return ranked[:1]
+
+def probe_paths() -> Tuple[List[str], List[str]]:
+    """Blind (readme, manifest) candidates in the common folders."""
+    readmes = [f"{folder}/{name}" if folder else name
+               for folder in common_folders for name in readme_names]
+    manifests = [f"{folder}/{mf}" if folder else mf
+                 for folder in common_folders for mf in manifest_files]
+    return readmes, manifests
+
+async def gather_context_async(state: dict, client: Optional[httpx.AsyncClient] = None,
+                               ref: str = "HEAD") -> dict:
     """
-    Gather repo context including README, manifests, and file extensions.
-    Updates 'state' with 'context'.
+    Gather repo context including README, manifests, and file extensions at
+    `ref` (a branch, tag or commit SHA).
+    The repo tree is fetched first and only manifests it lists are downloaded
+    (concurrently, over one pooled client; pass `client` to share connections
+    across analyses). Without a tree the common folders are probed instead.
+    Updates 'state' with 'context' and 'manifest_key'.
     """
     repo_url = state.get("url")
     if not repo_url:
         raise ValueError("Missing 'url' in state")
 
-    try:
-        parts = repo_url.rstrip("/").split("/")
-        owner, repo = parts[-2], parts[-1]
-    except Exception as e:
-        raise ValueError(f"Invalid GitHub URL: {repo_url}") from e
-
-    # 1️⃣ Gather README
-    readme = ""
-    for folder in common_folders:
-        for name in ["README.md", "readme.md"]:
-            path = f"{folder}/{name}" if folder else name
-            content = fetch_file(owner, repo, path)
-            if content:
-                readme = content
-                break
-        if readme:
-            break
-
-    # 2️⃣ Gather manifests
-    manifests = {}
-    for folder in common_folders:
-        for mf in manifest_files:
-            path = f"{folder}/{mf}" if folder else mf
-            content = fetch_file(owner, repo, path)
-            if content:
-                manifests[path] = content
-
-    # 3️⃣ Count file extensions using GitHub API (optional)
-    file_extensions = {}
-    try:
-        url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/HEAD?recursive=1"
-        r = requests.get(url, timeout=10)
-        if r.status_code == 200:
-            tree = r.json().get("tree", [])
-            for item in tree:
-                if item.get("type") == "blob":
-                    ext = item["path"].split(".")[-1] if "." in item["path"] else ""
-                    if ext:
-                        file_extensions[ext] = file_extensions.get(ext, 0) + 1
+    owner, repo = parse_repo_url(repo_url)
+
+    async with (nullcontext(client) if client is not None else make_client()) as http:
+        # The tree says which files exist, so only real manifests are downloaded
+        tree, truncated = await fetch_tree(http, owner, repo, ref)
+        if tree:
+            readme_paths, manifest_paths = select_readme(tree), select_manifests(tree)
+            if truncated:
+                # listing is incomplete: also probe the usual spots it may have cut off
+                extra_readmes, extra_manifests = probe_paths()
+                readme_paths += [p for p in extra_readmes if p not in readme_paths]
+                manifest_paths += [p for p in extra_manifests if p not in manifest_paths]
         else:
-            print(f"[Warning] Could not fetch repo tree: HTTP {r.status_code}")
-    except requests.RequestException as e:
-        print(f"[Warning] Error fetching repo tree: {e}")
+            readme_paths, manifest_paths = probe_paths()
+        files = await fetch_files(http, owner, repo, readme_paths + manifest_paths, ref=ref)
+
+    # 1️⃣ README: first hit in folder order
+    readme = next((files[p] for p in readme_paths if p in files), "")
+
+    # 2️⃣ Manifests
+    manifests = {p: files[p] for p in manifest_paths if p in files}
+
+    # 3️⃣ Count file extensions from the repo tree
+    file_extensions = {}
+    for item in tree:
+        if item.get("type") == "blob":
+            ext = item["path"].split(".")[-1] if "." in item["path"] else ""
+            if ext:
+                file_extensions[ext] = file_extensions.get(ext, 0) + 1
 
     # Create validated context object
     context = RepoContext(
         url=repo_url,
+        commit=ref if ref != "HEAD" else "",
         readme=readme,
         manifests=manifests,
         file_extensions=file_extensions
     )
 
     state["context"] = context.dict()
+    state["manifest_key"] = manifest_key(manifests, tree)
     return state
 
+def gather_context_api(state: dict) -> dict:
+    """
+    Synchronous wrapper around gather_context_async.
+    Updates 'state' with 'context'.
+    """
+    return run_sync(gather_context_async(state))
+
 # -------------------------
-# Analyze manifests
+# Cached analysis
 # -------------------------
-def analyze_manifests(manifests: Dict[str,str]) -> Dict[str, List[str]]:
+async def resolve_commit(http: httpx.AsyncClient, owner: str, repo: str,
+                         cache: AnalysisCache, known: Optional[dict]) -> Optional[str]:
+    """
+    HEAD's commit SHA, revalidating the `known` cached ref with a conditional
+    (ETag) request. None if unknown.
     """
-    Analyze manifests to infer tech stack (languages, frameworks, libraries, DevOps, others)
+    key = f"{owner}/{repo}"
+    sha, etag, not_modified = await resolve_head(http, owner, repo, known["etag"] if known else None)
+    if not_modified:
+        cache.touch_ref(key)
+        return known["sha"]
+    if sha:
+        cache.put_ref(key, sha, etag)
+    return sha
+
+async def analyze_repo_cached_async(repo_url: str, cache: Optional[AnalysisCache] = None,
+                                    client: Optional[httpx.AsyncClient] = None,
+                                    refresh: bool = False, with_graph: bool = False) -> Dict[str, Any]:
     """
-    stack = {
-        "Languages": [],
-        "Frameworks": [],
-        "Libraries": [],
-        "DevOps": [],
-        "Others": []
-    }
-
-    for path, content in manifests.items():
-        path_lower = path.lower()
-
-        try:
-            # Python
-            if path_lower.endswith(("requirements.txt", "pipfile", "pyproject.toml", "setup.py")):
-                stack["Languages"].append("Python")
-                if path_lower.endswith("requirements.txt") or path_lower.endswith("setup.py"):
-                    for line in content.splitlines():
-                        line = line.strip()
-                        if line and not line.startswith("#"):
-                            pkg = re.split(r"[=<>!]", line)[0].strip()
-                            if pkg:
-                                stack["Libraries"].append(pkg)
-                elif path_lower.endswith("pyproject.toml"):
-                    try:
-                        pyproject = toml.loads(content)
-                        deps = pyproject.get("tool", {}).get("poetry", {}).get("dependencies", {})
-                        for dep in deps:
-                            if dep != "python":
-                                stack["Libraries"].append(dep)
-                    except Exception as e:
-                        print(f"[Warning] Failed to parse {path}: {e}")
-
-            # Node.js
-            elif path_lower.endswith(("package.json", "yarn.lock", "package-lock.json")):
-                stack["Languages"].append("JavaScript/Node.js")
-                try:
-                    package_json = json.loads(content)
-                    deps = package_json.get("dependencies", {})
-                    dev_deps = package_json.get("devDependencies", {})
-                    for dep in list(deps.keys()) + list(dev_deps.keys()):
-                        stack["Libraries"].append(dep)
-                    for fw in ["next", "express", "react", "vue", "angular"]:
-                        if fw in deps or fw in dev_deps:
-                            stack["Frameworks"].append(fw)
-                except Exception as e:
-                    print(f"[Warning] Failed to parse {path}: {e}")
-
-            # Rust
-            elif path_lower.endswith("cargo.toml"):
-                stack["Languages"].append("Rust")
-                try:
-                    cargo = toml.loads(content)
-                    deps = cargo.get("dependencies", {})
-                    for dep in deps:
-                        stack["Libraries"].append(dep)
-                except Exception as e:
-                    print(f"[Warning] Failed to parse {path}: {e}")
-
-            # Go
-            elif path_lower.endswith("go.mod"):
-                stack["Languages"].append("Go")
-                lines = content.splitlines()
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith("require"):
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            stack["Libraries"].append(parts[1])
-
-            # Ruby
-            elif path_lower.endswith("gemfile"):
-                stack["Languages"].append("Ruby")
-                for line in content.splitlines():
-                    match = re.match(r'^\s*gem\s+["\']([^"\']+)["\']', line)
-                    if match:
-                        stack["Libraries"].append(match.group(1))
-
-            # Java
-            elif path_lower.endswith("build.gradle"):
-                stack["Languages"].append("Java/Kotlin")
-                matches = re.findall(r'implementation\s+["\']([^"\']+)["\']', content)
-                stack["Libraries"].extend(matches)
-            elif path_lower.endswith("pom.xml"):
-                stack["Languages"].append("Java")
-                try:
-                    root = ET.fromstring(content)
-                    ns = {"m": "http://maven.apache.org/POM/4.0.0"}
-                    for dep in root.findall(".//m:dependency", ns):
-                        group = dep.find("m:groupId", ns)
-                        artifact = dep.find("m:artifactId", ns)
-                        if group is not None and artifact is not None:
-                            stack["Libraries"].append(f"{group.text}:{artifact.text}")
-                except Exception as e:
-                    print(f"[Warning] Failed to parse {path}: {e}")
-
-            # DevOps / Infra
-            elif path_lower.endswith(("dockerfile", "makefile")):
-                stack["DevOps"].append(path)
+    Context, stack_info and (if one was stored) the LLM report for a repo,
+    served from `cache` (the process-wide one by default) when HEAD has not
+    moved or its manifests are unchanged. `refresh` revalidates HEAD now.
+    `with_graph` adds the resolved dependency graph (lockfiles.DependencyGraph).
 
+    Returns:
+        {"context", "stack_info", "report" (None if not cached yet),
+         "manifest_key", "cached": "report" | "analysis" | "context" | "",
+         "graph" (only with_graph)}
+    """
+    cache = cache if cache is not None else get_cache()
+    if cache is None:
+        state = await gather_context_async({"url": repo_url}, client)
+        manifests = state["context"]["manifests"]
+        result = {"context": state["context"], "stack_info": await asyncio.to_thread(analyze_manifests, manifests),
+                  "report": None, "manifest_key": state["manifest_key"], "cached": ""}
+        if with_graph:
+            result["graph"] = dependency_graph(await asyncio.to_thread(analyze_files, manifests))
+        return result
+
+    owner, repo = parse_repo_url(repo_url)
+    key = f"{owner}/{repo}"
+    # Fast path: HEAD resolved recently and analyzed at that commit, no network at all
+    known = cache.get_ref(key)
+    sha = known["sha"] if known and known["fresh"] and not refresh else None
+    hit = cache.get_context(key, sha) if sha else None
+    if hit is None:
+        async with (nullcontext(client) if client is not None else make_client()) as http:
+            if sha is None:
+                sha = await resolve_commit(http, owner, repo, cache, known)
+                hit = cache.get_context(key, sha) if sha else None
+            if hit is None:
+                state = await gather_context_async({"url": repo_url}, http, ref=sha or "HEAD")
+                hit = {"context": state["context"], "manifest_key": state["manifest_key"]}
+                if sha:
+                    cache.put_context(key, sha, hit["context"], hit["manifest_key"])
+                cached = ""
             else:
-                stack["Others"].append(path)
+                cached = "context"
+    else:
+        cached = "context"
+    context, mkey = hit["context"], hit["manifest_key"]
+
+    analysis = cache.get_analysis(mkey)
+    if analysis is None:
+        # parsing big lockfiles must not stall the event loop
+        analysis = {"stack_info": await asyncio.to_thread(analyze_manifests, context["manifests"]), "report": None}
+        cache.put_analysis(mkey, analysis["stack_info"])
+    else:
+        cached = "report" if analysis["report"] is not None else "analysis"
+    result = {"context": context, "stack_info": analysis["stack_info"], "report": analysis["report"],
+              "manifest_key": mkey, "cached": cached}
+    if with_graph:
+        # per-blob analyzer results are cached, so this rarely parses again
+        result["graph"] = dependency_graph(await asyncio.to_thread(analyze_files, context["manifests"]))
+    return result
+
+def analyze_repo_cached(repo_url: str, refresh: bool = False) -> Dict[str, Any]:
+    """Synchronous wrapper around analyze_repo_cached_async (process-wide cache)."""
+    return run_sync(analyze_repo_cached_async(repo_url, refresh=refresh))
+
+def store_report(key: str, report: str) -> None:
+    """Remember the LLM report for the analysis with manifest key `key`."""
+    cache = get_cache()
+    if cache is not None and key:
+        cache.put_report(key, report)
 
-        except Exception as e:
-            print(f"[Warning] Error analyzing {path}: {e}")
-
-    # Remove duplicates
-    for key in stack:
-        stack[key] = list(set(stack[key]))
-
-    return stack
+# -------------------------
+# Analyze manifests
+# -------------------------
+def analyze_manifests(manifests: Dict[str,str]) -> Dict[str, List[str]]:
+    """
+    Analyze manifests to infer tech stack (languages, frameworks, libraries, DevOps, others).
+    Each file goes to the analyzer registered for its name (see analyzers.py).
+    """
+    return build_stack(analyze_files(manifests))
 
 
 
@@ -262,12 +286,9 @@ def stacks_analyzer(repo_url:str)->Tuple[Dict[str, Any], Dict[str, list]]:
     """
     if not repo_url:
         raise ValueError("Repo URL cannot be empty")
-    state = {"url": repo_url}
-    # Gather context
-    state = gather_context_api(state)
-    context = state["context"]
-    # Analyze manifests
-    stack_info = analyze_manifests(context["manifests"])
+    # Gather context + analyze manifests (cached per commit / manifest content)
+    analysis = analyze_repo_cached(repo_url)
+    context, stack_info = analysis["context"], analysis["stack_info"]
     return context,stack_info #stack_info is dict , context list ,can access readme and url
 # -------------------------
 # Main entry point
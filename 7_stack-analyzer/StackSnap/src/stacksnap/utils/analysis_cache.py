@@ -0,0 +1,208 @@
+# src/stacksnap/utils/analysis_cache.py
+#
+# Persistent, content-addressed cache of StackSnap analyses (SQLite).
+#
+#   refs      repo -> HEAD commit SHA + ETag     (cheap 304 revalidation)
+#   contexts  (repo, commit SHA) -> RepoContext  (immutable once written)
+#   analyses  manifest key -> stack_info + LLM report
+#
+# The manifest key hashes the (path, blob SHA) pairs of the manifests, so a
+# new commit that leaves every manifest untouched (and a fork with identical
+# manifests) reuses the previous stack_info and report without calling the LLM.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Bump when analyze_manifests, the fetched manifest set or the prompt change;
+# opening a cache written by another version drops its contexts and analyses
+CACHE_VERSION = 3
+
+DEFAULT_TTL = 7 * 24 * 3600       # seconds an entry may be served after it was written
+DEFAULT_REF_TTL = 300             # seconds a resolved HEAD is trusted without asking GitHub
+DEFAULT_MAX_ENTRIES = 5000        # per table, least recently used evicted first
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refs (
+    repo TEXT PRIMARY KEY, sha TEXT NOT NULL, etag TEXT, checked_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contexts (
+    repo TEXT NOT NULL, sha TEXT NOT NULL, context TEXT NOT NULL, manifest_key TEXT NOT NULL,
+    created_at REAL NOT NULL, used_at REAL NOT NULL, PRIMARY KEY (repo, sha)
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    manifest_key TEXT PRIMARY KEY, stack_info TEXT NOT NULL, report TEXT,
+    created_at REAL NOT NULL, used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS contexts_used ON contexts (used_at);
+CREATE INDEX IF NOT EXISTS analyses_used ON analyses (used_at);
+"""
+
+
+def default_cache_path() -> str:
+    return os.getenv("STACKSNAP_CACHE_DB", str(Path.home() / ".cache" / "stacksnap" / "analyses.db"))
+
+
+def git_blob_sha(text: str) -> str:
+    """The SHA git (and the trees API) gives a file with this content."""
+    data = text.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def manifest_key(manifests: Dict[str, str], tree: List[dict] = ()) -> str:
+    """
+    Content address of a set of manifests: blob SHAs from the tree where
+    listed, computed from the text otherwise.
+    """
+    blob_shas = {item["path"]: item["sha"] for item in tree if item.get("sha")}
+    pairs = sorted(f"{path}:{blob_shas.get(path) or git_blob_sha(text)}" for path, text in manifests.items())
+    return hashlib.sha256(f"v{CACHE_VERSION}\n".encode() + "\n".join(pairs).encode()).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Args:
+        path: SQLite file; ":memory:" for a throwaway cache.
+        ttl: Seconds after which contexts and analyses expire.
+        ref_ttl: Seconds a resolved HEAD SHA is used without revalidation.
+        max_entries: Rows kept per table (LRU beyond that).
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL,
+                 ref_ttl: float = DEFAULT_REF_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path or default_cache_path()
+        self.ttl = ttl
+        self.ref_ttl = ref_ttl
+        self.max_entries = max_entries
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != CACHE_VERSION:
+            # contexts (fetched manifests) and analyses of another version are stale;
+            # resolved HEADs stay valid
+            self._conn.executescript("DROP TABLE IF EXISTS contexts; DROP TABLE IF EXISTS analyses;")
+            self._conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = {"ref": 0, "context": 0, "analysis": 0, "report": 0}
+        self.misses = {"ref": 0, "context": 0, "analysis": 0, "report": 0}
+
+    def _count(self, what: str, hit: bool) -> None:
+        (self.hits if hit else self.misses)[what] += 1
+
+    # ----- HEAD resolution -----
+    def get_ref(self, repo: str) -> Optional[Dict[str, Any]]:
+        """{"sha", "etag", "fresh"} for repo; fresh means no revalidation is needed yet."""
+        with self._lock:
+            row = self._conn.execute("SELECT sha, etag, checked_at FROM refs WHERE repo = ?", (repo,)).fetchone()
+        fresh = row is not None and time.time() - row[2] < self.ref_ttl
+        self._count("ref", fresh)
+        if row is None:
+            return None
+        return {"sha": row[0], "etag": row[1], "fresh": fresh}
+
+    def put_ref(self, repo: str, sha: str, etag: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?)", (repo, sha, etag, time.time()))
+            self._conn.execute(
+                "DELETE FROM refs WHERE rowid IN "
+                "(SELECT rowid FROM refs ORDER BY checked_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def touch_ref(self, repo: str) -> None:
+        """HEAD revalidated unchanged (304)."""
+        with self._lock:
+            self._conn.execute("UPDATE refs SET checked_at = ? WHERE repo = ?", (time.time(), repo))
+
+    # ----- contexts -----
+    def get_context(self, repo: str, sha: str) -> Optional[Dict[str, Any]]:
+        """{"context", "manifest_key"} for repo at commit sha, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT context, manifest_key FROM contexts WHERE repo = ? AND sha = ? AND created_at > ?",
+                (repo, sha, now - self.ttl)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE contexts SET used_at = ? WHERE repo = ? AND sha = ?", (now, repo, sha))
+        self._count("context", row is not None)
+        return None if row is None else {"context": json.loads(row[0]), "manifest_key": row[1]}
+
+    def put_context(self, repo: str, sha: str, context: Dict[str, Any], key: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO contexts VALUES (?, ?, ?, ?, ?, ?)",
+                               (repo, sha, json.dumps(context, default=str), key, now, now))
+            self._evict("contexts", now)
+
+    # ----- analyses -----
+    def get_analysis(self, key: str) -> Optional[Dict[str, Any]]:
+        """{"stack_info", "report"} for a manifest key; report is None until the LLM ran."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stack_info, report FROM analyses WHERE manifest_key = ? AND created_at > ?",
+                (key, now - self.ttl)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE analyses SET used_at = ? WHERE manifest_key = ?", (now, key))
+        self._count("analysis", row is not None)
+        if row is not None:
+            self._count("report", row[1] is not None)
+        return None if row is None else {"stack_info": json.loads(row[0]), "report": row[1]}
+
+    def put_analysis(self, key: str, stack_info: Dict[str, Any], report: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)",
+                               (key, json.dumps(stack_info), report, now, now))
+            self._evict("analyses", now)
+
+    def put_report(self, key: str, report: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE analyses SET report = ?, used_at = ? WHERE manifest_key = ?",
+                               (report, time.time(), key))
+
+    # ----- maintenance -----
+    def _evict(self, table: str, now: float) -> None:
+        self._conn.execute(f"DELETE FROM {table} WHERE created_at <= ?", (now - self.ttl,))
+        self._conn.execute(
+            f"DELETE FROM {table} WHERE rowid IN "
+            f"(SELECT rowid FROM {table} ORDER BY used_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def invalidate(self, repo: str) -> None:
+        """Forget a repo's resolved HEAD so the next analysis asks GitHub again."""
+        with self._lock:
+            self._conn.execute("DELETE FROM refs WHERE repo = ?", (repo,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.executescript("DELETE FROM refs; DELETE FROM contexts; DELETE FROM analyses;")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {t: self._conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                      for t in ("refs", "contexts", "analyses")}
+        return {"path": self.path, **counts, "hits": dict(self.hits), "misses": dict(self.misses)}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_default: Optional[AnalysisCache] = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> Optional[AnalysisCache]:
+    """Process-wide cache; None if disabled with STACKSNAP_CACHE=0."""
+    global _default
+    if os.getenv("STACKSNAP_CACHE", "1") == "0":
+        return None
+    with _default_lock:
+        if _default is None:
+            _default = AnalysisCache()
+        return _default
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from stacksnap.backend.jobs import DONE, FAILED, ClientLimitExceeded, JobManager
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _manager(per_client=2):
+    gate = asyncio.Event()
+    calls = []
+
+    async def runner(job, emit):
+        calls.append(job.key)
+        await emit("working")
+        await gate.wait()
+        if job.params.get("fail"):
+            raise ValueError("boom")
+        return job.key.upper()
+
+    return JobManager(runner, workers=2, per_client=per_client), gate, calls
+
+
+def test_same_key_joins_the_unfinished_job():
+    async def main():
+        jobs, gate, calls = await _manager()
+        first, dedup_first = await jobs.submit("owner/repo", {}, "alice")
+        second, dedup_second = await jobs.submit("owner/repo", {}, "bob")
+        assert second is first
+        assert (dedup_first, dedup_second) == (False, True)
+        assert first.clients == {"alice", "bob"}
+        gate.set()
+        await first.wait()
+        assert first.status == DONE and first.result == "OWNER/REPO"
+        assert calls == ["owner/repo"]
+        # once finished, the key runs again
+        third, dedup_third = await jobs.submit("owner/repo", {}, "bob")
+        assert third is not first and not dedup_third
+        await third.wait()
+        await jobs.stop()
+    run(main())
+
+
+def test_per_client_limit_counts_only_owned_jobs():
+    async def main():
+        jobs, gate, _ = await _manager(per_client=1)
+        await jobs.submit("a", {}, "alice")
+        with pytest.raises(ClientLimitExceeded):
+            await jobs.submit("b", {}, "alice")
+        # joining alice's job does not use up bob's slot
+        await jobs.submit("a", {}, "bob")
+        assert jobs.active_for("bob") == 0
+        own, _ = await jobs.submit("b", {}, "bob")
+        with pytest.raises(ClientLimitExceeded):
+            await jobs.submit("c", {}, "bob")
+        # a duplicate of a job in flight is still returned at the limit
+        again, dedup = await jobs.submit("b", {}, "alice")
+        assert again is own and dedup
+        gate.set()
+        await own.wait()
+        assert jobs.active_for("alice") == 0 and jobs.active_for("bob") == 0
+        await jobs.stop()
+    run(main())
+
+
+def test_failure_is_reported_and_events_stream_in_order():
+    async def main():
+        jobs, gate, _ = await _manager()
+        job, _ = await jobs.submit("bad", {"fail": True}, "alice")
+        gate.set()
+        stages = [event["stage"] async for event in job.follow()]
+        assert stages == ["queued", "started", "working", FAILED]
+        assert job.status == FAILED and job.error == "boom"
+        assert jobs.get(job.id) is job
+        await jobs.stop()
+    run(main())
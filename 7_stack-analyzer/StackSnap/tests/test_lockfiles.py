@@ -0,0 +1,300 @@
+import json
+import textwrap
+
+import pytest
+
+from stacksnap.tools import lockfiles
+from stacksnap.tools.lockfiles import assemble_graph, parse_dependency_file
+
+PACKAGE_LOCK_V3 = json.dumps({
+    "lockfileVersion": 3,
+    "packages": {
+        "": {"dependencies": {"react": "^18.2.0"}, "devDependencies": {"jest": "^29.0.0"}},
+        "node_modules/react": {"version": "18.2.0", "dependencies": {"loose-envify": "^1.1.0"}},
+        "node_modules/loose-envify": {"version": "1.4.0", "dependencies": {"js-tokens": "^4.0.0"}},
+        "node_modules/js-tokens": {"version": "4.0.0"},
+        "node_modules/jest": {"version": "29.7.0", "dev": True, "dependencies": {"js-tokens": "^3.0.0"}},
+        "node_modules/jest/node_modules/js-tokens": {"version": "3.0.2", "dev": True},
+    },
+})
+
+PACKAGE_LOCK_V1 = json.dumps({
+    "lockfileVersion": 1,
+    "dependencies": {
+        "react": {"version": "16.14.0", "requires": {"loose-envify": "^1.1.0"}},
+        "loose-envify": {"version": "1.4.0"},
+    },
+})
+
+YARN_CLASSIC = textwrap.dedent('''\
+    # yarn lockfile v1
+
+    "loose-envify@^1.1.0":
+      version "1.4.0"
+      dependencies:
+        js-tokens "^4.0.0"
+
+    js-tokens@^4.0.0:
+      version "4.0.0"
+    ''')
+
+YARN_BERRY = textwrap.dedent('''\
+    __metadata:
+      version: 6
+
+    "app@workspace:.":
+      version: 0.0.0-use.local
+      dependencies:
+        loose-envify: ^1.1.0
+
+    "loose-envify@npm:^1.1.0":
+      version: 1.4.0
+      dependencies:
+        js-tokens: ^4.0.0
+
+    "js-tokens@npm:^4.0.0":
+      version: 4.0.0
+    ''')
+
+POETRY_LOCK = textwrap.dedent('''\
+    [[package]]
+    name = "Flask"
+    version = "3.0.0"
+    groups = ["main"]
+
+    [package.dependencies]
+    Werkzeug = ">=3.0.0"
+
+    [[package]]
+    name = "werkzeug"
+    version = "3.0.1"
+    groups = ["main"]
+
+    [[package]]
+    name = "pytest"
+    version = "8.0.0"
+    groups = ["dev"]
+    ''')
+
+UV_LOCK = textwrap.dedent('''\
+    version = 1
+
+    [[package]]
+    name = "app"
+    version = "0.1.0"
+    source = { editable = "." }
+    dependencies = [
+        { name = "httpx" },
+    ]
+
+    [package.dev-dependencies]
+    dev = [
+        { name = "pytest" },
+    ]
+
+    [[package]]
+    name = "httpx"
+    version = "0.28.1"
+    source = { registry = "https://pypi.org/simple" }
+    dependencies = [
+        { name = "anyio" },
+    ]
+
+    [[package]]
+    name = "anyio"
+    version = "4.4.0"
+    source = { registry = "https://pypi.org/simple" }
+
+    [[package]]
+    name = "pytest"
+    version = "8.3.2"
+    source = { registry = "https://pypi.org/simple" }
+    ''')
+
+CARGO_LOCK = textwrap.dedent('''\
+    version = 3
+
+    [[package]]
+    name = "app"
+    version = "0.1.0"
+    dependencies = [
+     "serde",
+    ]
+
+    [[package]]
+    name = "serde"
+    version = "1.0.200"
+    source = "registry+https://github.com/rust-lang/crates.io-index"
+    dependencies = [
+     "serde_derive 1.0.200",
+    ]
+
+    [[package]]
+    name = "serde_derive"
+    version = "1.0.200"
+    source = "registry+https://github.com/rust-lang/crates.io-index"
+    ''')
+
+GO_MOD = textwrap.dedent('''\
+    module example.com/app
+
+    go 1.22
+
+    require github.com/gin-gonic/gin v1.9.1
+
+    require (
+        golang.org/x/net v0.21.0 // indirect
+    )
+    ''')
+
+GO_SUM = textwrap.dedent('''\
+    github.com/gin-gonic/gin v1.9.0 h1:aaa=
+    github.com/gin-gonic/gin v1.9.1 h1:bbb=
+    github.com/gin-gonic/gin v1.9.1/go.mod h1:ccc=
+    golang.org/x/text v0.13.0 h1:ddd=
+    golang.org/x/text v0.14.0 h1:eee=
+    ''')
+
+# (file name, text, packages, edges, direct)
+LOCKFILE_CASES = [
+    ("package-lock.json", PACKAGE_LOCK_V3,
+     {"npm:react@18.2.0", "npm:loose-envify@1.4.0", "npm:js-tokens@4.0.0", "npm:jest@29.7.0", "npm:js-tokens@3.0.2"},
+     {("npm:react@18.2.0", "npm:loose-envify@1.4.0"), ("npm:loose-envify@1.4.0", "npm:js-tokens@4.0.0"),
+      ("npm:jest@29.7.0", "npm:js-tokens@3.0.2")},
+     {"npm:react@18.2.0", "npm:jest@29.7.0"}),
+    ("package-lock.json", PACKAGE_LOCK_V1,
+     {"npm:react@16.14.0", "npm:loose-envify@1.4.0"},
+     {("npm:react@16.14.0", "npm:loose-envify@1.4.0")},
+     set()),
+    ("yarn.lock", YARN_CLASSIC,
+     {"npm:loose-envify@1.4.0", "npm:js-tokens@4.0.0"},
+     {("npm:loose-envify@1.4.0", "npm:js-tokens@4.0.0")},
+     set()),
+    ("yarn.lock", YARN_BERRY,
+     {"npm:loose-envify@1.4.0", "npm:js-tokens@4.0.0"},
+     {("npm:loose-envify@1.4.0", "npm:js-tokens@4.0.0")},
+     {"npm:loose-envify@1.4.0"}),
+    ("poetry.lock", POETRY_LOCK,
+     {"pypi:flask@3.0.0", "pypi:werkzeug@3.0.1", "pypi:pytest@8.0.0"},
+     {("pypi:flask@3.0.0", "pypi:werkzeug@3.0.1")},
+     set()),
+    ("uv.lock", UV_LOCK,
+     {"pypi:httpx@0.28.1", "pypi:anyio@4.4.0", "pypi:pytest@8.3.2"},
+     {("pypi:httpx@0.28.1", "pypi:anyio@4.4.0")},
+     {"pypi:httpx@0.28.1", "pypi:pytest@8.3.2"}),
+    ("Cargo.lock", CARGO_LOCK,
+     {"cargo:serde@1.0.200", "cargo:serde_derive@1.0.200"},
+     {("cargo:serde@1.0.200", "cargo:serde_derive@1.0.200")},
+     {"cargo:serde@1.0.200"}),
+    ("go.mod", GO_MOD,
+     {"go:github.com/gin-gonic/gin@v1.9.1", "go:golang.org/x/net@v0.21.0"},
+     set(),
+     {"go:github.com/gin-gonic/gin@v1.9.1"}),
+    ("go.sum", GO_SUM,
+     {"go:github.com/gin-gonic/gin@v1.9.1", "go:golang.org/x/text@v0.14.0"},
+     set(),
+     set()),
+]
+
+
+def _edges(graph):
+    return {(parent, child) for parent, children in graph.edges.items() for child in children}
+
+
+@pytest.mark.parametrize("name, text, packages, edges, direct", LOCKFILE_CASES,
+                         ids=[f"{c[0]}-{i}" for i, c in enumerate(LOCKFILE_CASES)])
+def test_lockfile(monkeypatch, name, text, packages, edges, direct):
+    monkeypatch.setattr(lockfiles, "ijson", None)
+    path, graph, requirements = parse_dependency_file(f"sub/{name}", text)
+    assert path == f"sub/{name}"
+    assert requirements == []
+    assert set(graph.packages) == packages
+    assert _edges(graph) == edges
+    assert {p.id for p in graph.direct()} == direct
+    assert all(p.source == f"sub/{name}" for p in graph.packages.values())
+
+
+@pytest.mark.parametrize("text", [PACKAGE_LOCK_V3, PACKAGE_LOCK_V1], ids=["v3", "v1"])
+def test_package_lock_streamed_matches_json(monkeypatch, text):
+    pytest.importorskip("ijson")
+    _, streamed, _ = parse_dependency_file("package-lock.json", text)
+    monkeypatch.setattr(lockfiles, "ijson", None)
+    _, decoded, _ = parse_dependency_file("package-lock.json", text)
+    assert streamed.to_dict() == decoded.to_dict()
+
+
+def test_package_lock_dev_flags():
+    _, graph, _ = parse_dependency_file("package-lock.json", PACKAGE_LOCK_V3)
+    dev = {p.id for p in graph.packages.values() if p.dev}
+    assert dev == {"npm:jest@29.7.0", "npm:js-tokens@3.0.2"}
+
+
+# (file name, text, ecosystem, [(name, spec, dev)])
+MANIFEST_CASES = [
+    ("package.json", json.dumps({"dependencies": {"react": "^18.2.0"}, "devDependencies": {"jest": "^29"}}),
+     "npm", [("react", "^18.2.0", False), ("jest", "^29", True)]),
+    ("requirements.txt", "# app\nFlask[async]>=3.0 ; python_version>'3.8'\n-r base.txt\n"
+                         "git+https://x/y.git\nrequests==2.32.3  # pinned\n",
+     "pypi", [("Flask", ">=3.0", False), ("requests", "==2.32.3", False)]),
+    ("setup.py", "setup(name='x', install_requires=['click>=8', \"rich\"])",
+     "pypi", [("click", ">=8", False), ("rich", "", False)]),
+    ("pyproject.toml", textwrap.dedent('''\
+        [project]
+        dependencies = ["httpx>=0.27"]
+        [project.optional-dependencies]
+        cli = ["typer"]
+        [dependency-groups]
+        dev = ["pytest>=8"]
+        '''),
+     "pypi", [("httpx", ">=0.27", False), ("typer", "", False), ("pytest", ">=8", True)]),
+    ("pyproject.toml", textwrap.dedent('''\
+        [tool.poetry.dependencies]
+        python = "^3.12"
+        django = "^5.0"
+        celery = { version = "^5.3", extras = ["redis"] }
+        [tool.poetry.group.test.dependencies]
+        pytest = "^8"
+        '''),
+     "pypi", [("django", "^5.0", False), ("celery", "^5.3", False), ("pytest", "^8", True)]),
+    ("Cargo.toml", textwrap.dedent('''\
+        [dependencies]
+        serde = { version = "1", features = ["derive"] }
+        tokio = "1.37"
+        [dev-dependencies]
+        criterion = "0.5"
+        '''),
+     "cargo", [("serde", "1", False), ("tokio", "1.37", False), ("criterion", "0.5", True)]),
+]
+
+
+@pytest.mark.parametrize("name, text, ecosystem, expected", MANIFEST_CASES,
+                         ids=[f"{c[0]}-{i}" for i, c in enumerate(MANIFEST_CASES)])
+def test_manifest_requirements(name, text, ecosystem, expected):
+    _, graph, requirements = parse_dependency_file(name, text)
+    assert graph is None
+    assert requirements == [(ecosystem, *req) for req in expected]
+
+
+def test_manifest_marks_locked_versions_direct():
+    graph = assemble_graph([
+        parse_dependency_file("web/package-lock.json", PACKAGE_LOCK_V1),
+        parse_dependency_file("web/package.json", json.dumps({"dependencies": {"react": "^16"}})),
+        # a manifest in another folder does not claim the lockfile's packages
+        parse_dependency_file("api/requirements.txt", "loose-envify==9.9.9\n"),
+    ])
+    assert {p.id for p in graph.direct()} == {"npm:react@16.14.0", "pypi:loose-envify@9.9.9"}
+    assert graph.path_to("loose-envify", "npm") == ["npm:react@16.14.0", "npm:loose-envify@1.4.0"]
+
+
+def test_go_sum_only_fills_gaps():
+    graph = assemble_graph([
+        parse_dependency_file("go.sum", GO_SUM),
+        parse_dependency_file("go.mod", GO_MOD),
+    ])
+    assert {p.id for p in graph.find("github.com/gin-gonic/gin")} == {"go:github.com/gin-gonic/gin@v1.9.1"}
+    assert graph.find("github.com/gin-gonic/gin")[0].source == "go.mod"
+    assert [p.id for p in graph.find("golang.org/x/text")] == ["go:golang.org/x/text@v0.14.0"]
+
+
+def test_unknown_file_is_ignored():
+    assert parse_dependency_file("README.md", "# hi") == ("README.md", None, [])